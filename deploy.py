@@ -9,16 +9,31 @@ Prerequisites:
 Usage:
     python deploy.py --env dev     # Deploy to dev project  
     python deploy.py --env prod    # Deploy to prod project
+    python deploy.py --env prod --watch   # Rebuild + deploy whenever new OCC files land in data/raw
 """
 
 import os
 import sys
+import json
+import time
 import argparse
+import threading
 from pathlib import Path
 from datetime import datetime
 from zipfile import ZipFile, ZIP_DEFLATED
 
-from qfieldcloud_sdk.sdk import Client, FileTransferType
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from manifest import load_manifest, stale_reasons, write_manifest  # noqa: E402
+
+# Device GeoPackage, QGIS project and QFieldCloud project per environment
+ENV_FILES = {
+    "dev": {"gpkg": "qgis/wells_dev.gpkg", "project": "qgis/wells_project_dev.qgz", "name": "field-wells-dev"},
+    "prod": {"gpkg": "qgis/wells.gpkg", "project": "qgis/wells_project.qgz", "name": "field-wells-prod"},
+}
+QFIELDCLOUD_URL = "https://app.qfield.cloud/api/v1/"
+# Transient upload failures (connection errors, timeouts, 5xx) are retried with exponential backoff
+UPLOAD_ATTEMPTS = 3
+RETRY_BACKOFF = 2.0
 
 
 def ensure_conda_env():
@@ -30,36 +45,87 @@ def ensure_conda_env():
         sys.exit(1)
 
 
-def build_data_and_project(env: str):
-    """Build the GeoPackage and QGIS project"""
+def gpkg_rows(path, layer: str = "wells"):
+    """Feature count of a GeoPackage layer for the stage manifest (None if unreadable)"""
+    import sqlite3
+    try:
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM "{layer}"').fetchone()[0]
+    except sqlite3.Error:
+        return None
+
+
+def gpkg_schema(path, layer: str = "wells"):
+    """Fingerprint of what the project builders read from a GeoPackage: table / view names and
+    the wells columns (None if unreadable). Data edits leave it unchanged."""
+    import hashlib
+    import sqlite3
+    try:
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+            tables = sorted(r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"))
+            columns = [r[1] for r in conn.execute(f'PRAGMA table_info("{layer}")')]
+    except sqlite3.Error:
+        return None
+    return hashlib.sha256(json.dumps([tables, columns]).encode()).hexdigest()[:16]
+
+
+def run_stage(stage: str, cmd: str, inputs: dict, outputs: dict, options: dict = None) -> bool:
+    """Run a build step unless its manifest shows the same inputs, code and options produced the current outputs"""
+    reasons = stale_reasons(stage, inputs, outputs, options)
+    if not reasons:
+        print(f"✅ {stage} up to date, skipped")
+        return True
+    print(f"Running {stage}: {reasons[0]}")
+    started = time.time()
+    if os.system(cmd) != 0:
+        print(f"⚠️  {stage} failed: {cmd}")
+        return False
+    rows = next((gpkg_rows(p) for p in outputs.values() if str(p).endswith(".gpkg")), None)
+    write_manifest(stage, inputs, outputs, options, rows=rows, started=started)
+    return True
+
+
+def build_data_and_project(env: str, project: bool = True, mobile: bool = False) -> bool:
+    """Build the GeoPackage and (optionally) the QGIS project; stages with current manifests are skipped.
+    Returns False as soon as a step fails, so callers do not package stale or half-written files."""
     print(f"Building data and project for {env}...")
+    files = ENV_FILES[env]
+    
+    # Build GeoPackage from the OCC lists (no-op when the wells manifest is current)
+    if os.system("python fieldapp.py build") != 0:
+        print("⚠️  build failed: python fieldapp.py build")
+        return False
     
-    # Build GeoPackage from CSVs
-    os.system("python scripts/prepare_wells_gpkg.py")
+    # Device copy: full GeoPackage, or the compact mobile profile
+    copy_cmd = "python scripts/mobile_profile.py" if mobile else "cp -f"
+    if not run_stage(f"device-{env}", f"{copy_cmd} data/processed/wells.gpkg {files['gpkg']}",
+                     {"gpkg": "data/processed/wells.gpkg"}, {"gpkg": files["gpkg"]}, {"mobile": mobile}):
+        return False
     
-    # Build QGIS project using QGIS Python
-    qgis_python = "/Applications/QGIS.app/Contents/MacOS/bin/python3"
-    if env == "dev":
-        os.system("cp -f data/processed/wells.gpkg qgis/wells_dev.gpkg")
-        os.system(f"{qgis_python} scripts/build_qgis_project.py --env dev")
-    else:
-        os.system("cp -f data/processed/wells.gpkg qgis/wells.gpkg") 
-        os.system(f"{qgis_python} scripts/build_qgis_project.py --env prod")
+    # Build QGIS project using QGIS Python, or the headless writer where QGIS is not
+    # installed (Linux build hosts, CI). Both read the device GeoPackage's schema (fields
+    # and widgets, Top priority layer, lu_* joins), so its fingerprint is a stage option;
+    # new data alone does not rebuild the project.
+    if project:
+        qgis_python = "/Applications/QGIS.app/Contents/MacOS/bin/python3"
+        if os.path.exists(qgis_python):
+            cmd, writer = f"{qgis_python} scripts/build_qgis_project.py --env {env}", "qgis"
+        else:
+            cmd, writer = f"python scripts/qgs_writer.py --env {env}", "headless"
+        return run_stage(f"project-{env}", cmd, {}, {"project": files["project"]},
+                         {"env": env, "mobile": mobile, "writer": writer, "schema": gpkg_schema(files["gpkg"])})
+    return True
 
 
 def create_package(env: str) -> Path:
-    """Create deployment package"""
+    """Create deployment package (reused when project and GeoPackage are unchanged)"""
     print(f"Creating package for {env}...")
     
     # Set up file paths
-    if env == "dev":
-        proj_file = Path("qgis/wells_project_dev.qgz")
-        gpkg_file = Path("qgis/wells_dev.gpkg")
-        project_name = "field-wells-dev"
-    else:
-        proj_file = Path("qgis/wells_project.qgz")
-        gpkg_file = Path("qgis/wells.gpkg")
-        project_name = "field-wells-prod"
+    files = ENV_FILES[env]
+    proj_file = Path(files["project"])
+    gpkg_file = Path(files["gpkg"])
+    project_name = files["name"]
     
     # Verify files exist
     for f in [proj_file, gpkg_file]:
@@ -67,7 +133,16 @@ def create_package(env: str) -> Path:
             print(f"ERROR: Missing file {f}")
             sys.exit(1)
     
+    # Same inputs as the last package: ship that zip instead of re-zipping
+    stage = f"package-{env}"
+    inputs = {"project": str(proj_file), "gpkg": str(gpkg_file)}
+    previous = (load_manifest(stage) or {}).get("outputs", {}).get("zip")
+    if previous and not stale_reasons(stage, inputs, {"zip": previous["path"]}):
+        print(f"Package unchanged: {previous['path']}")
+        return Path(previous["path"]), project_name
+    
     # Create package zip
+    started = time.time()
     dist_dir = Path("dist")
     dist_dir.mkdir(exist_ok=True)
     timestamp = datetime.now().strftime("%Y-%m-%d_%H%M")
@@ -77,12 +152,45 @@ def create_package(env: str) -> Path:
         z.write(proj_file, f"qgis/{proj_file.name}")
         z.write(gpkg_file, f"qgis/{gpkg_file.name}")
     
+    write_manifest(stage, inputs, {"zip": str(zip_path)}, rows=gpkg_rows(gpkg_file), started=started)
     print(f"Created package: {zip_path}")
     return zip_path, project_name
 
 
-def deploy_to_qfieldcloud(zip_path: Path, project_name: str):
-    """Deploy package to QFieldCloud"""
+def is_transient(e: Exception) -> bool:
+    """Worth retrying: connection errors, timeouts and 5xx responses; not auth / 4xx or local errors"""
+    response = getattr(e, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return status >= 500
+    try:
+        import requests  # the SDK's transport
+        network = (requests.ConnectionError, requests.Timeout)
+    except ImportError:
+        network = ()
+    return isinstance(e, (ConnectionError, TimeoutError, *network))
+
+
+def with_retries(fn, what: str, attempts: int = None):
+    """fn() with up to `attempts` tries on transient errors, sleeping RETRY_BACKOFF, 2x, 4x... seconds
+    between them; any other error is raised at once"""
+    attempts = attempts or UPLOAD_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts or not is_transient(e):
+                raise
+            delay = RETRY_BACKOFF * 2 ** (attempt - 1)
+            print(f"⚠️  {what} failed ({e}); retry {attempt}/{attempts - 1} in {delay:g}s")
+            time.sleep(delay)
+
+
+def deploy_to_qfieldcloud(zip_path: Path, project_name: str, media_dir: str = None, media_index: str = None):
+    """Deploy package to QFieldCloud (media_dir / media_index: attachment store, default qgis/ and data/media)"""
+    # Imported here so --help, --skip-build checks and the CLI stay fast
+    from qfieldcloud_sdk.sdk import Client, FileTransferType
+
     print(f"Deploying to QFieldCloud project: {project_name}")
     
     # Check credentials
@@ -93,7 +201,7 @@ def deploy_to_qfieldcloud(zip_path: Path, project_name: str):
         sys.exit(1)
     
     # Connect to QFieldCloud
-    client = Client("https://app.qfield.cloud/api/v1/")
+    client = Client(QFIELDCLOUD_URL)
     client.login(username, password)
     
     # Get or create project
@@ -125,13 +233,21 @@ def deploy_to_qfieldcloud(zip_path: Path, project_name: str):
             if file_path.is_file():
                 remote_path = Path(file_path.name)
                 print(f"Uploading {file_path.name}...")
-                client.upload_file(
-                    project_id, 
-                    FileTransferType.PROJECT, 
-                    file_path, 
+                with_retries(lambda: client.upload_file(
+                    project_id,
+                    FileTransferType.PROJECT,
+                    file_path,
                     remote_path,
                     show_progress=False
-                )
+                ), f"Upload of {file_path.name}")
+
+        # Compact survey media (scripts/attachments.py): only files this project has not received yet
+        from attachments import INDEX_PATH, PROJECT_DIR, upload_new
+        sent = upload_new(lambda local, remote: with_retries(lambda: client.upload_file(
+            project_id, FileTransferType.PROJECT, Path(local), Path(remote), show_progress=False),
+            f"Upload of {remote}"), project_name, media_dir or PROJECT_DIR, media_index or INDEX_PATH)
+        if sent:
+            print(f"Uploaded {sent} new media files")
 
         # Ensure the server-side Project File is set to our uploaded .qgz/.qgs (first-time init)
         project_file_name = None
@@ -182,23 +298,154 @@ def deploy_to_qfieldcloud(zip_path: Path, project_name: str):
         print(f"⚠️  Could not update timestamp: {e}")
     
     print(f"Deployment complete! Project available at: https://app.qfield.cloud/a/{project_name}")
+    return project_id
+
+
+def record_deploy(env: str, zip_path: Path, project_name: str, project_id, started: float):
+    """Deploy manifest: which package (by hash) is live in which QFieldCloud project"""
+    write_manifest(f"deploy-{env}", {"zip": str(zip_path)}, {}, {"project": project_name},
+                   started=started, extra={"project_id": project_id})
 
 
-def main():
+def latest_inputs() -> dict:
+    """Newest file per registered source, with size/mtime so in-place overwrites count"""
+    from sources import SOURCES, latest_by_date, load_source_config
+    load_source_config()
+    inputs = {}
+    for name, src in SOURCES.items():
+        p = latest_by_date(src["pattern"])
+        if p:
+            st = os.stat(p)
+            inputs[name] = (p, st.st_size, st.st_mtime_ns)
+    return inputs
+
+
+def _scan_raw_dir(raw_dir: Path) -> dict:
+    return {p.name: (p.stat().st_size, p.stat().st_mtime_ns) for p in raw_dir.iterdir() if p.is_file()}
+
+
+def watch_raw_dir(raw_dir: Path, debounce: float = 5.0, poll_interval: float = 10.0):
+    """Yield once per settled burst of changes in raw_dir (inotify via watchdog, else polling)"""
+    changed = threading.Event()
+    last_event = [time.monotonic()]
+    observer = None
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                last_event[0] = time.monotonic()
+                changed.set()
+
+        observer = Observer()
+        observer.schedule(_Handler(), str(raw_dir), recursive=False)
+        observer.start()
+        print(f"Watching {raw_dir} (filesystem events, debounce {debounce:g}s)")
+    except ImportError:
+        print(f"Watching {raw_dir} (polling every {poll_interval:g}s, debounce {debounce:g}s)")
+
+    signature = _scan_raw_dir(raw_dir)
+    try:
+        while True:
+            if observer:
+                # Blocks without CPU until the kernel reports a change
+                changed.wait()
+                # Debounce: wait until no event for `debounce` seconds
+                while True:
+                    remaining = last_event[0] + debounce - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    time.sleep(remaining)
+                changed.clear()
+            else:
+                time.sleep(poll_interval)
+                current = _scan_raw_dir(raw_dir)
+                if current == signature:
+                    continue
+                # Debounce: rescan until the directory stops changing
+                while True:
+                    signature = current
+                    time.sleep(debounce)
+                    current = _scan_raw_dir(raw_dir)
+                    if current == signature:
+                        break
+            yield
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
+
+
+def watch_and_deploy(env: str, debounce: float, poll_interval: float, mobile: bool = False):
+    """Daemon: rebuild data and redeploy when the newest OCC files change"""
+    pending = threading.Event()
+
+    def deploy_worker():
+        # One deploy at a time; drops landing mid-deploy collapse into one follow-up run
+        while True:
+            pending.wait()
+            pending.clear()
+            started = time.monotonic()
+            try:
+                # Stage manifests skip the QGIS project rebuild unless its code or options changed
+                if not build_data_and_project(env, mobile=mobile):
+                    print("⚠️  Watch build failed; nothing deployed")
+                    continue
+                zip_path, project_name = create_package(env)
+                deploy_started = time.time()
+                project_id = deploy_to_qfieldcloud(zip_path, project_name)
+                record_deploy(env, zip_path, project_name, project_id, deploy_started)
+                print(f"✅ Watch deploy finished in {time.monotonic() - started:.1f}s")
+            except (Exception, SystemExit) as e:
+                print(f"⚠️  Watch deploy failed: {e}")
+
+    threading.Thread(target=deploy_worker, daemon=True).start()
+
+    deployed = latest_inputs()
+    for _ in watch_raw_dir(Path("data/raw"), debounce, poll_interval):
+        inputs = latest_inputs()
+        if inputs == deployed:
+            continue
+        for name, (path, _, _) in inputs.items():
+            print(f"New input {name}: {os.path.basename(path)}")
+        deployed = inputs
+        print("Queued rebuild + deploy")
+        pending.set()
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Deploy field-app to QFieldCloud")
     parser.add_argument("--env", choices=["dev", "prod"], default="dev", 
                        help="Environment to deploy (default: dev)")
     parser.add_argument("--skip-build", action="store_true", 
                        help="Skip data and project build step")
-    args = parser.parse_args()
+    parser.add_argument("--mobile", action="store_true",
+                       help="Ship the compact mobile-profile GeoPackage (pruned columns, lookup tables)")
+    parser.add_argument("--watch", action="store_true",
+                       help="Stay running; rebuild and deploy when new OCC files land in data/raw")
+    parser.add_argument("--debounce", type=float, default=5.0,
+                       help="Seconds without file changes before a watch rebuild starts (default: 5)")
+    parser.add_argument("--poll-interval", type=float, default=10.0,
+                       help="Polling interval when filesystem events are unavailable (default: 10)")
+    args = parser.parse_args(argv)
     
     ensure_conda_env()
     
-    if not args.skip_build:
-        build_data_and_project(args.env)
+    if args.watch:
+        try:
+            watch_and_deploy(args.env, args.debounce, args.poll_interval, args.mobile)
+        except KeyboardInterrupt:
+            print("Stopped watching")
+        return
+    
+    if not args.skip_build and not build_data_and_project(args.env, mobile=args.mobile):
+        raise SystemExit("ERROR: Build failed; nothing deployed")
     
     zip_path, project_name = create_package(args.env)
-    deploy_to_qfieldcloud(zip_path, project_name)
+    started = time.time()
+    project_id = deploy_to_qfieldcloud(zip_path, project_name)
+    record_deploy(args.env, zip_path, project_name, project_id, started)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+field-app command line: build, qa, deploy, status and verify in one entrypoint.
+
+Heavy modules (pandas/geopandas for the build, qfieldcloud_sdk for deploys)
+are imported only inside the subcommands that need them, so `status`,
+`qa` and an up-to-date `build` start in well under 200 ms. Staleness comes
+from the stage manifests (scripts/manifest.py), not from reading the data.
+
+Usage:
+    python fieldapp.py status
+    python fieldapp.py verify [package-prod ...]
+    python fieldapp.py build [--force] [--merge-near-duplicates]
+    python fieldapp.py qa [--gpkg qgis/wells_dev.gpkg]
+    python fieldapp.py score [--gpkg qgis/wells_dev.gpkg] [--show 10]   # after a sync
+    python fieldapp.py validate [--gpkg qgis/wells_dev.gpkg] [--far-m 250]   # survey GPS vs well
+    python fieldapp.py migrate --gpkg data/master/wells.gpkg   # well_surveys -> point layer + epoch index
+    python fieldapp.py deploy --env dev [--skip-build] [--mobile]   # any deploy.py option
+    python fieldapp.py export leaks.fgb --leaks   # any scripts/export_wells.py option
+    python fieldapp.py serve [--port 8765]        # office tile / GeoJSON service
+"""
+
+import os
+import sys
+import argparse
+import sqlite3
+from typing import List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+from manifest import (  # noqa: E402
+    build_options, list_manifests, load_manifest, recheck, stale_reasons, verify,
+)
+from sources import find_source_files, load_source_config  # noqa: E402
+
+OUT_GPKG = os.path.join(PROJECT_ROOT, "data", "processed", "wells.gpkg")
+LAYER_NAME = "wells"
+
+# Oklahoma extent (EPSG:4326) with a small margin for border wells
+OK_BBOX = (-103.1, 33.5, -94.3, 37.1)
+
+
+def _stale(merge: bool = False, tolerance: float = 30.0) -> List[str]:
+    load_source_config()
+    try:
+        inputs = find_source_files()
+    except FileNotFoundError as e:
+        return [str(e)]
+    return stale_reasons("wells", inputs, {"gpkg": OUT_GPKG}, build_options(merge, tolerance))
+
+
+def cmd_build(args: argparse.Namespace) -> int:
+    # A near-duplicate report is produced by the build itself, so it always runs
+    if not (args.force or args.near_dupe_report):
+        reasons = _stale(args.merge_near_duplicates, args.near_dupe_tolerance)
+        if not reasons:
+            print(f"✅ {os.path.relpath(OUT_GPKG, PROJECT_ROOT)} is up to date (use --force to rebuild)")
+            return 0
+        for r in reasons:
+            print(f"Rebuilding: {r}")
+
+    import prepare_wells_gpkg  # pandas/geopandas only from here on
+    prepare_wells_gpkg.build(args.jobs, args.near_dupe_report, args.merge_near_duplicates,
+                             args.near_dupe_tolerance)
+    return 0
+
+
+def qa_checks(gpkg: str, layer: str = LAYER_NAME) -> List[Tuple[str, int]]:
+    """(check, failing rows) for well_id and geometry sanity, straight from SQLite"""
+    with sqlite3.connect(f"file:{gpkg}?mode=ro", uri=True) as conn:
+        geom = conn.execute(
+            "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = ?", (layer,)
+        ).fetchone()[0]
+        minx, miny, maxx, maxy = OK_BBOX
+        checks = [
+            ("rows", f'SELECT COUNT(*) FROM "{layer}"'),
+            ("null/blank well_id", f"SELECT COUNT(*) FROM \"{layer}\" WHERE TRIM(COALESCE(well_id, '')) = ''"),
+            ("duplicate well_id", f'SELECT COALESCE(SUM(n - 1), 0) FROM (SELECT COUNT(*) n FROM "{layer}" '
+                                  f'WHERE well_id IS NOT NULL GROUP BY well_id HAVING n > 1)'),
+            ("missing geometry", f'SELECT COUNT(*) FROM "{layer}" WHERE "{geom}" IS NULL'),
+            # Bounds come from the R-tree, so no geometry blobs are parsed
+            ("outside Oklahoma", f'SELECT COUNT(*) FROM "rtree_{layer}_{geom}" '
+                                 f"WHERE minx < {minx} OR maxx > {maxx} OR miny < {miny} OR maxy > {maxy}"),
+        ]
+        return [(name, conn.execute(sql).fetchone()[0]) for name, sql in checks]
+
+
+def cmd_qa(args: argparse.Namespace) -> int:
+    if not os.path.exists(args.gpkg):
+        print(f"ERROR: Missing GeoPackage {args.gpkg}")
+        return 1
+    results = qa_checks(args.gpkg)
+    failed = 0
+    for name, n in results:
+        if name == "rows":
+            print(f"{os.path.relpath(args.gpkg, PROJECT_ROOT)}: {n} wells")
+            failed += n == 0
+            continue
+        print(f"{'✅' if n == 0 else '❌'} {name}: {n}")
+        failed += n > 0
+    return 1 if failed else 0
+
+
+def cmd_score(args: argparse.Namespace) -> int:
+    if not os.path.exists(args.gpkg):
+        print(f"ERROR: Missing GeoPackage {args.gpkg}")
+        return 1
+    from priority_score import load_config, rescore  # pandas only from here on
+    with sqlite3.connect(args.gpkg) as conn:
+        changed = rescore(conn, load_config())
+        top = conn.execute(
+            f'SELECT priority_rank, priority_score, well_id, county_name FROM "{LAYER_NAME}" '
+            "WHERE priority_rank IS NOT NULL ORDER BY priority_rank LIMIT ?", (args.show,)
+        ).fetchall()
+    print(f"✅ Rescored {os.path.relpath(args.gpkg, PROJECT_ROOT)}: {changed} wells changed")
+    for rank, score, well_id, county in top:
+        print(f"{rank:>4}  {score:6.2f}  {well_id}  {county or ''}")
+    return 0
+
+
+def cmd_validate(args: argparse.Namespace) -> int:
+    if not os.path.exists(args.gpkg):
+        print(f"ERROR: Missing GeoPackage {args.gpkg}")
+        return 1
+    from validate_surveys import ARRIVED_M, FAR_M, STATUSES, validate  # pandas only from here on
+    with sqlite3.connect(args.gpkg) as conn:
+        s = validate(conn, args.arrived_m or ARRIVED_M, args.far_m or FAR_M)
+    print(f"✅ Checked {sum(s[k] for k in STATUSES)} surveys: {s['arrived']} arrived, {s['near']} near, "
+          f"{s['far']} far, {s['no_location'] + s['no_well']} unchecked; {s['confirmed']} wells confirmed")
+    return 1 if s["far"] else 0
+
+
+def cmd_migrate(args: argparse.Namespace) -> int:
+    if not os.path.exists(args.gpkg):
+        print(f"ERROR: Missing GeoPackage {args.gpkg}")
+        return 1
+    from prepare_wells_gpkg import create_survey_table
+    with sqlite3.connect(args.gpkg) as conn:
+        create_survey_table(conn)
+    return 0
+
+
+def cmd_attachments(args: argparse.Namespace) -> int:
+    if not os.path.exists(args.gpkg):
+        print(f"ERROR: Missing GeoPackage {args.gpkg}")
+        return 1
+    from attachments import ingest  # Pillow only from here on
+    s = ingest(args.gpkg, args.media, jobs=args.jobs)
+    print(f"✅ {s['files']} attachments: {s['new']} new, {s['duplicates']} already stored, "
+          f"{s['missing']} missing; {s['rewritten']} wells point at compact copies")
+    return 0
+
+
+def cmd_status(args: argparse.Namespace) -> int:
+    manifest = load_manifest("wells")
+    if manifest:
+        print(f"Last build: {manifest.get('built_utc')} ({manifest.get('rows')} wells)")
+        for name, inp in manifest.get("inputs", {}).items():
+            date = (manifest.get("dataset_date") or {}).get(name)
+            print(f"  {name}: {inp.get('path') if inp else 'missing'}{f' ({date})' if date else ''}")
+    else:
+        print("Last build: unknown (no wells manifest)")
+
+    stale = 0
+    reasons = _stale()
+    print(f"{'❌' if reasons else '✅'} wells: {'stale' if reasons else 'up to date'}")
+    for r in reasons:
+        print(f"  - {r}")
+    stale += bool(reasons)
+
+    # Later stages are re-checked against what they recorded (inputs, code, outputs)
+    for stage in list_manifests():
+        if stage == "wells":
+            continue
+        m = load_manifest(stage) or {}
+        reasons = recheck(stage)
+        print(f"{'❌' if reasons else '✅'} {stage}: {m.get('built_utc')}"
+              f"{' (stale)' if reasons else ''}")
+        for r in reasons:
+            print(f"  - {r}")
+        stale += bool(reasons)
+    return 1 if stale else 0
+
+
+def cmd_verify(args: argparse.Namespace) -> int:
+    stages = args.stages or list_manifests()
+    failed = 0
+    for stage in stages:
+        problems = verify(stage)
+        if problems:
+            failed += 1
+            print(f"❌ {stage}")
+            for p in problems:
+                print(f"  - {p}")
+        else:
+            m = load_manifest(stage) or {}
+            outs = ", ".join(f"{o['path']} {o['sha256'][:12]}" for o in m.get("outputs", {}).values() if o)
+            print(f"✅ {stage}: {outs or 'no outputs'}")
+    return 1 if failed else 0
+
+
+def cmd_deploy(argv: List[str]) -> int:
+    import deploy  # qfieldcloud_sdk is imported when the upload starts
+    deploy.main(argv)
+    return 0
+
+
+def cmd_export(argv: List[str]) -> int:
+    import export_wells  # pyogrio / pyarrow only from here on
+    export_wells.main(argv)
+    return 0
+
+
+def cmd_serve(argv: List[str]) -> int:
+    import tile_server
+    tile_server.main(argv)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="field-app build / QA / deploy / status")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="Rebuild data/processed/wells.gpkg if inputs, code or options changed")
+    p.add_argument("--force", action="store_true", help="Rebuild even when the manifest says it is current")
+    p.add_argument("--jobs", type=int, default=0,
+                   help="Parallel source parsers (default: auto, serial for small inputs)")
+    p.add_argument("--near-dupe-report", metavar="CSV", help="Write near-duplicate merge candidates")
+    p.add_argument("--merge-near-duplicates", action="store_true",
+                   help="Collapse near-duplicate groups, keeping the highest-priority source (STFD first)")
+    p.add_argument("--near-dupe-tolerance", type=float, default=30.0,
+                   help="Near-duplicate match distance in metres (default: 30)")
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("qa", help="Check well_id uniqueness and geometry without loading geopandas")
+    p.add_argument("--gpkg", default=OUT_GPKG, help="GeoPackage to check (default: data/processed/wells.gpkg)")
+    p.set_defaults(func=cmd_qa)
+
+    p = sub.add_parser("score", help="Recompute survey priority scores/ranks (e.g. after a sync)")
+    p.add_argument("--gpkg", default=OUT_GPKG, help="GeoPackage to rescore (default: data/processed/wells.gpkg)")
+    p.add_argument("--show", type=int, default=10, help="Print the top N wells (default: 10)")
+    p.set_defaults(func=cmd_score)
+
+    p = sub.add_parser("validate", help="Check survey GPS positions against their wells, confirm arrivals")
+    p.add_argument("--gpkg", default=OUT_GPKG, help="Synced GeoPackage (default: data/processed/wells.gpkg)")
+    p.add_argument("--arrived-m", type=float, help="Arrival radius in metres (default: 50)")
+    p.add_argument("--far-m", type=float, help="Flag surveys farther than this many metres (default: 250)")
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser("migrate", help="Upgrade well_surveys in an existing file (point geometry, epoch timestamps)")
+    p.add_argument("--gpkg", default=OUT_GPKG, help="GeoPackage to upgrade (default: data/processed/wells.gpkg)")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("attachments", help="Deduplicate and resize synced photos / voice notes, rewrite their paths")
+    p.add_argument("--gpkg", default=OUT_GPKG, help="Synced GeoPackage (default: data/processed/wells.gpkg)")
+    p.add_argument("--media", nargs="*", default=[], help="Directories the stored paths are relative to")
+    p.add_argument("--jobs", type=int, default=0, help="Resize processes (default: auto)")
+    p.set_defaults(func=cmd_attachments)
+
+    p = sub.add_parser("status", help="Report which build stages are stale, from their manifests")
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("verify", help="Re-hash stage outputs (GeoPackages, project, zip) against their manifests")
+    p.add_argument("stages", nargs="*", help="Stages to verify (default: all recorded)")
+    p.set_defaults(func=cmd_verify)
+
+    # Options are passed through to deploy.py untouched (see `deploy --help`)
+    sub.add_parser("deploy", help="Build, package and upload (deploy.py options)", add_help=False)
+    sub.add_parser("export", help="Filtered GeoJSON-seq / FlatGeobuf / CSV extracts (export_wells.py options)",
+                   add_help=False)
+    sub.add_parser("serve", help="Read-only vector tile / GeoJSON service for office viewers (tile_server.py options)",
+                   add_help=False)
+
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "deploy":
+        return cmd_deploy(extra)
+    if args.command == "export":
+        return cmd_export(extra)
+    if args.command == "serve":
+        return cmd_serve(extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Survey attachments: content-addressed media store and compact device copies.
+
+QField writes photo_path / voice_note as paths to full-resolution phone media
+inside the synced project. ingest() hashes every referenced file (SHA-256),
+keeps one original per hash in data/media/objects/<aa>/<hash>.<ext> however
+many wells or syncs reference it, and writes compact versions beside the
+project in qgis/media/: a resized JPEG (longest side DISPLAY_PX) and a
+THUMB_PX thumbnail per photo, generated in a process pool when there are
+enough new photos to pay for it. Voice notes are copied as-is. photo_path
+and voice_note are then rewritten to the compact relative paths
+(media/<hash>.jpg), so synced packages carry the small files only.
+
+data/media/index.json records each hash, its compact files and which
+QFieldCloud projects they were uploaded to; upload_new() sends only files a
+project has not received yet. Resizing needs Pillow; without it photos are
+still deduplicated but shipped at full size.
+
+Usage:
+    python scripts/attachments.py ingest --gpkg qgis/wells.gpkg [--media DIR ...] [--jobs N]
+    python scripts/attachments.py status
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from gpkg_utils import register_gpkg_functions
+from manifest import sha256_file
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEDIA_ROOT = os.path.join(PROJECT_ROOT, "data", "media")
+STORE_DIR = os.path.join(MEDIA_ROOT, "objects")
+INDEX_PATH = os.path.join(MEDIA_ROOT, "index.json")
+# Compact copies live beside the project; paths in the GeoPackage are relative to it
+PROJECT_DIR = os.path.join(PROJECT_ROOT, "qgis")
+COMPACT_SUBDIR = "media"
+LAYER_NAME = "wells"
+
+PHOTO_EXTS = {".jpg", ".jpeg", ".png", ".heic", ".webp", ".tif", ".tiff"}
+DISPLAY_PX = 1600
+THUMB_PX = 256
+JPEG_QUALITY = 80
+# Below this many new photos, process pool startup costs more than it saves
+PARALLEL_MIN_PHOTOS = 8
+
+
+def load_index(path: str = INDEX_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"objects": {}, "uploaded": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_index(index: Dict[str, Any], path: str = INDEX_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def object_path(digest: str, ext: str, store_dir: str = STORE_DIR) -> str:
+    return os.path.join(store_dir, digest[:2], f"{digest}{ext}")
+
+
+def _resize(task: Tuple[str, str, str]) -> Dict[str, str]:
+    """Display-size JPEG and thumbnail of one original (process pool worker); returns relative paths"""
+    src, digest, project_dir = task
+    out = {"compact": f"{COMPACT_SUBDIR}/{digest}.jpg", "thumb": f"{COMPACT_SUBDIR}/thumbs/{digest}.jpg"}
+    try:
+        with Image.open(src) as im:
+            im = ImageOps.exif_transpose(im).convert("RGB")
+            for key, px in (("compact", DISPLAY_PX), ("thumb", THUMB_PX)):
+                dst = os.path.join(project_dir, out[key])
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                copy = im.copy()
+                copy.thumbnail((px, px))
+                copy.save(dst, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    except OSError:
+        # Unreadable here (e.g. HEIC without a plugin, truncated upload): ship the original
+        return _copy_compact(src, digest, os.path.splitext(src)[1], project_dir)
+    return out
+
+
+def _copy_compact(src: str, digest: str, ext: str, project_dir: str) -> Dict[str, str]:
+    rel = f"{COMPACT_SUBDIR}/{digest}{ext}"
+    dst = os.path.join(project_dir, rel)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    shutil.copyfile(src, dst)
+    return {"compact": rel}
+
+
+def resolve(value: str, search_dirs: Sequence[str]) -> Optional[str]:
+    """First existing file for a stored attachment path (absolute, or relative to a search dir)"""
+    if os.path.isabs(value):
+        return value if os.path.isfile(value) else None
+    for base in search_dirs:
+        candidate = os.path.join(base, value)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def ingest(gpkg: str, media_dirs: Sequence[str] = (), project_dir: str = PROJECT_DIR,
+           store_dir: str = STORE_DIR, index_path: str = INDEX_PATH, jobs: int = 0) -> Dict[str, int]:
+    """Store referenced media by hash, build compact copies for new ones, and point
+    photo_path / voice_note at the compact files. Already-compact paths are left alone."""
+    index = load_index(index_path)
+    objects = index["objects"]
+    search = [*media_dirs, project_dir, os.path.dirname(os.path.abspath(gpkg))]
+    with sqlite3.connect(gpkg) as conn:
+        rows = conn.execute(
+            f'SELECT fid, photo_path, voice_note, last_edit_utc FROM "{LAYER_NAME}" '
+            "WHERE photo_path IS NOT NULL OR voice_note IS NOT NULL").fetchall()
+
+    stats = {"files": 0, "new": 0, "duplicates": 0, "missing": 0, "rewritten": 0}
+    digests: Dict[str, str] = {}  # stored value -> hash
+    pending: List[Tuple[str, str, str]] = []
+    derived_now = set()
+    for value in sorted({v for _, photo, voice, _ in rows for v in (photo, voice) if v}):
+        if value.startswith(f"{COMPACT_SUBDIR}/"):
+            continue
+        src = resolve(value, search)
+        if src is None:
+            stats["missing"] += 1
+            continue
+        stats["files"] += 1
+        digest = sha256_file(src)
+        digests[value] = digest
+        if digest in objects:
+            stats["duplicates"] += 1
+            compact = objects[digest].get("compact")
+            if digest in derived_now or (compact and os.path.isfile(os.path.join(project_dir, compact))):
+                continue
+            # Compact copy gone (fresh checkout, cleaned project dir): rebuild it from the stored original
+            ext = objects[digest]["ext"]
+            dst = object_path(digest, ext, store_dir)
+            if not os.path.isfile(dst):
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                shutil.copyfile(src, dst)
+        else:
+            ext = os.path.splitext(src)[1].lower()
+            dst = object_path(digest, ext, store_dir)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(src, dst)
+            stats["new"] += 1
+            objects[digest] = {"ext": ext, "bytes": os.path.getsize(dst),
+                               "first_seen": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+        derived_now.add(digest)
+        if Image is not None and ext in PHOTO_EXTS:
+            pending.append((dst, digest, project_dir))
+        else:
+            objects[digest].update(_copy_compact(dst, digest, ext, project_dir))
+
+    if pending:
+        if jobs <= 0:
+            jobs = min(len(pending), os.cpu_count() or 1) if len(pending) >= PARALLEL_MIN_PHOTOS else 1
+        if jobs <= 1:
+            derived = [_resize(t) for t in pending]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                derived = list(pool.map(_resize, pending))
+        for (_, digest, _), out in zip(pending, derived):
+            objects[digest].update(out)
+    elif Image is None and any(objects[d]["ext"] in PHOTO_EXTS for d in set(digests.values())):
+        print("⚠️  Pillow not installed: photos deduplicated but not resized")
+
+    updates = []
+    for fid, photo, voice, edited in rows:
+        new_photo = objects[digests[photo]]["compact"] if photo in digests else photo
+        new_voice = objects[digests[voice]]["compact"] if voice in digests else voice
+        if (new_photo, new_voice) != (photo, voice):
+            updates.append((new_photo, new_voice, edited, fid))
+    if updates:
+        with sqlite3.connect(gpkg) as conn:
+            register_gpkg_functions(conn)  # GDAL's R-tree update triggers call ST_IsEmpty
+            conn.executemany(f'UPDATE "{LAYER_NAME}" SET photo_path = ?, voice_note = ? WHERE fid = ?',
+                             [(p, v, fid) for p, v, _, fid in updates])
+            # wells_update stamps attachment edits; a path rewrite is not a field edit
+            conn.executemany(f'UPDATE "{LAYER_NAME}" SET last_edit_utc = ? WHERE fid = ?',
+                             [(edited, fid) for _, _, edited, fid in updates])
+        stats["rewritten"] = len(updates)
+    save_index(index, index_path)
+    return stats
+
+
+def upload_new(upload: Callable[[str, str], Any], project: str, project_dir: str = PROJECT_DIR,
+               index_path: str = INDEX_PATH) -> int:
+    """Call upload(local_path, remote_path) for compact files `project` has not received; returns the count"""
+    index = load_index(index_path)
+    done = set(index["uploaded"].get(project, []))
+    sent = 0
+    for entry in index["objects"].values():
+        for key in ("compact", "thumb"):
+            rel = entry.get(key)
+            if not rel or rel in done:
+                continue
+            local = os.path.join(project_dir, rel)
+            if not os.path.isfile(local):
+                continue
+            upload(local, rel)
+            done.add(rel)
+            sent += 1
+            # Recorded as we go, so an interrupted upload resumes where it stopped
+            index["uploaded"][project] = sorted(done)
+            save_index(index, index_path)
+    return sent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deduplicate, resize and store survey photos / voice notes")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_in = sub.add_parser("ingest", help="Store synced media by hash and rewrite paths to compact copies")
+    p_in.add_argument("--gpkg", required=True, help="Synced GeoPackage whose photo_path / voice_note to process")
+    p_in.add_argument("--media", nargs="*", default=[], help="Directories the stored paths are relative to")
+    p_in.add_argument("--project-dir", default=PROJECT_DIR, help="Project folder for compact copies (default: qgis)")
+    p_in.add_argument("--jobs", type=int, default=0, help="Resize processes (default: auto)")
+    sub.add_parser("status", help="Summarize the media store")
+    args = parser.parse_args()
+
+    if args.cmd == "ingest":
+        if not os.path.exists(args.gpkg):
+            raise SystemExit(f"ERROR: Missing GeoPackage {args.gpkg}")
+        s = ingest(args.gpkg, args.media, project_dir=args.project_dir, jobs=args.jobs)
+        print(f"✅ {s['files']} attachments: {s['new']} new, {s['duplicates']} already stored, "
+              f"{s['missing']} missing; {s['rewritten']} wells point at compact copies")
+        return
+    index = load_index()
+    objects = index["objects"].values()
+    original = sum(o["bytes"] for o in objects)
+    compact = sum(os.path.getsize(os.path.join(PROJECT_DIR, o["compact"])) for o in objects
+                  if os.path.isfile(os.path.join(PROJECT_DIR, o.get("compact", ""))))
+    print(f"{len(index['objects'])} stored objects, {original / 2**20:.1f} MB originals, "
+          f"{compact / 2**20:.1f} MB compact")
+    for project, files in sorted(index["uploaded"].items()):
+        print(f"  {project}: {len(files)} files uploaded")
+
+
+if __name__ == "__main__":
+    main()
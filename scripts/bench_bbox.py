@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark R-tree guided bbox (viewport) queries on wells.gpkg: rows stored in
+well_id order vs Hilbert order (the prepare_wells_gpkg.py default).
+
+Besides wall time it reports how many contiguous fid runs each result set
+spans; fewer runs means the matching rows sit on fewer SQLite pages.
+
+Usage:
+    python scripts/bench_bbox.py [--queries 500] [--size 0.25]
+"""
+
+import os
+import time
+import random
+import argparse
+import sqlite3
+import tempfile
+from typing import Dict, List, Tuple
+
+import geopandas as gpd
+
+from prepare_wells_gpkg import OUT_GPKG, LAYER_NAME, write_gpkg
+
+BBOX_SQL = f"""
+    SELECT w.* FROM "{LAYER_NAME}" w
+    JOIN "rtree_{LAYER_NAME}_geom" r ON w.fid = r.id
+    WHERE r.minx <= ? AND r.maxx >= ? AND r.miny <= ? AND r.maxy >= ?
+"""
+
+
+def random_viewports(extent: Tuple[float, float, float, float], n: int, size: float,
+                     seed: int = 42) -> List[Tuple[float, float, float, float]]:
+    minx, miny, maxx, maxy = extent
+    rnd = random.Random(seed)
+    boxes = []
+    for _ in range(n):
+        x0 = rnd.uniform(minx, maxx - size)
+        y0 = rnd.uniform(miny, maxy - size)
+        boxes.append((x0, y0, x0 + size, y0 + size))
+    return boxes
+
+
+def run_queries(gpkg: str, boxes: List[Tuple[float, float, float, float]]) -> Dict[str, float]:
+    conn = sqlite3.connect(gpkg)
+    conn.execute("PRAGMA cache_size = -256")  # small page cache, closer to a device
+    rows = runs = 0
+    started = time.perf_counter()
+    for x0, y0, x1, y1 in boxes:
+        fids = sorted(r[0] for r in conn.execute(BBOX_SQL, (x1, x0, y1, y0)))
+        rows += len(fids)
+        runs += sum(1 for i, f in enumerate(fids) if i == 0 or f != fids[i - 1] + 1)
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return {"ms_per_query": 1000 * elapsed / len(boxes), "rows": rows / len(boxes), "runs": runs / len(boxes)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="bbox query benchmark: well_id vs Hilbert row order")
+    parser.add_argument("--gpkg", default=OUT_GPKG, help="Source GeoPackage (default: data/processed/wells.gpkg)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--size", type=float, default=0.25, help="Viewport size in degrees (default: 0.25)")
+    args = parser.parse_args()
+
+    gdf = gpd.read_file(args.gpkg, layer=LAYER_NAME)
+    df = gdf.drop(columns="geometry")
+    boxes = random_viewports(tuple(gdf.total_bounds), args.queries, args.size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, spatial in (("well_id order", False), ("hilbert order", True)):
+            path = os.path.join(tmp, f"{label.split()[0]}.gpkg")
+            write_gpkg(df, path, spatial_order=spatial)
+            run_queries(path, boxes)  # warm the OS cache equally for both files
+            results[label] = run_queries(path, boxes)
+
+    print(f"{len(df)} wells, {args.queries} viewports of {args.size}°")
+    for label, r in results.items():
+        print(f"{label:<14} {r['ms_per_query']:7.3f} ms/query  {r['rows']:7.1f} rows  {r['runs']:7.1f} fid runs")
+    base, hil = results["well_id order"], results["hilbert order"]
+    print(f"speedup {base['ms_per_query'] / hil['ms_per_query']:.2f}x, "
+          f"{base['runs'] / max(hil['runs'], 1e-9):.1f}x fewer contiguous runs")
+
+
+if __name__ == "__main__":
+    main()
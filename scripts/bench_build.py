@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark the wells.gpkg merge + write path: the previous pipeline
+(column-at-a-time ensure_columns, filter .copy(), full sort + drop_duplicates,
+GeoDataFrame + to_file) against the current one (single reindex, groupby
+idxmin dedup, WKB geometry from NumPy written by pyogrio), then the write
+step alone per engine (pyogrio NumPy writer vs Arrow write_arrow).
+
+Peak memory is measured with tracemalloc (NumPy/pandas allocations; GDAL's
+own buffers are not traced). --scale N repeats the parsed sources N times
+with distinct well_ids to see how both paths grow.
+
+Usage:
+    python scripts/bench_build.py [--scale 10] [--repeat 3]
+"""
+
+import os
+import gc
+import time
+import argparse
+import tempfile
+import tracemalloc
+from functools import partial
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from prepare_wells_gpkg import (
+    WRITE_ENGINE, SOURCES, CARRYOVER_COLS, STATUS_DEFAULTS, AUDIT_COLS, ATTACHMENT_COLS,
+    ensure_columns, priority_winners, write_gpkg, hilbert_key, apply_triggers,
+    find_source_files, load_source_config, load_sources,
+)
+
+
+def legacy_pipeline(frames: List[pd.DataFrame], out_gpkg: str) -> int:
+    import sqlite3
+    import geopandas as gpd
+
+    df = pd.concat(frames, ignore_index=True, sort=False)
+    for c in [*CARRYOVER_COLS, *AUDIT_COLS, *ATTACHMENT_COLS]:
+        if c not in df.columns:
+            df[c] = pd.NA
+    for c, v in STATUS_DEFAULTS.items():
+        if c not in df.columns:
+            df[c] = v
+    df = df[pd.notna(df["X"]) & pd.notna(df["Y"])].copy()
+    priority = {name: src["priority"] for name, src in SOURCES.items()}
+    df["_priority"] = df["source_list"].map(priority).fillna(max(priority.values(), default=0) + 1)
+    df = df.sort_values(["well_id", "_priority"]).drop_duplicates(subset=["well_id"], keep="first")
+    df = df.drop(columns=["_priority"])
+    df = df.iloc[np.argsort(hilbert_key(df["X"].to_numpy(), df["Y"].to_numpy()), kind="stable")]
+    gdf = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df["X"], df["Y"], crs="EPSG:4326"), crs="EPSG:4326")
+    if os.path.exists(out_gpkg):
+        os.remove(out_gpkg)
+    gdf.to_file(out_gpkg, layer="wells", driver="GPKG")
+    with sqlite3.connect(out_gpkg) as conn:
+        apply_triggers(conn)
+    return len(df)
+
+
+def lean_frame(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    df = pd.concat(frames, ignore_index=True, sort=False)
+    valid = df["X"].notna() & df["Y"].notna()
+    return ensure_columns(df, rows=priority_winners(df.loc[valid, ["well_id", "source_list"]]))
+
+
+def lean_pipeline(frames: List[pd.DataFrame], out_gpkg: str, engine: str = WRITE_ENGINE) -> int:
+    df = lean_frame(frames)
+    write_gpkg(df, out_gpkg, engine=engine)
+    return len(df)
+
+
+def write_only(df: pd.DataFrame, out_gpkg: str, engine: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        write_gpkg(df, out_gpkg, engine=engine)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def scaled(frames: List[pd.DataFrame], scale: int) -> List[pd.DataFrame]:
+    """Repeat each source `scale` times with distinct well_ids and slightly shifted points"""
+    out = []
+    for f in frames:
+        for k in range(scale):
+            c = f.copy()
+            if k:
+                c["well_id"] = c["well_id"] + f"-{k}"
+                c["X"] = c["X"] + 1e-4 * k
+            out.append(c)
+    return out
+
+
+def measure(fn: Callable[[List[pd.DataFrame], str], int], frames: List[pd.DataFrame],
+            out_gpkg: str, repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        rows = fn(frames, out_gpkg)
+        times.append(time.perf_counter() - started)
+    # Separate traced run: tracemalloc slows allocation-heavy code several-fold
+    gc.collect()
+    tracemalloc.start()
+    fn(frames, out_gpkg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": min(times), "peak_mb": peak / 2**20, "rows": rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Merge + write benchmark: previous vs lean pipeline")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the parsed sources N times (default: 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per pipeline; best time is reported")
+    args = parser.parse_args()
+
+    load_source_config()
+    frames = scaled(load_sources(find_source_files()), args.scale)
+    print(f"{sum(len(f) for f in frames)} input rows from {len(frames)} frames")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            "previous": measure(legacy_pipeline, frames, os.path.join(tmp, "legacy.gpkg"), args.repeat),
+            "lean": measure(partial(lean_pipeline, engine=WRITE_ENGINE), frames,
+                            os.path.join(tmp, "lean.gpkg"), args.repeat),
+        }
+    for label, r in results.items():
+        print(f"{label:<9} {r['seconds']:7.3f} s  peak {r['peak_mb']:8.1f} MB  {r['rows']} wells")
+    old, new = results["previous"], results["lean"]
+    print(f"{old['seconds'] / new['seconds']:.2f}x faster, peak memory {new['peak_mb'] / old['peak_mb']:.0%} of previous")
+
+    engines = ["numpy"] + (["arrow"] if WRITE_ENGINE == "arrow" else [])
+    df = lean_frame(frames)
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine in engines:
+            secs = write_only(df, os.path.join(tmp, f"{engine}.gpkg"), engine, args.repeat)
+            print(f"write_gpkg engine={engine:<6} {secs:7.3f} s  {len(df) / secs:10,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
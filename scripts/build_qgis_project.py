@@ -2,7 +2,10 @@
 
 import os
 import sys
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from zipfile import ZipFile, ZIP_DEFLATED
 
 QGIS_RES = "/Applications/QGIS.app/Contents/Resources"
 os.environ.setdefault("PROJ_LIB", os.path.join(QGIS_RES, "proj"))
@@ -15,75 +18,59 @@ from qgis.core import (
     QgsLayerTreeGroup, QgsCoordinateReferenceSystem, QgsReferencedRectangle,
     QgsAction, QgsActionManager, QgsRectangle, QgsFieldConstraints,
     QgsAttributeEditorContainer, QgsAttributeEditorField, QgsEditFormConfig,
-    QgsField
+    QgsField, QgsVectorLayerJoinInfo, QgsSingleSymbolRenderer
 )
-from PyQt5.QtGui import QColor
 from PyQt5.QtCore import QVariant
+from PyQt5.QtXml import QDomDocument
 
-PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
-QGIS_DIR = os.path.join(PROJECT_ROOT, "qgis")
-GPKG_QGIS_PATH = os.path.join(QGIS_DIR, "wells.gpkg")
-DEV_GPKG_QGIS_PATH = os.path.join(QGIS_DIR, "wells_dev.gpkg")
-DATA_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
-GPKG_DATA_PATH = os.path.join(DATA_DIR, "wells.gpkg")
-DEV_GPKG_DATA_PATH = os.path.join(DATA_DIR, "wells_dev.gpkg")
-LAYER_NAME = "wells"
-OUT_QGZ = os.path.join(QGIS_DIR, "wells_project.qgz")
-OUT_QGZ_DEV = os.path.join(QGIS_DIR, "wells_project_dev.qgz")
-MBTILES_DIR = os.path.join(QGIS_DIR, "mbtiles")
-
-# Consistent color scheme - same colors for Gas/Oil/Other across both shapes
-COLORS = {
-    "GAS": QColor("#2196F3"),    # Blue for Gas
-    "OIL": QColor("#FF9800"),    # Orange for Oil  
-    "OTHER": QColor("#9C27B0")   # Purple for Other
-}
+from project_spec import (
+    QGIS_DIR, LAYER_NAME, RENDER_EXPRESSION, PRIORITY_SYMBOL, LOOKUP_JOINS, YES_NO_FIELDS, YES_NO_MAP,
+    CONTEXT_FIELDS, FORM_FIELDS, FIELD_ALIASES, VISITED_DEFAULT, ACTIONS, LEGACY_ACTIONS, BASEMAPS,
+    OK_EXTENT, layer_views, render_categories, resolve_variants, subset,
+)
 
-# Single size for all points
-POINT_SIZE = "2.6"
+MBTILES_DIR = os.path.join(QGIS_DIR, "mbtiles")
 
 
 def build_renderer(layer: QgsVectorLayer) -> QgsCategorizedSymbolRenderer:
     """Build categorized renderer with shape differentiation: circles for orphan, pins for STFD"""
-    categories = []
-    
-    # Create categories for all combinations
-    for well_type in ("GAS", "OIL", "OTHER"):
-        for source in ("STFD", "ORPHAN"):
-            color = COLORS.get(well_type, QColor("#666666"))  # Use consistent color by well type
-            
-            # Shape differentiation: pins for STFD, circles for orphan
-            if source == "STFD":
-                shape_name = "triangle"  # Triangle/pin shape for STFD (more distinctive)
-            else:
-                shape_name = "circle"  # Circle for orphan
-            
-            symbol = QgsMarkerSymbol.createSimple({
-                'name': shape_name,
-                'color': color.name(),
-                'outline_color': '#000000',
-                'outline_width': '0.4',
-                'size': POINT_SIZE
-            })
-            
-            # Category value should match the expression we'll use
-            category_value = f"{well_type}_{source}"
-            label = f"{well_type} ({source})"
-            categories.append(QgsRendererCategory(category_value, symbol, label))
-    
-    # Use expression to concatenate well_type and source_list
-    expression = "concat(\"well_type\", '_', \"source_list\")"
-    return QgsCategorizedSymbolRenderer(expression, categories)
+    categories = [
+        QgsRendererCategory(c["value"], QgsMarkerSymbol.createSimple(c["symbol"]), c["label"])
+        for c in render_categories()
+    ]
+    # Expression concatenates well_type and source_list to match the category values
+    return QgsCategorizedSymbolRenderer(RENDER_EXPRESSION, categories)
+
+
+def build_priority_renderer() -> QgsSingleSymbolRenderer:
+    """Larger red stars for the next wells to visit, drawn above the category symbols"""
+    return QgsSingleSymbolRenderer(QgsMarkerSymbol.createSimple(PRIORITY_SYMBOL))
+
+
+def latlon_exprs(layer: QgsVectorLayer) -> tuple:
+    """Lat/lon expressions; the transform is only needed when the layer is not in EPSG:4326"""
+    if layer.crs().authid() == "EPSG:4326":
+        return "$y", "$x"
+    geom = "transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326')"
+    return f"y({geom})", f"x({geom})"
+
+
+def coords_expr(layer: QgsVectorLayer) -> str:
+    """'lat,lon' text: the stored coords_latlon column, else computed per feature"""
+    if layer.fields().indexOf("coords_latlon") != -1:
+        return '"coords_latlon"'
+    lat, lon = latlon_exprs(layer)
+    return f"concat({lat}, ',', {lon})"
+
 
 def add_virtual_fields(layer: QgsVectorLayer) -> None:
-    """Add useful virtual fields (not persisted) for copy/share in QField."""
+    """Fallback for GeoPackages without the stored gmaps_url/coords_latlon columns
+    (written by prepare_wells_gpkg.py): add them as virtual fields"""
     fields = layer.fields()
     def ensure_expr_field(name: str, expr: str):
         if fields.indexOf(name) == -1:
             layer.addExpressionField(expr, QgsField(name, QVariant.String))
-    # Google Maps view URL and lat,lon string
-    expr_lat = "y(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326'))"
-    expr_lon = "x(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326'))"
+    expr_lat, expr_lon = latlon_exprs(layer)
     ensure_expr_field("gmaps_url", f"concat('https://maps.google.com/?q=', {expr_lat}, ',', {expr_lon})")
     ensure_expr_field("coords_latlon", f"concat({expr_lat}, ',', {expr_lon})")
 
@@ -97,7 +84,7 @@ def apply_value_maps(layer: QgsVectorLayer) -> None:
         if idx == -1:
             return
         cfg = {
-            "map": {"No": 0, "Yes": 1},
+            "map": dict(YES_NO_MAP),
             "AllowNull": False,
             "UseCompleter": False,
             "UseRepresentedValue": False
@@ -114,51 +101,32 @@ def apply_value_maps(layer: QgsVectorLayer) -> None:
         if idx != -1:
             layer.setEditorWidgetSetup(idx, QgsEditorWidgetSetup("Hidden", {}))
 
-    # Editable survey fields: Yes/No only (ValueMap)
-    set_value_map_yn("exists")
-    set_value_map_yn("small_leak")
-    set_value_map_yn("viable_leak")
-
-    # Show a few helpful read-only fields below the toggles
-    context_fields = {"county_name", "operator_name", "well_type", "well_name", "coords_latlon", "gmaps_url"}
-    editable_fields = {"exists", "small_leak", "viable_leak", "reset_survey"}
+    # Editable survey fields: Yes/No only (ValueMap), incl. the reset survey helper toggle
+    for name in YES_NO_FIELDS:
+        set_value_map_yn(name)
 
+    # Show a few helpful read-only fields below the toggles; hide everything else
     for i in range(fields.count()):
         name = fields.at(i).name()
-        if name in editable_fields:
+        if name in YES_NO_FIELDS:
             continue
-        elif name in context_fields:
+        elif name in CONTEXT_FIELDS:
             set_read_only(name)
         else:
             set_hidden(name)
 
     # Set friendly field aliases
-    alias_map = {
-        "exists": "Exists on site",
-        "small_leak": "Small leak",
-        "viable_leak": "Viable for plugging",
-        "county_name": "County",
-        "operator_name": "Operator",
-        "well_type": "Well type",
-        "well_name": "Well name",
-        "coords_latlon": "Lat, Lon",
-        "gmaps_url": "Google Maps Link",
-    }
-    for fname, alias in alias_map.items():
+    for fname, alias in FIELD_ALIASES.items():
         idx = fields.indexOf(fname)
         if idx != -1:
             layer.setFieldAlias(idx, alias)
 
-    # Reset survey helper toggle
-    set_value_map_yn("reset_survey")
-
     print("✅ Widgets & aliases set; context + link fields shown read-only; others hidden; reset toggle added")
 
     # Ensure visited flips to 1 on any change client-side for immediate UI update
     v_idx = fields.indexOf("visited")
     if v_idx != -1:
-        expr = "case when coalesce(\"exists\", -1) != -1 or coalesce(\"small_leak\",0) != 0 or coalesce(\"viable_leak\",0) != 0 then 1 else coalesce(\"visited\",0) end"
-        layer.setDefaultValueDefinition(v_idx, QgsDefaultValue(expr, True))
+        layer.setDefaultValueDefinition(v_idx, QgsDefaultValue(VISITED_DEFAULT, True))
         # Also make visited read-only/hidden in form
         set_hidden("visited")
 
@@ -240,7 +208,7 @@ def configure_mobile_survey_form(layer: QgsVectorLayer) -> None:
     try:
         from qgis.core import QgsAttributeEditorContainer, QgsAttributeEditorField
         root = QgsAttributeEditorContainer("Survey", None)
-        for fname in ("exists", "small_leak", "viable_leak", "reset_survey", "county_name", "operator_name", "well_type", "well_name", "coords_latlon", "gmaps_url"):
+        for fname in FORM_FIELDS:
             idx = fields.indexOf(fname)
             if idx != -1:
                 root.addChildElement(QgsAttributeEditorField(fname, idx, root))
@@ -341,162 +309,214 @@ def configure_form_layout(layer: QgsVectorLayer) -> None:
 def add_actions(layer: QgsVectorLayer) -> None:
     mgr: QgsActionManager = layer.actions()
     for act in list(mgr.actions()):
-        if act.name() in ("Open in Google Maps", "Share via WhatsApp", "Open in Apple Maps", "My Location"):
+        if act.name() in LEGACY_ACTIONS:
             mgr.removeAction(act)
-    mgr.addAction(QgsAction.OpenUrl, "Open in Google Maps (directions)",
-                  "concat('https://www.google.com/maps/dir/?api=1&destination=', y(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326')), ',', x(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326')))", None, False)
-    mgr.addAction(QgsAction.OpenUrl, "Open in Google Maps (view)",
-                  "concat('https://maps.google.com/?q=', y(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326')), ',', x(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326')))", None, False)
-    mgr.addAction(QgsAction.OpenUrl, "Share via WhatsApp",
-                  "concat('https://wa.me/?text=', url_encode(concat('Well ', \"well_id\", ' — https://maps.google.com/?q=', y(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326')), ',', x(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326')))))", None, False)
-    mgr.addAction(QgsAction.OpenUrl, "Open in Apple Maps",
-                  "concat('http://maps.apple.com/?daddr=', y(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326')), ',', x(transform($geometry, layer_property(@layer,'crs'), 'EPSG:4326')))", None, False)
-    # Optional quick access to user's current location in Maps
-    mgr.addAction(QgsAction.OpenUrl, "My Location",
-                  "'https://www.google.com/maps/search/?api=1&query=My+Location'", None, False)
-
-
-def add_basemap_layers(proj: QgsProject) -> None:
-    """Add simple, standard basemap layers that work reliably in QField"""
-    
-    # Satellite basemap: Simplified Google Satellite (bottom layer)
-    satellite_uri = "type=xyz&url=https://mt1.google.com/vt/lyrs%3Ds%26x%3D{x}%26y%3D{y}%26z%3D{z}&zmax=19&zmin=0&http-header:User-Agent=QField"
-    satellite_layer = QgsRasterLayer(satellite_uri, "Satellite (Google)", "wms") 
-    if satellite_layer.isValid():
-        proj.addMapLayer(satellite_layer, False)
-        print("✅ Added Satellite basemap")
-    else:
-        print("❌ Failed to add Satellite basemap")
-        
-    # OpenStreetMap basemap (alternative)
-    osm_uri = "type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png&zmax=19&zmin=0&http-header:User-Agent=QField"
-    osm_layer = QgsRasterLayer(osm_uri, "OpenStreetMap", "wms")
-    if osm_layer.isValid():
-        proj.addMapLayer(osm_layer, False)
-        print("✅ Added OpenStreetMap basemap")
-    else:
-        print("❌ Failed to add OpenStreetMap basemap")
+    coords = coords_expr(layer)
+    for name, template in ACTIONS:
+        mgr.addAction(QgsAction.OpenUrl, name, template.format(coords=coords), None, False)
+
+
+def add_lookup_layers(proj: QgsProject, gpkg: str) -> list:
+    """Load mobile-profile lookup tables, if the GeoPackage has them, as registry-only layers"""
+    lookups = []
+    for table, code_field, name_field in LOOKUP_JOINS:
+        lu = QgsVectorLayer(f"{gpkg}|layername={table}", table, "ogr")
+        if lu.isValid():
+            proj.addMapLayer(lu, False)
+            lookups.append((lu, code_field, name_field))
+    if lookups:
+        print(f"✅ Mobile profile: {len(lookups)} lookup tables loaded")
+    return lookups
+
+
+def add_lookup_joins(layer: QgsVectorLayer, lookups: list) -> None:
+    """Join lookup names back so forms and renderer see county_name / operator_name / well_type"""
+    for lu, code_field, name_field in lookups:
+        if layer.fields().indexOf(code_field) == -1:
+            continue
+        join = QgsVectorLayerJoinInfo()
+        join.setJoinLayer(lu)
+        join.setJoinFieldName("code")
+        join.setTargetFieldName(code_field)
+        join.setJoinFieldNamesSubset([name_field])
+        join.setPrefix("")
+        join.setUsingMemoryCache(True)
+        join.setEditable(False)
+        layer.addJoin(join)
+
+
+def basemap_layers() -> list:
+    """Simple, standard basemap layers that work reliably in QField (prototypes, cloned into each project)"""
+    layers = []
+    # Satellite (Google) first: it renders at the bottom
+    for name, uri, _visible in BASEMAPS:
+        layer = QgsRasterLayer(uri, name, "wms")
+        if layer.isValid():
+            layers.append(layer)
+            print(f"✅ Added {name} basemap")
+        else:
+            print(f"❌ Failed to add {name} basemap")
+    return layers
+
+
+class LayerTemplates:
+    """Renderer, form, widgets, aliases and actions configured once per layer kind and
+    field set, exported as a QGIS style and imported into every further layer of that
+    kind (other filtered views, other projects in a batch) instead of being rebuilt"""
+
+    def __init__(self):
+        self._styles = {}
+
+    def apply(self, layer: QgsVectorLayer, kind: str, configure) -> None:
+        add_virtual_fields(layer)
+        key = (kind, tuple(layer.fields().names()))
+        doc = self._styles.get(key)
+        if doc is None:
+            configure(layer)
+            doc = QDomDocument("qgis")
+            layer.exportNamedStyle(doc)
+            self._styles[key] = doc
+        else:
+            layer.importNamedStyle(doc)
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--env", choices=["dev","prod"], default="prod")
-    args = parser.parse_args()
+def configure_wells_layer(layer: QgsVectorLayer) -> None:
+    layer.setRenderer(build_renderer(layer))
+    layer.setLabelsEnabled(False)
+    configure_mobile_survey_form(layer)
+    add_actions(layer)
 
-    qgs = QgsApplication([], False)
-    QgsApplication.setPrefixPath("/Applications/QGIS.app/Contents/MacOS", True)
-    qgs.initQgis()
 
-    proj = QgsProject.instance()
+def configure_priority_layer(layer: QgsVectorLayer) -> None:
+    layer.setRenderer(build_priority_renderer())
+    layer.setLabelsEnabled(False)
+    configure_mobile_survey_form(layer)
+    add_actions(layer)
+    table_config = layer.attributeTableConfig()
+    table_config.setSortExpression('"priority_rank"')
+    layer.setAttributeTableConfig(table_config)
 
-    gpkg = GPKG_QGIS_PATH if args.env == "prod" else DEV_GPKG_QGIS_PATH
-    if not os.path.exists(gpkg):
-        gpkg = GPKG_DATA_PATH if args.env == "prod" else DEV_GPKG_DATA_PATH
-    out_qgz = OUT_QGZ if args.env == "prod" else OUT_QGZ_DEV
 
-    uri = f"{gpkg}|layername={LAYER_NAME}"
-    if not os.path.exists(gpkg):
-        raise RuntimeError(f"Missing GeoPackage: {gpkg}")
+def _subset(*clauses) -> str:
+    where = subset(*clauses)
+    return f"|subset={where}" if where else ""
 
-    wells = QgsVectorLayer(uri, "Wells", "ogr")
-    if not wells.isValid():
-        raise RuntimeError("Failed to load wells layer from GeoPackage")
 
-    # Configure layer for editing in QField
-    wells.startEditing()
-    wells.commitChanges()
-    
-    # Enable editing capabilities  
-    capabilities = wells.dataProvider().capabilities()
-    print(f"Layer capabilities: {capabilities}")
-    
-    # Set simple categorized renderer for all wells
-    wells.setRenderer(build_renderer(wells))
-    
-    # No labels - keep it simple
-    wells.setLabelsEnabled(False)
+CONFIGURE = {"wells": configure_wells_layer, "priority": configure_priority_layer}
 
-    # Add basemaps FIRST (so they render at bottom)
-    add_basemap_layers(proj)
-    
-    # Configure wells layer with mobile survey form
-    configure_mobile_survey_form(wells)
-    add_actions(wells)
 
-    # Add wells layer to project (will render above basemaps)
-    proj.addMapLayer(wells, False)
-    
-    # Create filtered layer view for "Not Visited" wells
-    not_surveyed_uri = f'{gpkg}|layername={LAYER_NAME}|subset="visited" = 0'
-    not_surveyed_layer = QgsVectorLayer(not_surveyed_uri, "Not Visited", "ogr")
-    if not_surveyed_layer.isValid():
-        not_surveyed_layer.setRenderer(build_renderer(not_surveyed_layer))
-        configure_mobile_survey_form(not_surveyed_layer)
-        add_actions(not_surveyed_layer)
-        proj.addMapLayer(not_surveyed_layer, False)
-        print("✅ Added 'Not Visited' filtered layer")
-
-    # Create filtered layer view for "Surveyed" wells
-    surveyed_uri = f'{gpkg}|layername={LAYER_NAME}|subset="visited" = 1'
-    surveyed_layer = QgsVectorLayer(surveyed_uri, "Surveyed", "ogr")
-    if surveyed_layer.isValid():
-        surveyed_layer.setRenderer(build_renderer(surveyed_layer))
-        configure_mobile_survey_form(surveyed_layer)
-        add_actions(surveyed_layer)
-        proj.addMapLayer(surveyed_layer, False)
-        print("✅ Added 'Surveyed' filtered layer")
-    
-    # Organize layers in simple tree structure
+def build_project(variant: dict, templates: LayerTemplates, basemaps: list) -> QgsProject:
+    """Assemble one project in its own QgsProject (not the singleton), reusing templates and basemaps"""
+    gpkg, where = variant["gpkg"], variant["filter"]
+    if not os.path.exists(gpkg):
+        raise RuntimeError(f"Missing GeoPackage: {gpkg}")
+    proj = QgsProject()
+
+    wells = QgsVectorLayer(f"{gpkg}|layername={LAYER_NAME}{_subset(where)}", "Wells", "ogr")
+    if not wells.isValid():
+        raise RuntimeError(f"Failed to load wells layer from GeoPackage: {gpkg}")
+
+    # Mobile profile GeoPackages store repeated strings in lookup tables
+    lookups = add_lookup_layers(proj, gpkg)
+
+    def view(name: str, clause: str, kind: str):
+        layer = wells if clause is None else QgsVectorLayer(
+            f"{gpkg}|layername={LAYER_NAME}{_subset(clause, where)}", name, "ogr")
+        if not layer.isValid():
+            return None
+        add_lookup_joins(layer, lookups)
+        templates.apply(layer, kind, CONFIGURE[kind])
+        proj.addMapLayer(layer, False)
+        return layer
+
+    # Basemaps are cloned from one prototype per session (added to the tree last, so they render at the bottom)
+    for base in basemaps:
+        proj.addMapLayer(base.clone(), False)
+
+    # Layer tree (project_spec.layer_views): "Top priority" (the best-ranked unvisited wells of
+    # this variant, by scripts/priority_score.py) and Not Visited visible; Surveyed and all Wells for reference
     root = proj.layerTreeRoot()
-    
-    # Add wells layer (primary, visible) - will be on top in render order
-    if not_surveyed_layer.isValid():
-        not_surveyed_tree = root.addLayer(not_surveyed_layer)
-        not_surveyed_tree.setItemVisibilityChecked(True)
-        print("✅ 'Not Visited' layer set to visible")
-
-    # Add surveyed and all wells layers for reference (hidden by default)
-    if 'surveyed_layer' in locals() and surveyed_layer.isValid():
-        surveyed_tree = root.addLayer(surveyed_layer)
-        surveyed_tree.setItemVisibilityChecked(False)
-        print("✅ 'Surveyed' layer added (hidden by default)")
-
-    all_wells_tree = root.addLayer(wells)
-    all_wells_tree.setItemVisibilityChecked(False)
-    print("✅ 'Wells' layer added (hidden by default)")
-    
-    # Add basemap layers to tree (will render at bottom)
+    for name, clause, kind, visible in layer_views(wells.fields().indexOf("priority_rank") != -1, where):
+        layer = view(name, clause, kind)
+        if layer is not None:
+            root.addLayer(layer).setItemVisibilityChecked(visible)
+    base_visible = {name: visible for name, _uri, visible in BASEMAPS}
     for layer in proj.mapLayers().values():
-        if layer.name() in ["Satellite (Google)", "OpenStreetMap"]:
-            basemap_tree = root.addLayer(layer)
-            # Set satellite visible by default, OSM hidden
-            if layer.name() == "Satellite (Google)":
-                basemap_tree.setItemVisibilityChecked(True)
-                print("✅ Satellite layer set to visible")
-            else:
-                basemap_tree.setItemVisibilityChecked(False)
-                print("✅ OpenStreetMap layer set to hidden")
-    
-    # Keep only Not Visited and basemaps visible by default
-    if not_surveyed_layer.isValid():
-        all_wells_tree.setItemVisibilityChecked(False)
-        print("✅ Only 'Not Visited' visible by default")
-
-    # Set initial extent to Oklahoma
-    oklahoma_extent = QgsRectangle(-103.002, 33.615, -94.430, 37.002)  # Oklahoma bbox
-    oklahoma_ref_extent = QgsReferencedRectangle(oklahoma_extent, QgsCoordinateReferenceSystem("EPSG:4326"))
-    proj.viewSettings().setDefaultViewExtent(oklahoma_ref_extent)
-    
-    # Set project CRS to WGS84 (EPSG:4326) for consistency
+        if layer.name() in base_visible:
+            # Satellite visible by default, OSM hidden
+            root.addLayer(layer).setItemVisibilityChecked(base_visible[layer.name()])
+
+    # Initial extent: the variant's wells, or Oklahoma for the full list
+    extent = QgsRectangle(*OK_EXTENT)  # Oklahoma bbox
+    if where and not wells.extent().isEmpty():
+        extent = wells.extent().buffered(0.05)
+    else:
+        print("✅ Set initial extent to Oklahoma")
+    proj.viewSettings().setDefaultViewExtent(QgsReferencedRectangle(extent, QgsCoordinateReferenceSystem("EPSG:4326")))
     proj.setCrs(QgsCoordinateReferenceSystem("EPSG:4326"))
-    
-    print("✅ Set initial extent to Oklahoma")
+    return proj
+
+
+def write_qgz(proj: QgsProject, out_qgz: str):
+    """Write the project XML on this thread; returns a callable that zips it into out_qgz.
+    Paths in the project are relative to the .qgs location, so it is written beside the output."""
+    out_dir = os.path.dirname(os.path.abspath(out_qgz))
+    os.makedirs(out_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(out_qgz))[0]
+    tmp_qgs = os.path.join(out_dir, f".{name}.{os.getpid()}.qgs")
+    if not proj.write(tmp_qgs):
+        raise RuntimeError(f"Failed to write project {out_qgz}: {proj.error()}")
+
+    def pack() -> str:
+        tmp_qgz = f"{out_qgz}.tmp"
+        with ZipFile(tmp_qgz, "w", compression=ZIP_DEFLATED) as z:
+            z.write(tmp_qgs, f"{name}.qgs")
+        os.replace(tmp_qgz, out_qgz)
+        os.remove(tmp_qgs)
+        return out_qgz
+    return pack
+
+
+def build_projects(variants: list, jobs: int = 0) -> list:
+    """Build every variant in one QGIS session; project XML is serialized on the main
+    thread (QGIS layers are not thread-safe) and compressed to .qgz in a thread pool"""
+    qgs = QgsApplication([], False)
+    QgsApplication.setPrefixPath("/Applications/QGIS.app/Contents/MacOS", True)
+    qgs.initQgis()
 
-    os.makedirs(QGIS_DIR, exist_ok=True)
-    proj.write(out_qgz)
-    print(f"Wrote project: {out_qgz}")
+    templates = LayerTemplates()
+    basemaps = basemap_layers()
+    written = []
+    with ThreadPoolExecutor(max_workers=jobs or min(4, os.cpu_count() or 1)) as pool:
+        pending = []
+        for variant in variants:
+            proj = build_project(variant, templates, basemaps)
+            pending.append(pool.submit(write_qgz(proj, variant["out"])))
+            proj.clear()
+            print(f"✅ Built project '{variant['name']}'")
+        for fut in pending:
+            written.append(fut.result())
+            print(f"Wrote project: {written[-1]}")
 
     qgs.exitQgis()
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build QField projects (one, or many in a single QGIS session)")
+    parser.add_argument("--env", choices=["dev","prod"], default="prod")
+    parser.add_argument("--batch", nargs="+", metavar="VARIANT",
+                        help="Build several projects in one session: dev, prod, all, or names from data/projects.json")
+    parser.add_argument("--per-county", nargs="+", default=[], choices=["dev", "prod"], metavar="ENV",
+                        help="Also build one project per county from this env's GeoPackage")
+    parser.add_argument("--jobs", type=int, default=0, help="Threads compressing .qgz outputs (default: up to 4)")
+    args = parser.parse_args()
+
+    names = args.batch or ([] if args.per_county else [args.env])
+    variants = resolve_variants(names, args.per_county)
+    started = time.time()
+    written = build_projects(variants, args.jobs)
+    print(f"✅ {len(written)} project(s) in {time.time() - started:.1f} s (one QGIS session)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Partner extracts from the master GeoPackage: GeoJSON-seq, FlatGeobuf or CSV.
+
+Filters (counties, source list, leaks, viable, visited, bbox, raw SQL) are
+combined into one SQLite WHERE clause that GDAL's GPKG driver hands to
+SQLite as-is, so it is answered through the well_id / county / visited /
+leak indexes the build creates and the bbox through the R-tree. The source
+is only read, never modified. Features
+are streamed from GDAL to the output driver in Arrow batches
+(pyogrio.open_arrow -> write_arrow), never loading the layer into memory.
+FlatGeobuf output includes its packed Hilbert R-tree spatial index. With
+--per-county each county is written to its own file, in a process pool.
+
+Usage:
+    python scripts/export_wells.py leaks.geojsonl --leaks
+    python scripts/export_wells.py osage_viable.fgb --county OSAGE --viable
+    python scripts/export_wells.py out/ --county ROGERS CREEK TULSA --per-county --format csv
+    python scripts/export_wells.py box.csv --bbox -97.5 35.3 -97.2 35.6 --where "well_type = 'GAS'"
+"""
+
+import os
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyogrio
+
+from master_store import DEFAULT_MASTER, DEFAULT_SRC
+from prepare_wells_gpkg import LEAK_FILTER
+
+LAYER_NAME = "wells"
+FORMATS = {
+    "geojsonseq": ("GeoJSONSeq", ".geojsonl"),
+    "fgb": ("FlatGeobuf", ".fgb"),
+    "csv": ("CSV", ".csv"),
+}
+EXTENSIONS = {ext: fmt for fmt, (_, ext) in FORMATS.items()}
+EXTENSIONS[".geojsons"] = "geojsonseq"
+
+
+def _quote(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def build_where(counties: Sequence[str] = (), sources: Sequence[str] = (), leaks: bool = False,
+                viable: bool = False, visited: Optional[int] = None, where: Optional[str] = None) -> Optional[str]:
+    """One SQLite WHERE clause from the attribute filters (None when there are none)"""
+    clauses = []
+    if counties:
+        clauses.append(f"county_name IN ({', '.join(_quote(c.upper()) for c in counties)})")
+    if sources:
+        clauses.append(f"source_list IN ({', '.join(_quote(s.upper()) for s in sources)})")
+    if leaks:
+        clauses.append(LEAK_FILTER)
+    if viable:
+        clauses.append("viable_leak = 1")
+    if visited is not None:
+        clauses.append(f"visited = {int(visited)}")
+    if where:
+        clauses.append(f"({where})")
+    return " AND ".join(clauses) or None
+
+
+def query_plan(gpkg: str, where: Optional[str]) -> List[str]:
+    """SQLite's plan for the attribute filter (which index answers it)"""
+    with sqlite3.connect(f"file:{gpkg}?mode=ro", uri=True) as conn:
+        sql = f'SELECT fid FROM "{LAYER_NAME}"' + (f" WHERE {where}" if where else "")
+        return [r[-1] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def export(gpkg: str, out: str, fmt: str, where: Optional[str] = None,
+           bbox: Optional[Tuple[float, float, float, float]] = None,
+           columns: Optional[List[str]] = None, batch_size: int = 10000) -> int:
+    """Stream matching wells from gpkg into out; returns the feature count"""
+    driver, ext = FORMATS[fmt]
+    tmp = f"{out}.tmp{ext}"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    count = 0
+    with pyogrio.open_arrow(gpkg, layer=LAYER_NAME, where=where, bbox=bbox, columns=columns,
+                            batch_size=batch_size, use_pyarrow=True) as (meta, reader):
+        geom = meta["geometry_name"] or "geom"
+        schema = reader.schema
+        # The wells layer carries X / Y already; CSV gets those instead of a geometry column
+        flat = fmt == "csv" and {"X", "Y"} <= set(meta["fields"])
+        if flat:
+            schema = schema.remove(schema.get_field_index(geom))
+
+        def batches():
+            nonlocal count
+            for batch in reader:
+                count += batch.num_rows
+                yield batch.drop_columns([geom]) if flat else batch
+
+        stream = pa.RecordBatchReader.from_batches(schema, batches())
+        if flat:
+            pyogrio.write_arrow(stream, tmp, driver=driver, encoding="UTF-8")
+        else:
+            options = {"GEOMETRY": "AS_XY"} if fmt == "csv" else {}
+            pyogrio.write_arrow(stream, tmp, driver=driver, geometry_name=geom, geometry_type="Point",
+                                crs=meta["crs"], encoding="UTF-8", layer_options=options)
+    os.replace(tmp, out)
+    return count
+
+
+def _export_task(args: Tuple) -> Tuple[str, int]:
+    gpkg, out, fmt, where, bbox, columns = args
+    return out, export(gpkg, out, fmt, where, bbox, columns)
+
+
+def export_per_county(gpkg: str, out_dir: str, fmt: str, counties: Sequence[str], jobs: int = 0,
+                      bbox: Optional[Tuple[float, float, float, float]] = None,
+                      columns: Optional[List[str]] = None, **filters) -> Dict[str, int]:
+    """One file per county (<out_dir>/<county><ext>), written in parallel processes"""
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(gpkg, os.path.join(out_dir, f"{c.lower().replace(' ', '_')}{FORMATS[fmt][1]}"), fmt,
+              build_where(counties=[c], **filters), bbox, columns) for c in counties]
+    jobs = jobs or min(len(tasks), os.cpu_count() or 1)
+    if jobs <= 1 or len(tasks) <= 1:
+        return dict(_export_task(t) for t in tasks)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return dict(pool.map(_export_task, tasks))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export filtered wells as GeoJSON-seq, FlatGeobuf or CSV")
+    parser.add_argument("out", help="Output file, or a directory with --per-county")
+    parser.add_argument("--gpkg", help="Source GeoPackage (default: the master, else data/processed/wells.gpkg)")
+    parser.add_argument("--format", choices=list(FORMATS), help="Output format (default: from the extension)")
+    parser.add_argument("--county", nargs="+", default=[], help="County names")
+    parser.add_argument("--source", nargs="+", default=[], help="Source lists (STFD, ORPHAN)")
+    parser.add_argument("--leaks", action="store_true", help="Confirmed leaks (small or viable)")
+    parser.add_argument("--viable", action="store_true", help="Viable for plugging")
+    parser.add_argument("--visited", type=int, choices=[0, 1], help="Only unvisited (0) or surveyed (1) wells")
+    parser.add_argument("--bbox", nargs=4, type=float, metavar=("XMIN", "YMIN", "XMAX", "YMAX"))
+    parser.add_argument("--where", help="Extra SQLite filter on wells columns")
+    parser.add_argument("--columns", nargs="+", help="Attributes to include (default: all)")
+    parser.add_argument("--per-county", action="store_true", help="One file per --county, written in parallel")
+    parser.add_argument("--jobs", type=int, default=0, help="Processes for --per-county (default: one per county)")
+    parser.add_argument("--explain", action="store_true", help="Print SQLite's query plan for the filter")
+    args = parser.parse_args(argv)
+
+    gpkg = args.gpkg or (DEFAULT_MASTER if os.path.exists(DEFAULT_MASTER) else DEFAULT_SRC)
+    if not os.path.exists(gpkg):
+        raise SystemExit(f"ERROR: Missing GeoPackage {gpkg}")
+    fmt = args.format or EXTENSIONS.get(os.path.splitext(args.out)[1].lower())
+    if fmt is None:
+        raise SystemExit("ERROR: Use a .geojsonl, .fgb or .csv output, or pass --format")
+    bbox = tuple(args.bbox) if args.bbox else None
+    filters = dict(sources=args.source, leaks=args.leaks, viable=args.viable, visited=args.visited, where=args.where)
+
+    if args.per_county:
+        if not args.county:
+            raise SystemExit("ERROR: --per-county needs --county")
+        counts = export_per_county(gpkg, args.out, fmt, args.county, args.jobs, bbox, args.columns, **filters)
+        for path, n in counts.items():
+            print(f"✅ {n} wells -> {path}")
+        return
+    where = build_where(counties=args.county, **filters)
+    if args.explain:
+        for line in query_plan(gpkg, where):
+            print(f"  {line}")
+    n = export(gpkg, args.out, fmt, where, bbox, args.columns)
+    print(f"✅ {n} wells -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+In-process fake of QFieldCloud for offline deploy tests and benchmarks.
+
+FakeCloud holds the server state: users, projects, uploaded files with
+their hashes, packaging jobs, and a log of every call. installed(cloud)
+puts a stand-in `qfieldcloud_sdk.sdk` module (Client, FileTransferType,
+QfcException, QfcRequestException) into sys.modules for the duration of a
+with-block, so deploy.py runs unchanged, without network or credentials.
+Client implements what deploy.py calls: login, list_projects,
+create_project, get_project, patch_project, upload_file, package_latest
+and _request (GET files/?project=, PATCH projects/<id>/).
+
+Latency and failures are injectable per cloud:
+- latency: seconds added to every call; bandwidth: upload bytes/second
+- fail: {"upload_file": 2} makes the next two upload_file calls fail with
+  fail_status (default 503; e.g. 401 / 404 for errors deploys must not retry)
+- fail_rate: probability any call fails (seeded, so runs are repeatable)
+
+cloud.stats() reports calls per method, bytes uploaded, injected failures
+and time spent, so retries and media delta uploads can be measured.
+
+Usage:
+    python scripts/fake_qfieldcloud.py dist/qfield_project_dev_<stamp>.zip [--latency 0.05]
+        [--bandwidth 5e6] [--fail-rate 0.1] [--runs 3]
+"""
+
+import os
+import sys
+import time
+import types
+import random
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_USER = "fake-user"
+DEFAULT_PASSWORD = "fake-password"
+
+
+class FileTransferType(Enum):
+    PROJECT = "project"
+    PACKAGE = "package"
+
+
+class QfcException(Exception):
+    pass
+
+
+class FakeResponse:
+    """The parts of requests.Response that callers use"""
+
+    def __init__(self, status_code: int = 200, payload: Any = None):
+        self.status_code = status_code
+        self._payload = payload
+        self.ok = status_code < 400
+
+    def json(self) -> Any:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise QfcRequestException(self)
+
+
+class QfcRequestException(QfcException):
+    def __init__(self, response: FakeResponse):
+        self.response = response
+        super().__init__(f"QFieldCloud responded {response.status_code}: {response.json()}")
+
+
+class FakeCloud:
+    """Server state plus latency / failure injection, shared by every Client bound to it"""
+
+    def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None,
+                 fail: Optional[Dict[str, int]] = None, fail_rate: float = 0.0, seed: int = 0,
+                 users: Optional[Dict[str, str]] = None, fail_status: int = 503):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.fail = dict(fail or {})
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.users = users or {DEFAULT_USER: DEFAULT_PASSWORD}
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.jobs: List[Dict[str, Any]] = []
+        self.calls: List[Dict[str, Any]] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def new_id(self) -> str:
+        with self._lock:
+            self._next_id += 1
+            return f"00000000-0000-0000-0000-{self._next_id:012d}"
+
+    def call(self, method: str, nbytes: int = 0) -> None:
+        """Account for one API call: sleep the injected latency, then maybe fail it"""
+        started = time.perf_counter()
+        delay = self.latency + (nbytes / self.bandwidth if self.bandwidth else 0.0)
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            failed = self.fail.get(method, 0) > 0
+            if failed:
+                self.fail[method] -= 1
+            elif self.fail_rate:
+                failed = self._random.random() < self.fail_rate
+            self.calls.append({"method": method, "bytes": 0 if failed else nbytes, "failed": failed,
+                               "seconds": time.perf_counter() - started})
+        if failed:
+            raise QfcRequestException(FakeResponse(self.fail_status, {"detail": f"injected {method} failure"}))
+
+    def stats(self) -> Dict[str, Any]:
+        per_method: Dict[str, int] = {}
+        for c in self.calls:
+            per_method[c["method"]] = per_method.get(c["method"], 0) + 1
+        return {
+            "calls": len(self.calls),
+            "per_method": per_method,
+            "failed": sum(c["failed"] for c in self.calls),
+            "uploads": sum(1 for c in self.calls if c["method"] == "upload_file" and not c["failed"]),
+            "bytes_uploaded": sum(c["bytes"] for c in self.calls),
+            "seconds": sum(c["seconds"] for c in self.calls),
+        }
+
+    def reset_stats(self) -> None:
+        self.calls.clear()
+
+    def project_files(self, project_id: str) -> Dict[str, Dict[str, Any]]:
+        return self.files.setdefault(project_id, {})
+
+
+class Client:
+    """Stand-in for qfieldcloud_sdk.sdk.Client; `cloud` is bound by installed()"""
+
+    cloud: FakeCloud = None
+
+    def __init__(self, url: Optional[str] = None, verify_ssl: Optional[bool] = None, token: Optional[str] = None):
+        self.url = url
+        self.token = token
+        self.username: Optional[str] = None
+
+    def _auth(self) -> None:
+        if not self.token:
+            raise QfcRequestException(FakeResponse(401, {"detail": "Authentication credentials were not provided."}))
+
+    def login(self, username: str, password: str) -> Dict[str, Any]:
+        self.cloud.call("login")
+        if self.cloud.users.get(username) != password:
+            raise QfcRequestException(FakeResponse(400, {"detail": "Unable to log in with provided credentials."}))
+        self.username = username
+        self.token = hashlib.sha256(f"{username}:{password}".encode()).hexdigest()
+        return {"username": username, "token": self.token}
+
+    def list_projects(self, username: Optional[str] = None, include_public: bool = False,
+                      **kwargs: Any) -> List[Dict[str, Any]]:
+        self._auth()
+        self.cloud.call("list_projects")
+        return [dict(p) for p in self.cloud.projects.values()
+                if p["owner"] == (username or self.username) or (include_public and p["is_public"])]
+
+    def create_project(self, name: str, owner: Optional[str] = None, description: str = "",
+                       is_public: bool = False) -> Dict[str, Any]:
+        self._auth()
+        self.cloud.call("create_project")
+        project = {"id": self.cloud.new_id(), "name": name, "owner": owner or self.username,
+                   "description": description, "is_public": is_public, "project_filename": None}
+        self.cloud.projects[project["id"]] = project
+        return dict(project)
+
+    def get_project(self, project_id: str) -> Dict[str, Any]:
+        self._auth()
+        self.cloud.call("get_project")
+        return dict(self._project(project_id))
+
+    def patch_project(self, project_id: str, **fields: Any) -> Dict[str, Any]:
+        self._auth()
+        self.cloud.call("patch_project")
+        project = self._project(project_id)
+        project.update({k: v for k, v in fields.items() if v is not None})
+        return dict(project)
+
+    def upload_file(self, project_id: str, upload_type: FileTransferType, upload_file: Path,
+                    remote_filename: Path, show_progress: bool = False, job_id: str = "") -> FakeResponse:
+        self._auth()
+        self._project(project_id)
+        data = Path(upload_file).read_bytes()
+        self.cloud.call("upload_file", len(data))
+        name = str(remote_filename).replace(os.sep, "/")
+        files = self.cloud.project_files(project_id)
+        entry = files.get(name) or {"id": self.cloud.new_id(), "name": name, "versions": 0}
+        entry.update({"size": len(data), "sha256": hashlib.sha256(data).hexdigest(),
+                      "md5sum": hashlib.md5(data).hexdigest(), "versions": entry["versions"] + 1,
+                      "upload_type": upload_type.value})
+        files[name] = entry
+        return FakeResponse(201, dict(entry))
+
+    def package_latest(self, project_id: str) -> Dict[str, Any]:
+        self._auth()
+        self._project(project_id)
+        self.cloud.call("package_latest")
+        job = {"id": self.cloud.new_id(), "project_id": project_id, "type": "package", "status": "finished",
+               "files": sorted(self.cloud.project_files(project_id))}
+        self.cloud.jobs.append(job)
+        return dict(job)
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> FakeResponse:
+        """The raw endpoints deploy.py uses: GET files/?project=<id>, PATCH projects/<id>/"""
+        self._auth()
+        self.cloud.call(f"_request {method}")
+        if method == "GET" and path.startswith("files/?project="):
+            project_id = path.split("=", 1)[1]
+            self._project(project_id)
+            return FakeResponse(200, [dict(f) for f in self.cloud.project_files(project_id).values()])
+        if method == "PATCH" and path.startswith("projects/"):
+            project = self._project(path.strip("/").split("/")[1])
+            payload = kwargs.get("json") or {}
+            if "project_file" in payload:
+                by_id = {f["id"]: f["name"] for f in self.cloud.project_files(project["id"]).values()}
+                if payload["project_file"] not in by_id:
+                    raise QfcRequestException(FakeResponse(400, {"project_file": "Unknown file"}))
+                project["project_filename"] = by_id[payload["project_file"]]
+            return FakeResponse(200, dict(project))
+        raise QfcRequestException(FakeResponse(404, {"detail": f"{method} {path} not faked"}))
+
+    def _project(self, project_id: str) -> Dict[str, Any]:
+        if project_id not in self.cloud.projects:
+            raise QfcRequestException(FakeResponse(404, {"detail": "Not found."}))
+        return self.cloud.projects[project_id]
+
+
+@contextmanager
+def installed(cloud: FakeCloud, username: str = DEFAULT_USER, password: str = DEFAULT_PASSWORD) -> Iterator[FakeCloud]:
+    """Serve `import qfieldcloud_sdk.sdk` from this fake (and set deploy credentials) inside the block"""
+    sdk = types.ModuleType("qfieldcloud_sdk.sdk")
+    sdk.Client = type("Client", (Client,), {"cloud": cloud})
+    sdk.FileTransferType = FileTransferType
+    sdk.QfcException = QfcException
+    sdk.QfcRequestException = QfcRequestException
+    package = types.ModuleType("qfieldcloud_sdk")
+    package.sdk = sdk
+    saved_modules = {name: sys.modules.get(name) for name in ("qfieldcloud_sdk", "qfieldcloud_sdk.sdk")}
+    saved_env = {k: os.environ.get(k) for k in ("QFIELDCLOUD_USERNAME", "QFIELDCLOUD_PASSWORD")}
+    sys.modules["qfieldcloud_sdk"] = package
+    sys.modules["qfieldcloud_sdk.sdk"] = sdk
+    os.environ["QFIELDCLOUD_USERNAME"] = username
+    os.environ["QFIELDCLOUD_PASSWORD"] = password
+    try:
+        yield cloud
+    finally:
+        for name, module in saved_modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Deploy a package to an in-process fake QFieldCloud and time it")
+    parser.add_argument("zip", help="Package built by deploy.py (dist/qfield_project_<env>_<stamp>.zip)")
+    parser.add_argument("--project", default="field-wells-dev", help="Project name (default: field-wells-dev)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every API call")
+    parser.add_argument("--bandwidth", type=float, help="Upload bytes per second (default: unlimited)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Probability any call fails with a 503")
+    parser.add_argument("--runs", type=int, default=1, help="Consecutive deploys to the same project")
+    parser.add_argument("--media-index", help="Attachment index to upload from (default: a throwaway copy)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    import shutil
+    import tempfile
+    import deploy
+    from attachments import INDEX_PATH
+
+    deploy.RETRY_BACKOFF = 0.0
+    cloud = FakeCloud(latency=args.latency, bandwidth=args.bandwidth, fail_rate=args.fail_rate)
+    with tempfile.TemporaryDirectory() as tmp, installed(cloud):
+        # Never mark media as uploaded in the real index
+        index = os.path.join(tmp, "index.json")
+        source_index = args.media_index or INDEX_PATH
+        if os.path.exists(source_index):
+            shutil.copyfile(source_index, index)
+        for run in range(1, args.runs + 1):
+            cloud.reset_stats()
+            started = time.perf_counter()
+            deploy.deploy_to_qfieldcloud(Path(args.zip), args.project, media_index=index)
+            elapsed = time.perf_counter() - started
+            s = cloud.stats()
+            print(f"Run {run}: {elapsed:.2f}s, {s['calls']} calls ({s['failed']} failed), {s['uploads']} uploads, "
+                  f"{s['bytes_uploaded'] / 2**20:.1f} MB ({s['bytes_uploaded'] / 2**20 / elapsed:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
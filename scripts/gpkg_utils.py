@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Helpers for working on GeoPackages with the plain sqlite3 module.
+
+GDAL's R-tree maintenance triggers on feature tables call ST_IsEmpty,
+ST_MinX/ST_MaxX/ST_MinY/ST_MaxY, which only exist inside GDAL/SpatiaLite.
+register_gpkg_functions() provides them so UPDATE/INSERT statements issued
+from Python work on files written by GDAL. add_geometry_column() turns a
+table created with plain SQL into a feature layer GDAL / QGIS recognise
+(gpkg_contents, gpkg_geometry_columns, an R-tree and the spec's triggers).
+"""
+
+import struct
+import sqlite3
+from typing import Optional, Tuple
+
+# Envelope indicator (flags bits 1-3) -> number of doubles in the header envelope
+_ENVELOPE_DOUBLES = {0: 0, 1: 4, 2: 6, 3: 6, 4: 8}
+RTREE_EXTENSION = "http://www.geopackage.org/spec120/#extension_rtree"
+
+# R-tree maintenance triggers from the GeoPackage spec (F.3); t = table, c = geometry column, i = primary key
+_RTREE_TRIGGERS = {
+    "insert": """AFTER INSERT ON "{t}" WHEN (NEW."{c}" NOT NULL AND NOT ST_IsEmpty(NEW."{c}"))
+        BEGIN
+          INSERT OR REPLACE INTO "rtree_{t}_{c}" VALUES (
+            NEW."{i}", ST_MinX(NEW."{c}"), ST_MaxX(NEW."{c}"), ST_MinY(NEW."{c}"), ST_MaxY(NEW."{c}"));
+        END""",
+    "update1": """AFTER UPDATE OF "{c}" ON "{t}"
+        WHEN OLD."{i}" = NEW."{i}" AND (NEW."{c}" NOTNULL AND NOT ST_IsEmpty(NEW."{c}"))
+        BEGIN
+          INSERT OR REPLACE INTO "rtree_{t}_{c}" VALUES (
+            NEW."{i}", ST_MinX(NEW."{c}"), ST_MaxX(NEW."{c}"), ST_MinY(NEW."{c}"), ST_MaxY(NEW."{c}"));
+        END""",
+    "update2": """AFTER UPDATE OF "{c}" ON "{t}"
+        WHEN OLD."{i}" = NEW."{i}" AND (NEW."{c}" IS NULL OR ST_IsEmpty(NEW."{c}"))
+        BEGIN
+          DELETE FROM "rtree_{t}_{c}" WHERE id = OLD."{i}";
+        END""",
+    "update3": """AFTER UPDATE ON "{t}"
+        WHEN OLD."{i}" != NEW."{i}" AND (NEW."{c}" NOTNULL AND NOT ST_IsEmpty(NEW."{c}"))
+        BEGIN
+          DELETE FROM "rtree_{t}_{c}" WHERE id = OLD."{i}";
+          INSERT OR REPLACE INTO "rtree_{t}_{c}" VALUES (
+            NEW."{i}", ST_MinX(NEW."{c}"), ST_MaxX(NEW."{c}"), ST_MinY(NEW."{c}"), ST_MaxY(NEW."{c}"));
+        END""",
+    "update4": """AFTER UPDATE ON "{t}"
+        WHEN OLD."{i}" != NEW."{i}" AND (NEW."{c}" IS NULL OR ST_IsEmpty(NEW."{c}"))
+        BEGIN
+          DELETE FROM "rtree_{t}_{c}" WHERE id IN (OLD."{i}", NEW."{i}");
+        END""",
+    "delete": """AFTER DELETE ON "{t}" WHEN OLD."{c}" NOT NULL
+        BEGIN
+          DELETE FROM "rtree_{t}_{c}" WHERE id = OLD."{i}";
+        END""",
+}
+
+
+def gpkg_bounds(blob: Optional[bytes]) -> Optional[Tuple[float, float, float, float]]:
+    """(minx, maxx, miny, maxy) of a GPKG geometry blob; None when empty or unsupported"""
+    if blob is None or len(blob) < 8 or blob[:2] != b"GP":
+        return None
+    flags = blob[3]
+    if flags & 0x10:  # empty geometry flag
+        return None
+    order = "<" if flags & 0x01 else ">"
+    n_env = _ENVELOPE_DOUBLES.get((flags >> 1) & 0x07, 0)
+    if n_env:
+        minx, maxx, miny, maxy = struct.unpack_from(f"{order}4d", blob, 8)
+        return minx, maxx, miny, maxy
+    # No header envelope: only points can be read straight from the WKB
+    wkb = 8
+    if len(blob) < wkb + 21:
+        return None
+    wkb_order = "<" if blob[wkb] == 1 else ">"
+    (geom_type,) = struct.unpack_from(f"{wkb_order}I", blob, wkb + 1)
+    if geom_type % 1000 != 1:
+        return None
+    x, y = struct.unpack_from(f"{wkb_order}2d", blob, wkb + 5)
+    if x != x or y != y:  # NaN coordinates encode POINT EMPTY
+        return None
+    return x, x, y, y
+
+
+def gpkg_point(x: float, y: float, srs_id: int = 4326) -> bytes:
+    """GPKG geometry blob of a 2D point: little-endian header without envelope, then WKB"""
+    return b"GP\x00\x01" + struct.pack("<iBIdd", srs_id, 1, 1, x, y)
+
+
+def _st_is_empty(blob: Optional[bytes]) -> Optional[int]:
+    if blob is None:
+        return None
+    return 0 if gpkg_bounds(blob) is not None else 1
+
+
+def _bound(i: int):
+    def fn(blob: Optional[bytes]) -> Optional[float]:
+        b = gpkg_bounds(blob)
+        return None if b is None else b[i]
+    return fn
+
+
+def register_gpkg_functions(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Register the ST_* functions GDAL's GPKG triggers need on a sqlite3 connection"""
+    conn.create_function("ST_IsEmpty", 1, _st_is_empty, deterministic=True)
+    for i, name in enumerate(("ST_MinX", "ST_MaxX", "ST_MinY", "ST_MaxY")):
+        conn.create_function(name, 1, _bound(i), deterministic=True)
+    return conn
+
+
+def add_geometry_column(conn: sqlite3.Connection, table: str, column: str = "geom", geometry_type: str = "POINT",
+                        srs_id: int = 4326, pk: str = "fid") -> bool:
+    """Register an existing column as the table's GPKG geometry and give it an R-tree kept by the
+    spec's triggers; True when the R-tree was created (filled from existing rows). Idempotent."""
+    register_gpkg_functions(conn)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS gpkg_extensions (table_name TEXT, column_name TEXT, "
+        "extension_name TEXT NOT NULL, definition TEXT NOT NULL, scope TEXT NOT NULL, "
+        "CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name))")
+    conn.execute(
+        "INSERT OR IGNORE INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, ?)",
+        (table, table, srs_id))
+    conn.execute(
+        "INSERT OR IGNORE INTO gpkg_geometry_columns (table_name, column_name, geometry_type_name, srs_id, z, m) "
+        "VALUES (?, ?, ?, ?, 0, 0)", (table, column, geometry_type, srs_id))
+    conn.execute(
+        "INSERT OR IGNORE INTO gpkg_extensions (table_name, column_name, extension_name, definition, scope) "
+        "VALUES (?, ?, 'gpkg_rtree_index', ?, 'write-only')", (table, column, RTREE_EXTENSION))
+    rtree = f"rtree_{table}_{column}"
+    created = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (rtree,)).fetchone() is None
+    if created:
+        conn.execute(f'CREATE VIRTUAL TABLE "{rtree}" USING rtree(id, minx, maxx, miny, maxy)')
+        # One blob decode per row here, instead of four ST_* calls through the SQL function layer
+        rows = conn.execute(f'SELECT "{pk}", "{column}" FROM "{table}" WHERE "{column}" NOT NULL').fetchall()
+        conn.executemany(f'INSERT INTO "{rtree}" VALUES (?, ?, ?, ?, ?)',
+                         [(i, *b) for i, b in ((i, gpkg_bounds(g)) for i, g in rows) if b is not None])
+    for name, body in _RTREE_TRIGGERS.items():
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS "{rtree}_{name}" ' + body.format(t=table, c=column, i=pk))
+    return created
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Time series of the OCC well lists as a partitioned Parquet dataset.
+
+The build reads only the newest dated file per source; the older weekly
+files together show when wells were orphaned, moved to STFD or dropped off
+a list (plugged). `ingest` loads every dated file in data/raw, oldest first,
+and stores each one as a delta against the previous file of the same
+source (diff_frames from snapshots.py):
+
+    data/processed/history/dataset_date=2025-09-04/STFD.parquet
+
+Rows are the wells added, changed or removed in that release (op = base for
+the first file of a source, then added / changed / removed), with the OCC
+attributes as text. Files already ingested are skipped; an older file that
+arrives late rebuilds that source's chain. Queries read only the columns
+and partitions they need:
+
+- entered("STFD", days=30): wells that joined a list recently
+- removed("ORPHAN", days=30): wells that left a list (plugged / transferred)
+- well_history(well_id): every recorded state of one well
+
+Usage:
+    python scripts/history.py ingest [--rebuild]
+    python scripts/history.py list
+    python scripts/history.py entered --source STFD --days 30
+    python scripts/history.py well 35003201560000
+"""
+
+import os
+import glob
+import json
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from sources import OCC_COLUMNS, SOURCES, load_source_config, parse_date_from_filename
+from snapshots import canonical_frame, diff_frames
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_DIR = os.path.join(PROJECT_ROOT, "data", "processed", "history")
+# Leading underscore: skipped by Parquet dataset discovery
+INDEX_NAME = "_index.json"
+
+# One schema for every partition: the OCC attributes as text (extra columns of custom sources are not kept)
+ATTR_COLS = sorted(set(OCC_COLUMNS.values()) - {"well_id"})
+HISTORY_COLS = ["well_id", "source", "op", *ATTR_COLS]
+# Below this much raw input, process pool startup costs more than it saves
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+
+def load_index(history_dir: str = HISTORY_DIR) -> Dict[str, List[Dict[str, Any]]]:
+    path = os.path.join(history_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["sources"]
+
+
+def save_index(index: Dict[str, List[Dict[str, Any]]], history_dir: str = HISTORY_DIR) -> None:
+    path = os.path.join(history_dir, INDEX_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"sources": index}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def dated_files(pattern: List[str]) -> List[Tuple[str, str]]:
+    """(dataset_date, path) for every dated file of a source, oldest first, one per date (xlsx preferred)"""
+    by_date: Dict[str, str] = {}
+    for p in sorted({p for pat in pattern for p in glob.glob(pat)}):
+        d = parse_date_from_filename(p)
+        if d and (d not in by_date or p.lower().endswith(".xlsx")):
+            by_date[d] = p
+    return sorted(by_date.items())
+
+
+def history_frame(df: pd.DataFrame, source: str) -> pd.DataFrame:
+    """One row per well_id with the fixed history columns, as text"""
+    canon = canonical_frame(df).drop_duplicates("well_id", keep="first")
+    return canon.reindex(columns=["well_id", *ATTR_COLS]).astype("string").assign(source=source)
+
+
+def _partition(history_dir: str, dataset_date: str, source: str) -> str:
+    return os.path.join(history_dir, f"dataset_date={dataset_date}", f"{source}.parquet")
+
+
+def _write(df: pd.DataFrame, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    df.reindex(columns=HISTORY_COLS).astype("string").to_parquet(tmp, index=False, compression="zstd")
+    os.replace(tmp, path)
+
+
+def read_history(history_dir: str = HISTORY_DIR, columns: Optional[List[str]] = None,
+                 filters: Optional[List[Tuple[str, str, Any]]] = None) -> pd.DataFrame:
+    """Rows of the dataset (partition and row-group pruned by filters), oldest release first"""
+    if not os.path.isdir(history_dir) or not glob.glob(os.path.join(history_dir, "dataset_date=*")):
+        return pd.DataFrame(columns=["dataset_date", *(columns or HISTORY_COLS)])
+    cols = None if columns is None else [c for c in columns if c != "dataset_date"] + ["dataset_date"]
+    df = pd.read_parquet(history_dir, columns=cols, filters=filters)
+    df["dataset_date"] = df["dataset_date"].astype("string")
+    return df.sort_values(["dataset_date", "well_id"], kind="stable").reset_index(drop=True)
+
+
+def state_of(source: str, history_dir: str = HISTORY_DIR) -> pd.DataFrame:
+    """Latest recorded list of a source: last row per well_id, without removed wells"""
+    rows = read_history(history_dir, filters=[("source", "=", source)])
+    last = rows.drop_duplicates("well_id", keep="last")
+    return last[last["op"] != "removed"].drop(columns=["dataset_date", "op"]).reset_index(drop=True)
+
+
+def _load(task: Tuple[str, str, str, Dict[str, str], Dict[str, Any]]) -> pd.DataFrame:
+    from prepare_wells_gpkg import _load_source  # parse cache shared with the build
+    return _load_source(task)
+
+
+def ingest(history_dir: str = HISTORY_DIR, rebuild: bool = False, jobs: int = 0,
+           sources: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, int]:
+    """Append a delta partition for every dated source file not yet in the dataset
+    (sources: name -> registry entry, default every registered source)"""
+    if sources is None:
+        load_source_config()
+        sources = SOURCES
+    if rebuild and os.path.isdir(history_dir):
+        shutil.rmtree(history_dir)
+    os.makedirs(history_dir, exist_ok=True)
+    index = load_index(history_dir)
+
+    plan: Dict[str, List[Tuple[str, str]]] = {}
+    for name, src in sources.items():
+        files = dated_files(src["pattern"])
+        done = {e["dataset_date"] for e in index.get(name, [])}
+        todo = [(d, p) for d, p in files if d not in done]
+        if todo and done and todo[0][0] < max(done):
+            # A late older file: deltas after it would be wrong, so rebuild this source's chain
+            for e in index.pop(name):
+                path = _partition(history_dir, e["dataset_date"], name)
+                if os.path.exists(path):
+                    os.remove(path)
+            todo = files
+        if todo:
+            plan[name] = todo
+
+    tasks = [(name, p, d, sources[name]["columns"], sources[name]["dtypes"])
+             for name, todo in plan.items() for d, p in todo]
+    if jobs <= 0:
+        total = sum(os.path.getsize(t[1]) for t in tasks)
+        jobs = min(len(tasks), os.cpu_count() or 1) if total >= PARALLEL_MIN_BYTES else 1
+    if jobs <= 1 or len(tasks) <= 1:
+        frames = [_load(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            frames = list(pool.map(_load, tasks))
+    if tasks:
+        from prepare_wells_gpkg import prune_parse_cache
+        prune_parse_cache()
+    loaded = {(t[0], t[2]): f for t, f in zip(tasks, frames)}
+
+    stats = {"files": 0, "rows": 0}
+    for name, todo in plan.items():
+        prev = state_of(name, history_dir) if index.get(name) else None
+        for d, p in todo:
+            cur = history_frame(loaded[(name, d)], name)
+            if prev is None:
+                delta = cur.assign(op="base")
+                entry = {"dataset_date": d, "file": os.path.basename(p), "rows": len(cur), "kind": "base"}
+            else:
+                diff = diff_frames(prev.drop(columns=["source"]), cur.drop(columns=["source"]))
+                changed = cur["well_id"].isin(diff["changed"])
+                delta = pd.concat([
+                    cur[cur["well_id"].isin(diff["added"])].assign(op="added"),
+                    cur[changed].assign(op="changed"),
+                    pd.DataFrame({"well_id": diff["removed"].to_numpy(), "source": name, "op": "removed"}),
+                ], ignore_index=True, sort=False)
+                entry = {"dataset_date": d, "file": os.path.basename(p), "rows": len(cur), "kind": "delta",
+                         "added": len(diff["added"]), "changed": int(changed.sum()), "removed": len(diff["removed"])}
+            _write(delta, _partition(history_dir, d, name))
+            index.setdefault(name, []).append(entry)
+            prev = cur
+            stats["files"] += 1
+            stats["rows"] += len(delta)
+        save_index(index, history_dir)
+    return stats
+
+
+def _since(days: int, as_of: Optional[str]) -> str:
+    return ((pd.Timestamp(as_of).date() if as_of else date.today()) - timedelta(days=days)).isoformat()
+
+
+def entered(source: str = "STFD", days: int = 30, as_of: Optional[str] = None,
+            history_dir: str = HISTORY_DIR) -> pd.DataFrame:
+    """Wells added to a source's list within `days` of as_of (default today); the first file is not an entry"""
+    return read_history(history_dir, filters=[("source", "=", source), ("op", "=", "added"),
+                                              ("dataset_date", ">=", _since(days, as_of))])
+
+
+def removed(source: str = "ORPHAN", days: int = 30, as_of: Optional[str] = None,
+            history_dir: str = HISTORY_DIR) -> pd.DataFrame:
+    """Wells dropped from a source's list within `days` of as_of (plugged, transferred)"""
+    return read_history(history_dir, ["well_id", "source", "op"],
+                        filters=[("source", "=", source), ("op", "=", "removed"),
+                                 ("dataset_date", ">=", _since(days, as_of))])
+
+
+def well_history(well_id: str, history_dir: str = HISTORY_DIR) -> pd.DataFrame:
+    """Every recorded state of one well across sources, oldest first"""
+    return read_history(history_dir, filters=[("well_id", "=", well_id)])
+
+
+def _text(value: Any) -> str:
+    """History attributes are nullable strings; NA prints as empty"""
+    return "" if pd.isna(value) else str(value)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="OCC well list history (Parquet, one delta per dated file)")
+    parser.add_argument("--dir", default=HISTORY_DIR, help="Dataset directory (default: data/processed/history)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_in = sub.add_parser("ingest", help="Add every dated file in data/raw not yet in the dataset")
+    p_in.add_argument("--rebuild", action="store_true", help="Drop the dataset and ingest all files again")
+    p_in.add_argument("--jobs", type=int, default=0, help="Parallel parsers (default: auto)")
+    sub.add_parser("list", help="Ingested files per source")
+    for cmd, help_text, default_source in (("entered", "Wells that joined a list recently", "STFD"),
+                                           ("removed", "Wells that left a list recently", "ORPHAN")):
+        p = sub.add_parser(cmd, help=help_text)
+        p.add_argument("--source", default=default_source)
+        p.add_argument("--days", type=int, default=30)
+        p.add_argument("--as-of", help="Reference date (default: today)")
+    p_well = sub.add_parser("well", help="Status history of one well")
+    p_well.add_argument("well_id", help="14-digit API number, e.g. 35003201560000")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "ingest":
+        s = ingest(args.dir, rebuild=args.rebuild, jobs=args.jobs)
+        print(f"✅ Ingested {s['files']} files ({s['rows']} delta rows) into {args.dir}")
+    elif args.cmd == "list":
+        for name, entries in load_index(args.dir).items():
+            for e in entries:
+                counts = "" if e["kind"] == "base" else f"  +{e['added']} -{e['removed']} ~{e['changed']}"
+                print(f"{name:<8} {e['dataset_date']}  {e['kind']:<5} {e['rows']:>7} wells{counts}")
+    elif args.cmd in ("entered", "removed"):
+        fn = entered if args.cmd == "entered" else removed
+        rows = fn(args.source, args.days, args.as_of, args.dir)
+        print(f"{len(rows)} wells {args.cmd} {args.source} in the last {args.days} days")
+        for r in rows.itertuples():
+            print(f"  {r.dataset_date}  {r.well_id}  {_text(getattr(r, 'county_name', None))}")
+    else:
+        rows = well_history(args.well_id, args.dir)
+        if rows.empty:
+            print(f"No history for {args.well_id}")
+        for r in rows.itertuples():
+            print(f"{r.dataset_date}  {r.source:<7} {r.op:<8} {_text(r.well_status):<6} {_text(r.operator_name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Per-stage build manifests: what produced each artifact, and its cache key.
+
+Every stage (wells, device-<env>, project-<env>, package-<env>, deploy-<env>)
+writes data/processed/manifests/<stage>.json with the SHA-256, size and
+row counts of its inputs and outputs, the code it ran, its options, timings
+and tool versions. The cache key hashes inputs + code + options, so a stage
+whose key and outputs still match is skipped, and a deployed zip or a
+rolled-back GeoPackage can be verified without rebuilding.
+
+Standard library only. A file whose size and mtime match the manifest keeps
+its recorded hash, so staleness checks are a few stat() calls; verify()
+always re-hashes.
+"""
+
+import os
+import json
+import time
+import hashlib
+import platform
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, "scripts")
+MANIFEST_DIR = os.path.join(PROJECT_ROOT, "data", "processed", "manifests")
+MANIFEST_VERSION = 2
+
+# Code whose changes alter each stage's output (stage name without the -<env> suffix)
+STAGE_CODE: Dict[str, List[str]] = {
+    "wells": [os.path.join(SCRIPTS_DIR, n) for n in ("prepare_wells_gpkg.py", "sources.py", "near_duplicates.py",
+                                                      "priority_score.py", "gpkg_utils.py",
+                                                      "validate_surveys.py", "history.py")]
+    + [os.path.join(PROJECT_ROOT, "data", n) for n in ("sources.json", "priority.json")],
+    "device": [os.path.join(SCRIPTS_DIR, "mobile_profile.py")],
+    "project": [os.path.join(SCRIPTS_DIR, n) for n in ("build_qgis_project.py", "project_spec.py", "qgs_writer.py")]
+    + [os.path.join(PROJECT_ROOT, "data", "priority.json")],
+    "package": [os.path.join(PROJECT_ROOT, "deploy.py")],
+    "deploy": [os.path.join(PROJECT_ROOT, "deploy.py")],
+}
+
+# Distributions whose versions are recorded per stage (read from metadata, not imported)
+STAGE_TOOLS: Dict[str, List[str]] = {
+    "wells": ["numpy", "pandas", "geopandas", "pyogrio", "shapely"],
+    "deploy": ["qfieldcloud-sdk"],
+}
+
+
+def _rel(path: str) -> str:
+    return os.path.relpath(os.path.abspath(path), PROJECT_ROOT)
+
+
+def _abs(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_record(path: str, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Path, size, mtime and SHA-256 of a file (None if missing); the hash is reused
+    from `previous` when size and mtime are unchanged"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    rec = {"path": _rel(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if previous and all(previous.get(k) == rec[k] for k in ("path", "size", "mtime_ns")) and previous.get("sha256"):
+        rec["sha256"] = previous["sha256"]
+    else:
+        rec["sha256"] = sha256_file(path)
+    return rec
+
+
+def tool_versions(names: Iterable[str]) -> Dict[str, Optional[str]]:
+    from importlib import metadata  # ~20 ms; only needed when writing
+    versions: Dict[str, Optional[str]] = {"python": platform.python_version()}
+    for name in names:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def build_options(merge: bool = False, near_dupe_tolerance: float = 30.0) -> Dict[str, Any]:
+    """wells build flags that change the output (--jobs and reports do not)"""
+    return {"merge_near_duplicates": merge, "near_dupe_tolerance": near_dupe_tolerance if merge else None}
+
+
+def _code(stage: str) -> List[str]:
+    return STAGE_CODE.get(stage.split("-")[0], [])
+
+
+def _records(paths: Dict[str, str], previous: Dict[str, Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+    return {name: file_record(p, previous.get(name)) for name, p in sorted(paths.items())}
+
+
+def cache_key(inputs: Dict[str, Any], code: Dict[str, Any], options: Dict[str, Any]) -> str:
+    """Content hash of everything a stage depends on"""
+    payload = {
+        "version": MANIFEST_VERSION,
+        "inputs": {k: v and v["sha256"] for k, v in inputs.items()},
+        "code": {k: v and v["sha256"] for k, v in code.items()},
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def manifest_path(stage: str, manifest_dir: str = MANIFEST_DIR) -> str:
+    return os.path.join(manifest_dir, f"{stage}.json")
+
+
+def load_manifest(stage: str, manifest_dir: str = MANIFEST_DIR) -> Optional[Dict[str, Any]]:
+    path = manifest_path(stage, manifest_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_manifests(manifest_dir: str = MANIFEST_DIR) -> List[str]:
+    if not os.path.isdir(manifest_dir):
+        return []
+    return sorted(f[:-5] for f in os.listdir(manifest_dir) if f.endswith(".json"))
+
+
+def write_manifest(stage: str, inputs: Dict[str, str], outputs: Dict[str, str],
+                   options: Optional[Dict[str, Any]] = None, rows: Optional[int] = None,
+                   started: Optional[float] = None, extra: Optional[Dict[str, Any]] = None,
+                   manifest_dir: str = MANIFEST_DIR) -> Dict[str, Any]:
+    """Record a finished stage; `started` is a time.time() value for the duration"""
+    options = options or {}
+    previous = load_manifest(stage, manifest_dir) or {}
+    in_recs = _records(inputs, previous.get("inputs", {}))
+    code = {_rel(p): file_record(p, previous.get("code", {}).get(_rel(p))) for p in _code(stage)}
+    now = time.time()
+    manifest = {
+        "stage": stage,
+        "version": MANIFEST_VERSION,
+        "cache_key": cache_key(in_recs, code, options),
+        "inputs": in_recs,
+        "outputs": {name: file_record(p) for name, p in sorted(outputs.items())},
+        "code": code,
+        "options": options,
+        "rows": rows,
+        "tools": tool_versions(STAGE_TOOLS.get(stage.split("-")[0], [])),
+        "built_utc": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "duration_s": round(now - started, 3) if started else None,
+        **(extra or {}),
+    }
+    os.makedirs(manifest_dir, exist_ok=True)
+    path = manifest_path(stage, manifest_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+    return manifest
+
+
+def stale_reasons(stage: str, inputs: Dict[str, str], outputs: Dict[str, str],
+                  options: Optional[Dict[str, Any]] = None,
+                  manifest_dir: str = MANIFEST_DIR) -> List[str]:
+    """Why a stage must run again; empty when its cache key and outputs still match"""
+    options = options or {}
+    manifest = load_manifest(stage, manifest_dir)
+    if manifest is None:
+        return [f"no manifest for {stage}"]
+    if manifest.get("version") != MANIFEST_VERSION:
+        return ["manifest version changed"]
+    reasons = []
+    old_in = manifest.get("inputs", {})
+    in_recs = _records(inputs, old_in)
+    for name in sorted(set(old_in) | set(in_recs)):
+        old, new = old_in.get(name), in_recs.get(name)
+        if (old and old["sha256"]) != (new and new["sha256"]):
+            reasons.append(f"input {name}: {new['path'] if new else 'removed'}")
+    old_code = manifest.get("code", {})
+    code = {_rel(p): file_record(p, old_code.get(_rel(p))) for p in _code(stage)}
+    for p, rec in code.items():
+        old = old_code.get(p)
+        if (old and old["sha256"]) != (rec and rec["sha256"]):
+            reasons.append(f"code changed: {p}")
+    if manifest.get("options") != options:
+        reasons.append(f"options changed: {options}")
+    if not reasons and manifest.get("cache_key") != cache_key(in_recs, code, options):
+        reasons.append("cache key changed")
+    old_out = manifest.get("outputs", {})
+    for name, p in sorted(outputs.items()):
+        rec = file_record(p, old_out.get(name))
+        if rec is None:
+            reasons.append(f"missing {_rel(p)}")
+        elif not old_out.get(name) or rec["sha256"] != old_out[name].get("sha256"):
+            reasons.append(f"{_rel(p)} modified since {stage} ran")
+    return reasons
+
+
+def recheck(stage: str, manifest_dir: str = MANIFEST_DIR) -> List[str]:
+    """stale_reasons() against the inputs/outputs/options the stage last recorded"""
+    m = load_manifest(stage, manifest_dir)
+    if m is None:
+        return [f"no manifest for {stage}"]
+    inputs = {k: _abs(v["path"]) for k, v in m.get("inputs", {}).items() if v}
+    outputs = {k: _abs(v["path"]) for k, v in m.get("outputs", {}).items() if v}
+    return stale_reasons(stage, inputs, outputs, m.get("options"), manifest_dir)
+
+
+def verify(stage: str, manifest_dir: str = MANIFEST_DIR) -> List[str]:
+    """Re-hash every recorded output; returns mismatches (empty when all verify)"""
+    m = load_manifest(stage, manifest_dir)
+    if m is None:
+        return [f"no manifest for {stage}"]
+    problems = []
+    for name, rec in m.get("outputs", {}).items():
+        if not rec:
+            problems.append(f"{name}: not produced")
+            continue
+        path = _abs(rec["path"])
+        if not os.path.exists(path):
+            problems.append(f"{rec['path']}: missing")
+        elif sha256_file(path) != rec["sha256"]:
+            problems.append(f"{rec['path']}: sha256 differs from manifest")
+    return problems
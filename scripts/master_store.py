@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Concurrent-safe access to the master wells GeoPackage.
+
+The master (data/master/wells.gpkg) is long-lived: survey pull-back, admin
+edits and the weekly refresh all write to it, while analytics read from it.
+MasterStore puts it in WAL mode so readers never block the writer (or each
+other), hands out pooled read-only connections, and funnels every write
+through one writer thread that commits queued operations in batches, each
+batch a single BEGIN IMMEDIATE transaction. Separate processes (e.g. two
+ingestion jobs) serialize on SQLite's write lock via busy_timeout.
+
+refresh() merges a freshly built wells.gpkg into the master by well_id:
+source attributes and geometry are updated, new wells appended, and the
+survey/audit fields collected in the field are left untouched.
+
+Usage:
+    python scripts/master_store.py refresh [--src data/processed/wells.gpkg] [--master data/master/wells.gpkg]
+    python scripts/master_store.py export qgis/wells.gpkg [--master data/master/wells.gpkg]
+"""
+
+import os
+import queue
+import shutil
+import sqlite3
+import argparse
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from gpkg_utils import register_gpkg_functions
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MASTER = os.path.join(PROJECT_ROOT, "data", "master", "wells.gpkg")
+DEFAULT_SRC = os.path.join(PROJECT_ROOT, "data", "processed", "wells.gpkg")
+LAYER_NAME = "wells"
+
+# Field-collected state: never overwritten by a source refresh
+SURVEY_COLS = {
+    "found", "exists", "small_leak", "viable_leak", "visited", "reset_survey",
+    "last_edit_utc", "visited_at_utc", "editor_name", "photo_path", "voice_note",
+}
+# Depend on the master's survey state: recomputed after a refresh, not copied from the build
+DERIVED_COLS = {"priority_score", "priority_rank"}
+
+_STOP = object()
+
+
+def connect(path: str, readonly: bool = False, busy_timeout_ms: int = 30000) -> sqlite3.Connection:
+    """Autocommit connection usable from any thread, with the GPKG trigger functions registered"""
+    uri = f"file:{path}?mode=ro" if readonly else f"file:{path}"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None,
+                           timeout=busy_timeout_ms / 1000)
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+    return register_gpkg_functions(conn)
+
+
+class ReaderPool:
+    """Fixed set of read-only connections, borrowed one at a time (thread-safe)"""
+
+    def __init__(self, path: str, size: int = 4, busy_timeout_ms: int = 30000):
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._conns = [connect(path, readonly=True, busy_timeout_ms=busy_timeout_ms) for _ in range(size)]
+        for conn in self._conns:
+            self._pool.put(conn)
+
+    @contextmanager
+    def reader(self, timeout: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled read-only connection; it sees the last committed write"""
+        conn = self._pool.get(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._pool.put(conn)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        for conn in self._conns:
+            conn.close()
+
+
+class MasterStore:
+    """WAL-mode GeoPackage with a reader pool and a single batching writer thread"""
+
+    def __init__(self, path: str = DEFAULT_MASTER, readers: int = 4, batch_size: int = 500,
+                 batch_wait: float = 0.005, busy_timeout_ms: int = 30000):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Missing master GeoPackage: {path}")
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._writer = self._connect(readonly=False)
+        # Persistent in the file: later connections (QGIS included) also use WAL
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._writer.execute("PRAGMA synchronous = NORMAL")
+
+        self._readers = ReaderPool(path, readers, busy_timeout_ms)
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, name="master-writer", daemon=True)
+        self._thread.start()
+        self._closed = False
+
+    def _connect(self, readonly: bool) -> sqlite3.Connection:
+        # Autocommit mode: the writer issues BEGIN IMMEDIATE / COMMIT itself
+        return connect(self.path, readonly, self.busy_timeout_ms)
+
+    # Reads
+
+    def reader(self, timeout: Optional[float] = None) -> ContextManager[sqlite3.Connection]:
+        """Borrow a pooled read-only connection; it sees the last committed batch"""
+        return self._readers.reader(timeout)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        return self._readers.query(sql, params)
+
+    # Writes
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> "Future[Any]":
+        """Queue fn(conn) for the writer thread. It runs inside the batch transaction,
+        so it must not commit or roll back itself."""
+        if self._closed:
+            raise RuntimeError("MasterStore is closed")
+        fut: "Future[Any]" = Future()
+        self._queue.put((fn, fut))
+        return fut
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> "Future[int]":
+        return self.submit(lambda conn: conn.execute(sql, params).rowcount)
+
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> "Future[int]":
+        rows = list(rows)
+        return self.submit(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed"""
+        self.submit(lambda conn: None).result()
+
+    def _write_loop(self) -> None:
+        stop = False
+        while not stop:
+            op = self._queue.get()
+            if op is _STOP:
+                break
+            batch = [op]
+            # Collect whatever else arrives within batch_wait into the same transaction
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    nxt = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._commit(batch)
+
+    def _run(self, batch: List[Tuple[Callable, Future]]) -> List[Any]:
+        conn = self._writer
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            results = [fn(conn) for fn, _ in batch]
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return results
+
+    def _commit(self, batch: List[Tuple[Callable, Future]]) -> None:
+        try:
+            results = self._run(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Re-run one by one so only the failing operation reports an error
+            for op in batch:
+                self._commit([op])
+            return
+        for (_, fut), result in zip(batch, results):
+            fut.set_result(result)
+
+    # Maintenance
+
+    def checkpoint(self) -> None:
+        """Fold the WAL back into the main file (before copying it elsewhere)"""
+        self.flush()
+        # Own connection: the writer connection belongs to the writer thread
+        conn = self._connect(readonly=False)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+
+    def export(self, dst: str) -> None:
+        """Consistent single-file copy (rollback journal, no -wal/-shm) for devices and deploys"""
+        tmp = dst + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        out = sqlite3.connect(tmp)
+        try:
+            with self.reader() as conn:
+                conn.backup(out)
+            out.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            out.close()
+        os.replace(tmp, dst)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._readers.close()
+        self._writer.close()
+
+    def __enter__(self) -> "MasterStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def refresh(store: MasterStore, src_gpkg: str, chunk: int = 5000) -> Dict[str, int]:
+    """Upsert a built wells.gpkg into the master by well_id, keeping survey/audit fields"""
+    with store.reader() as conn:
+        master_cols = _columns(conn, LAYER_NAME)
+        before = conn.execute(f'SELECT COUNT(*) FROM "{LAYER_NAME}"').fetchone()[0]
+    src = sqlite3.connect(f"file:{src_gpkg}?mode=ro", uri=True)
+    try:
+        cols = [c for c in _columns(src, LAYER_NAME) if c != "fid" and c in master_cols]
+        update = [c for c in cols if c not in SURVEY_COLS | DERIVED_COLS and c != "well_id"]
+        quoted = ", ".join(f'"{c}"' for c in cols)
+        assign = ", ".join(f'"{c}" = excluded."{c}"' for c in update)
+        changed = " OR ".join(f'"{LAYER_NAME}"."{c}" IS NOT excluded."{c}"' for c in update)
+        params = ", ".join("?" for _ in cols)
+        # Survey columns are inserted for new wells but never part of the UPDATE;
+        # unchanged wells are skipped so their rows (and the rtree) are not rewritten
+        sql = (
+            f'INSERT INTO "{LAYER_NAME}" ({quoted}) VALUES ({params}) '
+            f"ON CONFLICT(well_id) DO UPDATE SET {assign} WHERE {changed}"
+        )
+        cur = src.execute(f'SELECT {quoted} FROM "{LAYER_NAME}"')
+        futures, seen = [], 0
+        while True:
+            rows = cur.fetchmany(chunk)
+            if not rows:
+                break
+            seen += len(rows)
+            futures.append(store.executemany(sql, rows))
+        touched = sum(f.result() for f in futures)
+    finally:
+        src.close()
+    after = store.query(f'SELECT COUNT(*) FROM "{LAYER_NAME}"')[0][0]
+    return {"source": seen, "added": after - before, "updated": touched - (after - before)}
+
+
+def create_master(src_gpkg: str, master: str = DEFAULT_MASTER) -> None:
+    """Seed the master from a built wells.gpkg"""
+    os.makedirs(os.path.dirname(master), exist_ok=True)
+    shutil.copyfile(src_gpkg, master)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Master wells GeoPackage (WAL, single writer queue)")
+    parser.add_argument("--master", default=DEFAULT_MASTER, help="Master GeoPackage (default: data/master/wells.gpkg)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_ref = sub.add_parser("refresh", help="Merge a built wells.gpkg into the master, keeping survey fields")
+    p_ref.add_argument("--src", default=DEFAULT_SRC, help="Built GeoPackage (default: data/processed/wells.gpkg)")
+    p_exp = sub.add_parser("export", help="Write a consistent single-file copy of the master")
+    p_exp.add_argument("dst")
+    args = parser.parse_args()
+
+    if args.cmd == "refresh" and not os.path.exists(args.master):
+        create_master(args.src, args.master)
+        print(f"✅ Created master {args.master} from {args.src}")
+        return
+    with MasterStore(args.master) as store:
+        if args.cmd == "refresh":
+            stats = refresh(store, args.src)
+            print(f"✅ Refreshed {args.master}: {stats['added']} added, {stats['updated']} updated "
+                  f"({stats['source']} wells in {args.src})")
+            from priority_score import load_config, rescore  # pandas only for the rescore
+            changed = store.submit(lambda conn: rescore(conn, load_config())).result()
+            print(f"✅ Rescored survey priority: {changed} wells changed")
+        else:
+            store.export(args.dst)
+            print(f"✅ Exported {args.master} to {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
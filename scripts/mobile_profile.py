@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Compact "mobile profile" export of wells.gpkg for devices.
+
+Keeps only the columns the QField form, renderer, filters and triggers use,
+moves repeated strings (county, operator, well type) into lookup tables
+referenced by INTEGER codes, adds a read-only `wells_context` view with the
+names joined back for desktop use, then VACUUMs with a smaller page size.
+build_qgis_project.py joins the lookup tables onto the wells layers, so the
+form and renderer still see county_name / operator_name / well_type.
+
+Usage:
+    python scripts/mobile_profile.py data/processed/wells.gpkg qgis/wells_dev.gpkg
+"""
+
+import os
+import shutil
+import argparse
+import sqlite3
+from typing import Dict, List
+
+from gpkg_utils import register_gpkg_functions
+
+LAYER_NAME = "wells"
+VIEW_NAME = "wells_context"
+
+# Repeated strings -> lookup table (name, code column)
+LOOKUPS: Dict[str, Dict[str, str]] = {
+    "county_name": {"table": "lu_county", "code": "county_code"},
+    "operator_name": {"table": "lu_operator", "code": "operator_code"},
+    "well_type": {"table": "lu_well_type", "code": "well_type_code"},
+}
+
+# Columns the device needs: identity, form context, renderer, survey fields, audit
+MOBILE_COLUMNS: List[str] = [
+    "fid", "geom", "well_id", "source_list", "well_name",
+    "county_code", "operator_code", "well_type_code", "coords_latlon", "gmaps_url",
+    "priority_score", "priority_rank",
+    "found", "exists", "small_leak", "viable_leak", "visited", "reset_survey",
+    "last_edit_utc", "visited_at_utc", "editor_name", "photo_path", "voice_note",
+]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def encode_lookups(conn: sqlite3.Connection) -> None:
+    """Create lu_* tables and replace each repeated TEXT column with an INTEGER code"""
+    cols = set(_columns(conn, LAYER_NAME))
+    for name, lu in LOOKUPS.items():
+        if name not in cols:
+            continue
+        table, code = lu["table"], lu["code"]
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute(f'CREATE TABLE "{table}" (code INTEGER PRIMARY KEY, "{name}" TEXT NOT NULL UNIQUE)')
+        conn.execute(
+            f'INSERT INTO "{table}" ("{name}") SELECT DISTINCT "{name}" FROM "{LAYER_NAME}" '
+            f'WHERE "{name}" IS NOT NULL ORDER BY "{name}"'
+        )
+        conn.execute(f'ALTER TABLE "{LAYER_NAME}" ADD COLUMN "{code}" INTEGER')
+        conn.execute(
+            f'UPDATE "{LAYER_NAME}" SET "{code}" = '
+            f'(SELECT code FROM "{table}" t WHERE t."{name}" = "{LAYER_NAME}"."{name}")'
+        )
+        # Register as an attributes table so QGIS/QField can load it for the join
+        conn.execute("DELETE FROM gpkg_contents WHERE table_name = ?", (table,))
+        conn.execute(
+            "INSERT INTO gpkg_contents (table_name, data_type, identifier) VALUES (?, 'attributes', ?)",
+            (table, table),
+        )
+
+
+def prune_columns(conn: sqlite3.Connection) -> None:
+    drop = [c for c in _columns(conn, LAYER_NAME) if c not in MOBILE_COLUMNS]
+    # Indexes on pruned columns (the build's export filter indexes) would block DROP COLUMN
+    for (index,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (LAYER_NAME,)).fetchall():
+        if any(r[2] in drop for r in conn.execute(f'PRAGMA index_info("{index}")')):
+            conn.execute(f'DROP INDEX "{index}"')
+    for c in drop:
+        conn.execute(f'ALTER TABLE "{LAYER_NAME}" DROP COLUMN "{c}"')
+
+
+def create_context_view(conn: sqlite3.Connection) -> None:
+    """Read-only view with lookup names joined back (desktop analytics / QA)"""
+    cols = set(_columns(conn, LAYER_NAME))
+    names, joins = [], []
+    for name, lu in LOOKUPS.items():
+        if lu["code"] in cols:
+            alias = lu["table"]
+            names.append(f'{alias}."{name}"')
+            joins.append(f'LEFT JOIN "{alias}" ON {alias}.code = w."{lu["code"]}"')
+    conn.execute(f'DROP VIEW IF EXISTS "{VIEW_NAME}"')
+    conn.execute(
+        f'CREATE VIEW "{VIEW_NAME}" AS SELECT w.*{"".join(", " + n for n in names)} '
+        f'FROM "{LAYER_NAME}" w {" ".join(joins)}'
+    )
+    srs_id, geom_type = conn.execute(
+        "SELECT srs_id, geometry_type_name FROM gpkg_geometry_columns WHERE table_name = ?", (LAYER_NAME,)
+    ).fetchone()
+    conn.execute("DELETE FROM gpkg_contents WHERE table_name = ?", (VIEW_NAME,))
+    conn.execute("DELETE FROM gpkg_geometry_columns WHERE table_name = ?", (VIEW_NAME,))
+    conn.execute(
+        "INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, ?)",
+        (VIEW_NAME, VIEW_NAME, srs_id),
+    )
+    conn.execute(
+        "INSERT INTO gpkg_geometry_columns (table_name, column_name, geometry_type_name, srs_id, z, m) "
+        "VALUES (?, 'geom', ?, ?, 0, 0)",
+        (VIEW_NAME, geom_type, srs_id),
+    )
+
+
+def export_mobile_gpkg(src: str, dst: str, page_size: int = 1024) -> None:
+    """Copy src to dst and shrink it to the mobile profile"""
+    if os.path.abspath(src) == os.path.abspath(dst):
+        raise ValueError("Mobile export must write to a different file than its source")
+    tmp = dst + ".tmp"
+    shutil.copyfile(src, tmp)
+
+    conn = register_gpkg_functions(sqlite3.connect(tmp))
+    try:
+        # Survey triggers would fire per row on the bulk rewrites below: set aside and restore
+        triggers = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ? "
+            "AND name NOT LIKE 'rtree_%' AND name NOT LIKE 'trigger_%'",
+            (LAYER_NAME,),
+        ).fetchall()
+        with conn:
+            for name, _ in triggers:
+                conn.execute(f'DROP TRIGGER "{name}"')
+            encode_lookups(conn)
+            prune_columns(conn)
+            create_context_view(conn)
+            for _, sql in triggers:
+                conn.execute(sql)
+        conn.execute(f"PRAGMA page_size = {int(page_size)}")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp, dst)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the compact mobile profile of wells.gpkg")
+    parser.add_argument("src", help="Full GeoPackage (e.g. data/processed/wells.gpkg)")
+    parser.add_argument("dst", help="Mobile GeoPackage to write (e.g. qgis/wells_dev.gpkg)")
+    parser.add_argument("--page-size", type=int, default=1024, help="SQLite page size (default: 1024)")
+    args = parser.parse_args()
+
+    export_mobile_gpkg(args.src, args.dst, args.page_size)
+    before, after = os.path.getsize(args.src), os.path.getsize(args.dst)
+    print(f"✅ Mobile profile: {args.dst} {after:,} bytes ({before:,} full, {100 * (1 - after / before):.0f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate well detection across sources.
+
+The same physical well can appear in several lists with slightly different
+coordinates or a mangled API (e.g. `3.50032E+13`). Points are bucketed on a
+metre grid the size of the match tolerance, so only wells in the same or a
+neighbouring cell are compared (near-linear instead of O(n²) pairs). Candidate
+pairs are then scored on normalized well_name / well_number / operator_name
+and API compatibility, all vectorized.
+
+Usage:
+    python scripts/near_duplicates.py [--gpkg data/processed/wells.gpkg] [--tolerance 30] [--out pairs.csv]
+"""
+
+import os
+import argparse
+import sqlite3
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_GPKG = os.path.join(PROJECT_ROOT, "data", "processed", "wells.gpkg")
+
+# Metres per degree of latitude / of longitude at the equator
+M_PER_DEG_LAT = 110_540.0
+M_PER_DEG_LON = 111_320.0
+
+# Half of the 3x3 neighbourhood: every unordered pair of cells is visited once
+NEIGHBOUR_OFFSETS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+OPERATOR_SUFFIXES = r"\b(INC|LLC|L L C|CO|CORP|CORPORATION|COMPANY|LTD|LP|L P|OIL AND GAS|OIL & GAS)\b"
+
+
+def normalize_text(s: pd.Series) -> pd.Series:
+    """Upper-case and keep only letters/digits so '1-14' == '1 14' and 'Smith #1' == 'SMITH 1'"""
+    return s.fillna("").astype(str).str.upper().str.replace(r"[^A-Z0-9]", "", regex=True)
+
+
+def normalize_operator(s: pd.Series) -> pd.Series:
+    s = s.fillna("").astype(str).str.upper().str.replace(r"[.,]", " ", regex=True)
+    return normalize_text(s.str.replace(OPERATOR_SUFFIXES, " ", regex=True))
+
+
+def api_digits(s: pd.Series) -> pd.Series:
+    """API digits; for scientific notation only the surviving mantissa digits"""
+    s = s.fillna("").astype(str).str.strip().str.upper()
+    mantissa = s.str.replace(r"E\+?\d+$", "", regex=True)
+    return mantissa.str.replace(r"[^0-9]", "", regex=True)
+
+
+def prefix_match(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Element-wise: both non-empty and one is a prefix of the other, compared as
+    fixed-width code point matrices over the shorter length"""
+    la, lb = np.char.str_len(a.astype(str)), np.char.str_len(b.astype(str))
+    width = int(max(la.max(initial=0), lb.max(initial=0), 1))
+    ca = a.astype(f"U{width}").view(np.uint32).reshape(-1, width)
+    cb = b.astype(f"U{width}").view(np.uint32).reshape(-1, width)
+    shorter = np.arange(width) < np.minimum(la, lb)[:, None]
+    return ((ca == cb) | ~shorter).all(axis=1) & (la > 0) & (lb > 0)
+
+
+def candidate_pairs(x: np.ndarray, y: np.ndarray, tol_m: float) -> pd.DataFrame:
+    """Index pairs (i < j) of points within tol_m metres, via a tol-sized grid hash"""
+    lat0 = float(np.nanmean(y)) if len(y) else 0.0
+    xm = x * M_PER_DEG_LON * np.cos(np.radians(lat0))
+    ym = y * M_PER_DEG_LAT
+    cells = pd.DataFrame({
+        "i": np.arange(len(x)),
+        "cx": np.floor(xm / tol_m).astype("int64"),
+        "cy": np.floor(ym / tol_m).astype("int64"),
+    })
+
+    pairs = []
+    for dx, dy in NEIGHBOUR_OFFSETS:
+        shifted = cells.assign(cx=cells["cx"] + dx, cy=cells["cy"] + dy)
+        m = cells.merge(shifted, on=["cx", "cy"], suffixes=("", "_j"))[["i", "i_j"]]
+        m = m[m["i"] != m["i_j"]] if (dx, dy) != (0, 0) else m[m["i"] < m["i_j"]]
+        pairs.append(m.rename(columns={"i_j": "j"}))
+    p = pd.concat(pairs, ignore_index=True)
+    # Orient every pair as i < j and drop repeats from the neighbour passes
+    p = pd.DataFrame({"i": np.minimum(p["i"], p["j"]), "j": np.maximum(p["i"], p["j"])}).drop_duplicates()
+
+    dist = np.hypot(xm[p["i"].to_numpy()] - xm[p["j"].to_numpy()], ym[p["i"].to_numpy()] - ym[p["j"].to_numpy()])
+    p = p.assign(distance_m=dist)
+    return p[p["distance_m"] <= tol_m].reset_index(drop=True)
+
+
+def find_near_duplicates(df: pd.DataFrame, tol_m: float = 30.0, min_matches: int = 2) -> pd.DataFrame:
+    """Merge candidates: wells within tol_m metres agreeing on at least min_matches of
+    name / number / operator / API. Different well numbers on one lease (e.g. #1 and #2
+    on the same pad) are distinct wells unless the API digits are identical."""
+    df = df.reset_index(drop=True)
+    p = candidate_pairs(df["X"].to_numpy(dtype="float64"), df["Y"].to_numpy(dtype="float64"), tol_m)
+    if p.empty:
+        return pd.DataFrame(columns=["well_id_a", "well_id_b", "source_a", "source_b", "distance_m",
+                                     "name_match", "number_match", "operator_match", "api_match", "score"])
+    i, j = p["i"].to_numpy(), p["j"].to_numpy()
+
+    def same(col: pd.Series) -> np.ndarray:
+        a, b = col.to_numpy()[i], col.to_numpy()[j]
+        return (a == b) & (a != "")
+
+    name = normalize_text(df["well_name"])
+    number = normalize_text(df["well_number"])
+    operator = normalize_operator(df["operator_name"])
+    api = api_digits(df["well_id"])
+    api_match = prefix_match(api.to_numpy()[i], api.to_numpy()[j])
+
+    out = pd.DataFrame({
+        "well_id_a": df["well_id"].to_numpy()[i],
+        "well_id_b": df["well_id"].to_numpy()[j],
+        "source_a": df["source_list"].to_numpy()[i],
+        "source_b": df["source_list"].to_numpy()[j],
+        "distance_m": p["distance_m"].round(1).to_numpy(),
+        "name_match": same(name),
+        "number_match": same(number),
+        "operator_match": same(operator),
+        "api_match": api_match,
+    })
+    out["score"] = out[["name_match", "number_match", "operator_match", "api_match"]].sum(axis=1)
+    # A mangled API only keeps a few leading digits, so only an exact API match overrides numbers
+    num_a, num_b = number.to_numpy()[i], number.to_numpy()[j]
+    number_conflict = (num_a != "") & (num_b != "") & (num_a != num_b) & ~same(api)
+    out = out[(out["score"] >= min_matches) & ~number_conflict & (out["well_id_a"] != out["well_id_b"])]
+    return out.sort_values(["score", "distance_m"], ascending=[False, True]).reset_index(drop=True)
+
+
+def merge_near_duplicates(df: pd.DataFrame, pairs: pd.DataFrame,
+                          priority: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+    """Keep one row per duplicate group: best source priority (STFD first), then a clean API"""
+    if pairs.empty:
+        return df
+    parent: Dict[str, str] = {}
+
+    def find(a: str) -> str:
+        parent.setdefault(a, a)
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for a, b in zip(pairs["well_id_a"], pairs["well_id_b"]):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[rb] = ra
+
+    grouped = df[df["well_id"].isin(parent.keys())]
+    rank = pd.DataFrame({
+        "well_id": grouped["well_id"],
+        "group": grouped["well_id"].map(find),
+        "priority": grouped["source_list"].map(priority or {}).fillna(len(priority or {}) + 1),
+        "mangled": grouped["well_id"].str.contains("E+", regex=False),
+    })
+    keep = rank.sort_values(["group", "priority", "mangled", "well_id"]).drop_duplicates("group")["well_id"]
+    drop = set(rank["well_id"]) - set(keep)
+    return df[~df["well_id"].isin(drop)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report near-duplicate wells in a GeoPackage")
+    parser.add_argument("--gpkg", default=DEFAULT_GPKG, help="GeoPackage to scan (default: data/processed/wells.gpkg)")
+    parser.add_argument("--tolerance", type=float, default=30.0, help="Match distance in metres (default: 30)")
+    parser.add_argument("--min-matches", type=int, default=2,
+                        help="Attributes (name/number/operator/API) that must agree (default: 2)")
+    parser.add_argument("--out", help="Write merge candidates to this CSV")
+    args = parser.parse_args()
+
+    with sqlite3.connect(args.gpkg) as conn:
+        df = pd.read_sql(
+            "SELECT well_id, source_list, well_name, well_number, operator_name, X, Y FROM wells", conn
+        )
+    pairs = find_near_duplicates(df, args.tolerance, args.min_matches)
+    print(f"{len(pairs)} near-duplicate pairs within {args.tolerance:g} m among {len(df)} wells")
+    if args.out:
+        pairs.to_csv(args.out, index=False)
+        print(f"Wrote {args.out}")
+    else:
+        print(pairs.head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
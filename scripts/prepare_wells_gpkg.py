@@ -1,82 +1,90 @@
 #!/usr/bin/env python3
 
 import os
-import re
 import glob
+import json
+import time
+import hashlib
+import argparse
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
-import geopandas as gpd
-from shapely.geometry import Point
+import pyogrio
+
+from gpkg_utils import add_geometry_column, gpkg_point, register_gpkg_functions
+from manifest import build_options, write_manifest
+from near_duplicates import find_near_duplicates, merge_near_duplicates
+from priority_score import load_config as load_priority_config, rescore
+from snapshots import record_snapshot
+from sources import (  # noqa: F401  (re-exported: registry lives in the stdlib-only module)
+    RAW_DIR, SOURCES, OCC_COLUMNS, register_source, load_source_config,
+    parse_date_from_filename, latest_by_date, find_source_files,
+)
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
-RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
 PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
 OUT_GPKG = os.path.join(PROCESSED_DIR, "wells.gpkg")
 LAYER_NAME = "wells"
-
-CSV_PATTERNS = {
-    "ORPHAN": os.path.join(RAW_DIR, "*orphan*.csv"),
-    "STFD": os.path.join(RAW_DIR, "*stfd*.csv"),
-}
-
-DATE_RE = re.compile(r"(20\d{2}-\d{2}-\d{2})")
-
-
-def parse_date_from_filename(path: str) -> Optional[str]:
-    m = DATE_RE.search(os.path.basename(path))
-    if m:
-        return m.group(1)
-    return None
-
-
-def latest_by_date(pattern: str) -> Optional[str]:
-    candidates = glob.glob(pattern)
-    if not candidates:
-        return None
-    def sort_key(p: str) -> Tuple[int, str]:
-        d = parse_date_from_filename(p)
-        return (0 if d else 1, d or "", p)
-    candidates.sort(key=sort_key, reverse=True)
-    return candidates[0]
-
-
-def load_csv(path: str, source_list: str, dataset_date: Optional[str]) -> pd.DataFrame:
+CACHE_DIR = os.path.join(PROCESSED_DIR, ".cache")
+# Bump when parsing/normalization changes so stale cached frames are ignored
+PARSE_CACHE_VERSION = 1
+
+# Fast Rust-based reader when installed, otherwise openpyxl (pandas uses read-only mode)
+try:
+    import python_calamine  # noqa: F401
+    XLSX_ENGINE = "calamine"
+except ImportError:
+    XLSX_ENGINE = "openpyxl"
+
+# Columnar Arrow write (pyogrio.write_arrow) when pyarrow is installed and GDAL is 3.8+,
+# otherwise pyogrio's NumPy writer; both skip GeoDataFrame/shapely entirely
+ARROW_MIN_GDAL = (3, 8, 0)
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+WRITE_ENGINE = "arrow" if pa is not None and pyogrio.__gdal_version__ >= ARROW_MIN_GDAL else "numpy"
+
+# Below this much raw input, process pool startup costs more than it saves
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+
+def read_raw(path: str, dtypes: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Read a CSV or xlsx well list with the given columns forced to their dtypes"""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        # Empty cells as "" like the CSV path, not NaN
+        df = pd.read_excel(path, dtype=dtypes, engine=XLSX_ENGINE, keep_default_na=False)
+        # Excel date cells -> the same text the OCC CSV export carries (a date column
+        # with blank cells comes back as objects: datetimes mixed with "")
+        for c in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[c]):
+                df[c] = df[c].dt.strftime("%Y-%m-%d %H:%M:%S")
+            elif df[c].dtype == object:
+                dates = df[c].map(lambda v: isinstance(v, datetime))
+                if dates.any():
+                    df.loc[dates, c] = pd.to_datetime(df.loc[dates, c]).dt.strftime("%Y-%m-%d %H:%M:%S")
+        return df
+    return pd.read_csv(path, dtype=dtypes, keep_default_na=False)
+
+
+def normalize_well_id(s: pd.Series) -> pd.Series:
+    """API as text: strip spaces and a float-style '.0' tail from numeric cells"""
+    return s.astype(str).str.strip().str.replace(r"\.0+$", "", regex=True)
+
+
+def load_table(path: str, source_list: str, dataset_date: Optional[str],
+               columns: Optional[Dict[str, str]] = None,
+               dtypes: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    columns = columns or OCC_COLUMNS
     # Read with explicit dtypes to preserve API as text
-    df = pd.read_csv(path, dtype={"API": str}, keep_default_na=False)
+    df = read_raw(path, dtypes or {"API": str})
 
     # Standardize column names to our schema
-    rename_map = {
-        "API": "well_id",
-        "WellType": "well_type",
-        "WellStatus": "well_status",
-        "OrphanDate": "orphan_date",
-        "WellName": "well_name",
-        "WellNumber": "well_number",
-        "OperatorName": "operator_name",
-        "OperatorNumber": "operator_number",
-        "IncidentNo": "incident_no",
-        "X": "X",
-        "Y": "Y",
-        "CountyName": "county_name",
-        "CountyNo": "county_no",
-        "Sec": "sec",
-        "Township": "township",
-        "TownshipDir": "township_dir",
-        "Range": "range",
-        "RangeDir": "range_dir",
-        "PM": "pm",
-        "Quarter": "quarter",
-        "QuarterQuarter": "quarter_quarter",
-        "QuarterQuarterQuarter": "quarter_q_q_q",
-        "QuarterQuarterQuarterQuarter": "quarter_q_q_q_q",
-        "FootageNS": "footage_ns",
-        "NS": "ns",
-        "FootageEW": "footage_ew",
-        "EW": "ew",
-    }
+    rename_map = columns
     df = df.rename(columns=rename_map)
 
     # Keep only columns we know + add missing ones later
@@ -98,50 +106,86 @@ def load_csv(path: str, source_list: str, dataset_date: Optional[str]) -> pd.Dat
     if dataset_date:
         df["dataset_date"] = dataset_date
 
-    # Ensure well_id is text and strip spaces
-    df["well_id"] = df["well_id"].astype(str).str.strip()
+    # Ensure well_id is text and strip spaces; rows without an API cannot be matched to a well
+    df["well_id"] = normalize_well_id(df["well_id"].fillna(""))
+    blank = df["well_id"] == ""
+    if blank.any():
+        print(f"⚠️  {source_list}: skipped {int(blank.sum())} rows without an API")
+        df = df[~blank].reset_index(drop=True)
+    mangled = int(df["well_id"].str.contains("E+", regex=False).sum())
+    if mangled:
+        print(f"⚠️  {source_list}: {mangled} API values in scientific notation (lossy CSV export?); use the xlsx original")
 
     return df
 
 
-def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
-    # Add missing carryover columns
-    carryover_cols = [
-        "well_type","well_status","orphan_date","incident_no","well_name","well_number",
-        "operator_name","operator_number","county_name","county_no","sec","township",
-        "township_dir","range","range_dir","pm","quarter","quarter_quarter","quarter_q_q_q",
-        "quarter_q_q_q_q","footage_ns","ns","footage_ew","ew","X","Y","dataset_date",
-    ]
-    for c in carryover_cols:
-        if c not in df.columns:
-            df[c] = pd.NA
-
-    # Status fields defaults (align with app expectations)
-    status_defaults = {
-        "found": -1,        # -1=Unknown, 0=No, 1=Yes (kept but hidden in UI)
-        "exists": -1,       # -1=Unknown, 0=No, 1=Yes (UI uses Yes/No only)
-        "small_leak": 0,    # 0=No, 1=Yes
-        "viable_leak": 0,   # 0=No, 1=Yes
-        "visited": 0,       # 0=Not Visited, 1=Visited
-        "reset_survey": 0,  # 0=No, 1=Yes (special toggle to clear to defaults)
-    }
-    for c, v in status_defaults.items():
-        if c not in df.columns:
-            df[c] = v
-
-    # Audit fields and editor name
-    for c in ("last_edit_utc", "visited_at_utc", "editor_name"):
-        if c not in df.columns:
-            df[c] = pd.NA
-
-    # Optional attachments
-    for c in ("photo_path", "voice_note"):
-        if c not in df.columns:
-            df[c] = pd.NA
+# Carried over from the source lists (added empty when no source has them)
+CARRYOVER_COLS = [
+    "well_type","well_status","orphan_date","incident_no","well_name","well_number",
+    "operator_name","operator_number","county_name","county_no","sec","township",
+    "township_dir","range","range_dir","pm","quarter","quarter_quarter","quarter_q_q_q",
+    "quarter_q_q_q_q","footage_ns","ns","footage_ew","ew","X","Y","dataset_date",
+]
+# Non-text carryover columns; every other added column is nullable text
+NUMERIC_COLS = {"X": "float64", "Y": "float64", "county_no": "Int64", "sec": "Int64"}
+
+# Status fields defaults (align with app expectations)
+STATUS_DEFAULTS = {
+    "found": -1,        # -1=Unknown, 0=No, 1=Yes (kept but hidden in UI)
+    "exists": -1,       # -1=Unknown, 0=No, 1=Yes (UI uses Yes/No only)
+    "small_leak": 0,    # 0=No, 1=Yes
+    "viable_leak": 0,   # 0=No, 1=Yes
+    "visited": 0,       # 0=Not Visited, 1=Visited
+    "reset_survey": 0,  # 0=No, 1=Yes (special toggle to clear to defaults)
+}
 
+# Audit fields and editor name, optional attachments
+AUDIT_COLS = ["last_edit_utc", "visited_at_utc", "editor_name"]
+ATTACHMENT_COLS = ["photo_path", "voice_note"]
+# Columns edited on devices: only these bump last_edit_utc through wells_update
+FIELD_EDIT_COLS = [*STATUS_DEFAULTS, "visited_at_utc", "editor_name", *ATTACHMENT_COLS]
+
+SURVEY_TABLE = "well_surveys"
+SURVEY_SRS_ID = 4326
+# ISO8601 text <-> Unix seconds; strftime accepts the Z / +HH:MM suffixes QGIS and devices write
+SURVEY_EPOCH_SQL = "CAST(strftime('%s', {}) AS INTEGER)"
+SURVEY_DATE_SQL = "strftime('%Y-%m-%dT%H:%M:%SZ', {}, 'unixepoch')"
+
+
+def ensure_columns(df: pd.DataFrame, rows: Optional[Sequence[Any]] = None) -> pd.DataFrame:
+    """Add every missing schema column, and optionally select `rows` (index labels), in one reindex"""
+    wanted = [*CARRYOVER_COLS, *STATUS_DEFAULTS, *AUDIT_COLS, *ATTACHMENT_COLS]
+    missing = [c for c in wanted if c not in df.columns]
+    if rows is None and not missing:
+        return df
+    # NaN-filled, then typed: nullable text is written as NULL, never as the string '<NA>'
+    df = df.reindex(index=rows, columns=[*df.columns, *missing]).astype(
+        {c: NUMERIC_COLS.get(c, "string") for c in missing if c not in STATUS_DEFAULTS}
+    )
+    for c in missing:
+        if c in STATUS_DEFAULTS:
+            df[c] = STATUS_DEFAULTS[c]
     return df
 
 
+# Indexes behind export_wells.py's attribute filters; the partial leak index only serves
+# queries that repeat LEAK_FILTER verbatim
+LEAK_FILTER = "(small_leak = 1 OR viable_leak = 1)"
+FILTER_INDEXES = {
+    "idx_wells_county_name": ("county_name", None),
+    "idx_wells_source_list": ("source_list", None),
+    "idx_wells_viable_leak": ("viable_leak", "viable_leak = 1"),
+    "idx_wells_leaks": ("fid", LEAK_FILTER),
+}
+
+
+def create_filter_indexes(conn: sqlite3.Connection) -> None:
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(wells)")}
+    for name, (col, where) in FILTER_INDEXES.items():
+        if col in cols:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON wells ({col})" + (f" WHERE {where}" if where else ""))
+
+
 def apply_triggers(conn: sqlite3.Connection) -> None:
     cur = conn.cursor()
     # Unique index on well_id
@@ -158,7 +202,8 @@ def apply_triggers(conn: sqlite3.Connection) -> None:
         ON wells (visited);
         """
     )
-    # Insert trigger: set audit timestamps and visited when status changes
+    # Insert trigger: set audit timestamps and visited when status changes;
+    # reset_survey = 1 clears the survey back to defaults in the same write
     cur.execute(
         """
         CREATE TRIGGER IF NOT EXISTS wells_insert
@@ -167,13 +212,20 @@ def apply_triggers(conn: sqlite3.Connection) -> None:
         BEGIN
           UPDATE wells SET
             last_edit_utc = strftime('%Y-%m-%dT%H:%M:%fZ','now'),
+            "found" = CASE WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN -1 ELSE NEW."found" END,
+            "exists" = CASE WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN -1 ELSE NEW."exists" END,
+            small_leak = CASE WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN 0 ELSE NEW.small_leak END,
+            viable_leak = CASE WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN 0 ELSE NEW.viable_leak END,
+            reset_survey = 0,
             visited = CASE
+              WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN 0
               WHEN (COALESCE(NEW."exists", -1) != -1
                  OR COALESCE(NEW."found", -1) != -1
                  OR COALESCE(NEW.small_leak, 0) != 0
                  OR COALESCE(NEW.viable_leak, 0) != 0)
               THEN 1 ELSE COALESCE(NEW.visited, 0) END,
             visited_at_utc = CASE
+              WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN NULL
               WHEN (COALESCE(NEW.visited, 0) = 0) AND (
                    COALESCE(NEW."exists", -1) != -1 OR
                    COALESCE(NEW."found", -1) != -1 OR
@@ -184,22 +236,32 @@ def apply_triggers(conn: sqlite3.Connection) -> None:
         END;
         """
     )
-    # Update trigger: same logic on update
+    # Update trigger: same logic on update, for field-edited columns only, so
+    # desktop-side writes (source refresh, priority rescoring) keep last_edit_utc.
+    # Dropped first so re-applying upgrades files built with the older trigger.
+    cur.execute("DROP TRIGGER IF EXISTS wells_update")
     cur.execute(
-        """
-        CREATE TRIGGER IF NOT EXISTS wells_update
-        AFTER UPDATE ON wells
+        f"""
+        CREATE TRIGGER wells_update
+        AFTER UPDATE OF {", ".join(f'"{c}"' for c in FIELD_EDIT_COLS)} ON wells
         FOR EACH ROW
         BEGIN
           UPDATE wells SET
             last_edit_utc = strftime('%Y-%m-%dT%H:%M:%fZ','now'),
+            "found" = CASE WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN -1 ELSE NEW."found" END,
+            "exists" = CASE WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN -1 ELSE NEW."exists" END,
+            small_leak = CASE WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN 0 ELSE NEW.small_leak END,
+            viable_leak = CASE WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN 0 ELSE NEW.viable_leak END,
+            reset_survey = 0,
             visited = CASE
+              WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN 0
               WHEN (COALESCE(NEW."exists", -1) != -1
                  OR COALESCE(NEW."found", -1) != -1
                  OR COALESCE(NEW.small_leak, 0) != 0
                  OR COALESCE(NEW.viable_leak, 0) != 0)
               THEN 1 ELSE COALESCE(NEW.visited, 0) END,
             visited_at_utc = CASE
+              WHEN COALESCE(NEW.reset_survey, 0) = 1 THEN NULL
               WHEN (COALESCE(OLD.visited,0) = 0 AND COALESCE(NEW.visited,0) = 1 AND OLD.visited_at_utc IS NULL)
               THEN strftime('%Y-%m-%dT%H:%M:%fZ','now')
               ELSE NEW.visited_at_utc END
@@ -213,110 +275,422 @@ def apply_triggers(conn: sqlite3.Connection) -> None:
 def create_survey_table(conn: sqlite3.Connection) -> None:
     """Create separate well_surveys table for clean mobile data collection"""
     cur = conn.cursor()
-    
-    # Create well_surveys table
+
+    # Create well_surveys: a point layer (device position) with epoch-second timestamps
     cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS well_surveys (
+        f"""
+        CREATE TABLE IF NOT EXISTS {SURVEY_TABLE} (
             survey_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            geom POINT,  -- GPS location where survey conducted (GPKG geometry, R-tree indexed)
             well_id TEXT NOT NULL,
             found SMALLINT DEFAULT -1,  -- -1=Unknown, 0=No, 1=Yes
-            well_exists SMALLINT DEFAULT -1,  -- -1=Unknown, 0=No, 1=Yes  
+            well_exists SMALLINT DEFAULT -1,  -- -1=Unknown, 0=No, 1=Yes
             small_leak SMALLINT DEFAULT 0,  -- 0=No, 1=Yes
             viable_leak SMALLINT DEFAULT 0,  -- 0=No, 1=Yes
             notes TEXT,
             surveyor_name TEXT,
-            survey_date TEXT,  -- ISO8601 UTC
-            survey_location TEXT,  -- WKT POINT for GPS location where survey conducted
+            survey_date TEXT,  -- ISO8601 UTC, as entered on the device
+            survey_epoch INTEGER,  -- survey_date as Unix seconds (kept by triggers, indexed)
+            survey_location TEXT,  -- legacy WKT POINT from projects before geom; backfilled into geom
             FOREIGN KEY (well_id) REFERENCES wells(well_id)
         );
         """
     )
-    
-    # Create indexes
+    s = migrate_survey_table(conn)
+    backfilled = f" (backfilled {s['geom']} positions, {s['epoch']} timestamps)" if s["geom"] or s["epoch"] else ""
+    print(f"✅ Created well_surveys table with relationships{backfilled}")
+    conn.commit()
+
+
+def migrate_survey_table(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Bring well_surveys up to the current layout; idempotent, safe on every build and sync.
+    Older files gain geom / survey_epoch, the geometry registration and R-tree, the epoch
+    index (replacing the text date index) and triggers; rows holding only WKT / ISO text
+    are backfilled. Returns the backfilled row counts. Does not commit."""
+    register_gpkg_functions(conn)
+    cur = conn.cursor()
+    cols = {r[1] for r in cur.execute(f"PRAGMA table_info({SURVEY_TABLE})")}
+    if "geom" not in cols:
+        cur.execute(f"ALTER TABLE {SURVEY_TABLE} ADD COLUMN geom POINT")
+    if "survey_epoch" not in cols:
+        cur.execute(f"ALTER TABLE {SURVEY_TABLE} ADD COLUMN survey_epoch INTEGER")
+    if "survey_location" not in cols:
+        cur.execute(f"ALTER TABLE {SURVEY_TABLE} ADD COLUMN survey_location TEXT")
+
+    # Positions: WKT from older projects -> GPKG points. Written before the R-tree exists on a
+    # first migration (bulk-filled below); later stragglers are indexed by its triggers.
+    from validate_surveys import parse_points
+    rows = cur.execute(
+        f"SELECT survey_id, survey_location FROM {SURVEY_TABLE} WHERE geom IS NULL AND survey_location IS NOT NULL"
+    ).fetchall()
+    geom = 0
+    if rows:
+        ids, wkt = zip(*rows)
+        x, y = parse_points(pd.Series(wkt, dtype=object))
+        ok = ~np.isnan(x)
+        cur.executemany(f"UPDATE {SURVEY_TABLE} SET geom = ? WHERE survey_id = ?",
+                        [(gpkg_point(a, b, SURVEY_SRS_ID), i) for i, a, b, k in zip(ids, x, y, ok) if k])
+        geom = int(ok.sum())
+    add_geometry_column(conn, SURVEY_TABLE, "geom", "POINT", SURVEY_SRS_ID, pk="survey_id")
+
+    # Timestamps: one indexed integer instead of comparing ISO strings
+    epoch = cur.execute(
+        f"UPDATE {SURVEY_TABLE} SET survey_epoch = {SURVEY_EPOCH_SQL.format('survey_date')} "
+        "WHERE survey_epoch IS NULL AND survey_date IS NOT NULL").rowcount
+    cur.execute("DROP INDEX IF EXISTS idx_surveys_date")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_surveys_well_id ON {SURVEY_TABLE} (well_id)")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_surveys_epoch ON {SURVEY_TABLE} (survey_epoch)")
+
+    # survey_epoch follows survey_date; a row written with only an epoch gets its ISO text
     cur.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_surveys_well_id
-        ON well_surveys (well_id);
+        f"""
+        CREATE TRIGGER IF NOT EXISTS survey_epoch_insert
+        AFTER INSERT ON {SURVEY_TABLE}
+        FOR EACH ROW WHEN NEW.survey_epoch IS NULL OR NEW.survey_date IS NULL
+        BEGIN
+          UPDATE {SURVEY_TABLE} SET
+            survey_epoch = COALESCE(NEW.survey_epoch, {SURVEY_EPOCH_SQL.format('NEW.survey_date')}),
+            survey_date = COALESCE(NEW.survey_date, {SURVEY_DATE_SQL.format('NEW.survey_epoch')})
+          WHERE survey_id = NEW.survey_id;
+        END;
         """
     )
-    
     cur.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_surveys_date  
-        ON well_surveys (survey_date);
+        f"""
+        CREATE TRIGGER IF NOT EXISTS survey_epoch_update
+        AFTER UPDATE OF survey_date ON {SURVEY_TABLE}
+        FOR EACH ROW
+        BEGIN
+          UPDATE {SURVEY_TABLE} SET survey_epoch = {SURVEY_EPOCH_SQL.format('NEW.survey_date')}
+          WHERE survey_id = NEW.survey_id;
+        END;
         """
     )
-    
-    # Create trigger to update wells table when survey is created
+
+    # Update wells when a survey is created. Dropped first so re-applying upgrades older files.
+    cur.execute("DROP TRIGGER IF EXISTS survey_update_well")
+    survey_date = f"COALESCE(NEW.survey_date, {SURVEY_DATE_SQL.format('NEW.survey_epoch')})"
     cur.execute(
-        """
-        CREATE TRIGGER IF NOT EXISTS survey_update_well
-        AFTER INSERT ON well_surveys
+        f"""
+        CREATE TRIGGER survey_update_well
+        AFTER INSERT ON {SURVEY_TABLE}
         FOR EACH ROW
         BEGIN
           UPDATE wells SET
             visited = 1,
-            visited_at_utc = COALESCE(visited_at_utc, NEW.survey_date),
-            last_edit_utc = NEW.survey_date
+            visited_at_utc = COALESCE(visited_at_utc, {survey_date}),
+            last_edit_utc = {survey_date}
           WHERE well_id = NEW.well_id;
         END;
         """
     )
-    
-    print("✅ Created well_surveys table with relationships")
-    conn.commit()
 
-
-def main() -> None:
-    os.makedirs(PROCESSED_DIR, exist_ok=True)
-
-    paths = {}
-    for key, pattern in CSV_PATTERNS.items():
-        p = latest_by_date(pattern)
-        if not p:
-            raise FileNotFoundError(f"No CSV found for {key} using pattern: {pattern}")
-        paths[key] = p
-
-    orphan_date = parse_date_from_filename(paths["ORPHAN"]) or datetime.utcnow().date().isoformat()
-    stfd_date = parse_date_from_filename(paths["STFD"]) or datetime.utcnow().date().isoformat()
-
-    df_orphan = load_csv(paths["ORPHAN"], "ORPHAN", orphan_date)
-    df_stfd = load_csv(paths["STFD"], "STFD", stfd_date)
-
-    # Concatenate and ensure full schema
-    df = pd.concat([df_stfd, df_orphan], ignore_index=True, sort=False)
-    df = ensure_columns(df)
-
-    # Drop rows with invalid coordinates
-    df = df[pd.notna(df["X"]) & pd.notna(df["Y"])].copy()
-
-    # Priority: keep STFD when duplicate well_id exists
-    priority = {"STFD": 0, "ORPHAN": 1}
-    df["_priority"] = df["source_list"].map(priority).fillna(2)
-    df = df.sort_values(["well_id", "_priority"])  # ascending priority
-    df = df.drop_duplicates(subset=["well_id"], keep="first")
-    df = df.drop(columns=["_priority"])  # cleanup
-
-    # Build GeoDataFrame
-    gdf = gpd.GeoDataFrame(
-        df,
-        geometry=gpd.points_from_xy(df["X"], df["Y"], crs="EPSG:4326"),
-        crs="EPSG:4326",
+    # Layer extent for clients that zoom to it
+    cur.execute(
+        f"""
+        UPDATE gpkg_contents SET (min_x, max_x, min_y, max_y) = (
+          SELECT min(minx), max(maxx), min(miny), max(maxy) FROM rtree_{SURVEY_TABLE}_geom)
+        WHERE table_name = '{SURVEY_TABLE}'
+        """
     )
+    return {"geom": geom, "epoch": epoch}
+
+
+def _cache_prefix(path: str) -> str:
+    return hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+
+
+def parse_cache_path(task: Tuple[str, str, Optional[str], Dict[str, str], Dict[str, Any]]) -> str:
+    """Cache file for a parsed source; keyed on the file's size/mtime and the parse settings
+    and prefixed per source path so a reparse can replace the entry it supersedes"""
+    name, path, dataset_date, columns, dtypes = task
+    st = os.stat(path)
+    key = json.dumps([
+        PARSE_CACHE_VERSION, os.path.abspath(path), st.st_size, st.st_mtime_ns,
+        name, dataset_date, columns, {c: getattr(t, "__name__", str(t)) for c, t in (dtypes or {}).items()},
+    ])
+    return os.path.join(CACHE_DIR, f"{_cache_prefix(path)}-{hashlib.sha1(key.encode()).hexdigest()}.pkl")
+
+
+def _load_source(task: Tuple[str, str, Optional[str], Dict[str, str], Dict[str, Any]]) -> pd.DataFrame:
+    # Tasks carry their own column map/dtypes so spawned workers need no registry
+    name, path, dataset_date, columns, dtypes = task
+    cache_path = parse_cache_path(task)
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_pickle(cache_path)
+        except Exception:
+            pass  # unreadable (e.g. pandas upgrade): reparse below
+    df = load_table(path, name, dataset_date, columns, dtypes)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    df.to_pickle(tmp)
+    os.replace(tmp, cache_path)
+    prefix = _cache_prefix(path)
+    with open(os.path.join(CACHE_DIR, f"{prefix}.src"), "w") as f:
+        f.write(os.path.abspath(path))
+    # Older parses of the same file (changed contents or settings) are dead weight
+    for old in glob.glob(os.path.join(CACHE_DIR, f"{prefix}-*.pkl")):
+        if old != cache_path:
+            os.remove(old)
+    return df
 
-    # Remove existing GPKG to avoid stale schema
-    if os.path.exists(OUT_GPKG):
-        os.remove(OUT_GPKG)
-
-    # Write to GeoPackage
-    gdf.to_file(OUT_GPKG, layer=LAYER_NAME, driver="GPKG")
 
-    # Apply triggers and indexes
-    with sqlite3.connect(OUT_GPKG) as conn:
+def prune_parse_cache(cache_dir: Optional[str] = None) -> int:
+    """Drop cache entries whose source file is gone or that predate the current
+    naming scheme; returns the number of files removed"""
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return 0
+    live = set()
+    removed = 0
+    for src in glob.glob(os.path.join(cache_dir, "*.src")):
+        with open(src) as f:
+            path = f.read().strip()
+        prefix = os.path.basename(src)[:-len(".src")]
+        if path and os.path.exists(path):
+            live.add(prefix)
+        else:
+            os.remove(src)
+            removed += 1
+    for entry in glob.glob(os.path.join(cache_dir, "*.pkl")):
+        if os.path.basename(entry).split("-", 1)[0] not in live:
+            os.remove(entry)
+            removed += 1
+    return removed
+
+
+def load_sources(paths: Dict[str, str], jobs: int = 0) -> List[pd.DataFrame]:
+    """Parse all sources, in a process pool when there is enough input to pay for it"""
+    today = datetime.utcnow().date().isoformat()
+    tasks = [
+        (name, p, parse_date_from_filename(p) or today, SOURCES[name]["columns"], SOURCES[name]["dtypes"])
+        for name, p in paths.items()
+    ]
+    if jobs <= 0:
+        total = sum(os.path.getsize(p) for p in paths.values())
+        jobs = min(len(tasks), os.cpu_count() or 1) if total >= PARALLEL_MIN_BYTES else 1
+    if jobs <= 1 or len(tasks) <= 1:
+        frames = [_load_source(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            frames = list(pool.map(_load_source, tasks))
+    prune_parse_cache()
+    return frames
+
+
+def priority_winners(df: pd.DataFrame) -> np.ndarray:
+    """Index labels of the highest-priority row per well_id (lowest registered priority, STFD first)"""
+    priority = {name: src["priority"] for name, src in SOURCES.items()}
+    rank = df["source_list"].map(priority).fillna(max(priority.values(), default=0) + 1)
+    # Single hash-grouped pass instead of sorting the whole frame
+    return rank.groupby(df["well_id"], sort=False).idxmin().to_numpy()
+
+
+def dedupe_by_priority(df: pd.DataFrame) -> pd.DataFrame:
+    """One pass over all sources: keep the highest-priority row per well_id"""
+    return df.loc[priority_winners(df)]
+
+
+def hilbert_key(x: np.ndarray, y: np.ndarray, order: int = 16) -> np.ndarray:
+    """Hilbert curve index of each point on a 2^order grid over the points' extent (vectorized)"""
+    n = 1 << order
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    if not len(x):
+        return np.zeros(0, dtype="int64")
+    span_x = max(x.max() - x.min(), 1e-12)
+    span_y = max(y.max() - y.min(), 1e-12)
+    xi = ((x - x.min()) / span_x * (n - 1)).astype("int64")
+    yi = ((y - y.min()) / span_y * (n - 1)).astype("int64")
+    d = np.zeros(len(x), dtype="int64")
+    s = n >> 1
+    while s > 0:
+        rx = (xi & s) > 0
+        ry = (yi & s) > 0
+        d += s * s * ((3 * rx.astype("int64")) ^ ry.astype("int64"))
+        # Rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        xi = np.where(flip, n - 1 - xi, xi)
+        yi = np.where(flip, n - 1 - yi, yi)
+        swap = ~ry
+        xi, yi = np.where(swap, yi, xi), np.where(swap, xi, yi)
+        s >>= 1
+    return d
+
+
+# Little-endian WKB point: byte order, geometry type, x, y (21 bytes, unpadded)
+POINT_WKB = np.dtype([("order", "u1"), ("type", "<u4"), ("x", "<f8"), ("y", "<f8")])
+
+
+def _point_records(x: np.ndarray, y: np.ndarray) -> bytes:
+    rec = np.empty(len(x), dtype=POINT_WKB)
+    rec["order"] = 1
+    rec["type"] = 1
+    rec["x"] = x
+    rec["y"] = y
+    return rec.tobytes()
+
+
+def points_wkb(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """WKB POINT blobs built straight from coordinate arrays (no shapely objects)"""
+    buf = _point_records(x, y)
+    size = POINT_WKB.itemsize
+    out = np.empty(len(x), dtype=object)
+    out[:] = [buf[i:i + size] for i in range(0, len(buf), size)]
+    return out
+
+
+def points_wkb_arrow(x: np.ndarray, y: np.ndarray) -> "pa.Array":
+    """The same WKB points as an Arrow binary array over one buffer (no per-point objects)"""
+    n = len(x)
+    offsets = np.arange(0, (n + 1) * POINT_WKB.itemsize, POINT_WKB.itemsize, dtype=np.int32)
+    return pa.Array.from_buffers(pa.binary(), n, [None, pa.py_buffer(offsets), pa.py_buffer(_point_records(x, y))])
+
+
+GMAPS_VIEW_URL = "https://maps.google.com/?q="
+
+
+def context_fields(x: np.ndarray, y: np.ndarray) -> Dict[str, np.ndarray]:
+    """Stored coords_latlon ("lat,lon", 6 decimals ~ 0.1 m) and gmaps_url strings, built once
+    per write instead of as QGIS expression fields QField evaluates for every feature"""
+    latlon = np.char.add(np.char.add(np.char.mod("%.6f", y), ","), np.char.mod("%.6f", x)).astype(object)
+    gmaps = np.char.add(GMAPS_VIEW_URL, latlon.astype(str)).astype(object)
+    missing = np.isnan(x) | np.isnan(y)
+    latlon[missing] = None
+    gmaps[missing] = None
+    return {"coords_latlon": latlon, "gmaps_url": gmaps}
+
+
+def field_arrays(df: pd.DataFrame) -> Tuple[List[np.ndarray], List[Optional[np.ndarray]]]:
+    """Column values and null masks in the form GDAL's writer takes"""
+    data, masks = [], []
+    for c in df.columns:
+        col = df[c]
+        na = col.isna().to_numpy()
+        if isinstance(col.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_numeric_dtype(col.dtype):
+            values = col.to_numpy(dtype=col.dtype.numpy_dtype, na_value=0)
+        elif pd.api.types.is_numeric_dtype(col.dtype):
+            values = col.to_numpy()
+        else:
+            values = col.to_numpy(dtype=object, na_value=None)
+        data.append(values)
+        masks.append(na if na.any() else None)
+    return data, masks
+
+
+def finalize_gpkg(out_gpkg: str) -> None:
+    """SQLite-side schema on a freshly written file in one connection: unique/visited
+    and export filter indexes, survey triggers, the well_surveys table and initial priority scores"""
+    with sqlite3.connect(out_gpkg) as conn:
         apply_triggers(conn)
+        create_filter_indexes(conn)
+        create_survey_table(conn)
+        rescore(conn, load_priority_config())
+
+
+def write_gpkg(df: pd.DataFrame, out_gpkg: str = OUT_GPKG, spatial_order: bool = True,
+               engine: Optional[str] = None) -> None:
+    """Write the wells layer (replacing any existing file) and apply triggers/indexes;
+    engine is "arrow" or "numpy" (default: WRITE_ENGINE)"""
+    engine = engine or WRITE_ENGINE
+    if engine == "arrow" and pa is None:
+        raise ImportError("engine='arrow' needs pyarrow; install it or use engine='numpy'")
+    if engine == "arrow" and pyogrio.__gdal_version__ < ARROW_MIN_GDAL:
+        raise ImportError(f"engine='arrow' needs GDAL >= 3.8 (have {pyogrio.__gdal_version_string__}); "
+                          "use engine='numpy'")
+    if engine not in ("arrow", "numpy"):
+        raise ValueError(f"Unknown GeoPackage write engine: {engine}")
+
+    # Store rows in Hilbert order so nearby wells share pages; well_id lookups use the unique index
+    x, y = df["X"].to_numpy(dtype="float64"), df["Y"].to_numpy(dtype="float64")
+    if spatial_order:
+        order = np.argsort(hilbert_key(x, y), kind="stable")
+    else:
+        order = np.argsort(df["well_id"].to_numpy(dtype=object), kind="stable")
+    df = df.take(order)
+    df = df.assign(**context_fields(x[order], y[order]))
 
-    print(f"Wrote {OUT_GPKG}:{LAYER_NAME} with {len(gdf)} wells (STFD prioritized on duplicates)")
+    # Remove existing GPKG to avoid stale schema
+    if os.path.exists(out_gpkg):
+        os.remove(out_gpkg)
+
+    # Columnar write straight from NumPy: geometry as WKB, no GeoDataFrame
+    layer = {"layer": LAYER_NAME, "driver": "GPKG", "geometry_type": "Point", "crs": "EPSG:4326"}
+    if engine == "arrow":
+        # Mixed-type object columns (e.g. township: int in one list, text in another) are written as text
+        objects = {c: "string" for c in df.columns if df[c].dtype == object}
+        table = pa.Table.from_pandas(df.astype(objects) if objects else df, preserve_index=False)
+        table = table.append_column("geom", points_wkb_arrow(x[order], y[order]))
+        pyogrio.write_arrow(table, out_gpkg, geometry_name="geom", **layer)
+    else:
+        data, masks = field_arrays(df)
+        pyogrio.raw.write(out_gpkg, geometry=points_wkb(x[order], y[order]), field_data=data,
+                          fields=list(df.columns), field_mask=masks, **layer)
+
+    finalize_gpkg(out_gpkg)
+
+
+def build(jobs: int = 0, near_dupe_report: Optional[str] = None, merge: bool = False,
+          near_dupe_tolerance: float = 30.0) -> int:
+    """Build wells.gpkg from the latest source files and record the build manifest; returns row count"""
+    started = time.time()
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+    load_source_config()
+
+    paths = find_source_files()
+    for name, p in paths.items():
+        print(f"Source {name}: {os.path.basename(p)}")
+
+    # Concatenate (the only full copy of the raw rows)
+    frames = load_sources(paths, jobs)
+    source_rows = {name: len(f) for name, f in zip(paths, frames)}
+    df = pd.concat(frames, ignore_index=True, sort=False)
+    del frames
+
+    # Rows with valid coordinates, lowest registered priority wins on duplicate
+    # well_id (STFD first); picked on two columns, then selected together with
+    # the missing schema columns in a single reindex
+    valid = df["X"].notna() & df["Y"].notna()
+    keep = priority_winners(df.loc[valid, ["well_id", "source_list"]])
+    df = ensure_columns(df, rows=keep)
+
+    # Same physical well under different ids (moved coordinates, mangled API)
+    if near_dupe_report or merge:
+        pairs = find_near_duplicates(df, near_dupe_tolerance)
+        print(f"{len(pairs)} near-duplicate pairs within {near_dupe_tolerance:g} m")
+        if near_dupe_report:
+            pairs.to_csv(near_dupe_report, index=False)
+        if merge:
+            before = len(df)
+            df = merge_near_duplicates(df, pairs, {name: src["priority"] for name, src in SOURCES.items()})
+            print(f"Merged {before - len(df)} near-duplicate wells")
+
+    # Record this build in the snapshot store (delta against the previous release)
+    record_snapshot(df)
+
+    write_gpkg(df, OUT_GPKG)
+    # Provenance + cache key for `fieldapp.py build` and later stages
+    write_manifest("wells", paths, {"gpkg": OUT_GPKG}, build_options(merge, near_dupe_tolerance),
+                   rows=len(df), started=started,
+                   extra={"dataset_date": {name: parse_date_from_filename(p) for name, p in paths.items()},
+                          "source_rows": source_rows})
+    print(f"Wrote {OUT_GPKG}:{LAYER_NAME} with {len(df)} wells (STFD prioritized on duplicates)")
+    return len(df)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build wells.gpkg from the registered well lists")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="Parallel source parsers (default: auto, serial for small inputs)")
+    parser.add_argument("--near-dupe-report", metavar="CSV",
+                        help="Write near-duplicate merge candidates (close wells with matching name/number/operator/API)")
+    parser.add_argument("--merge-near-duplicates", action="store_true",
+                        help="Collapse near-duplicate groups, keeping the highest-priority source (STFD first)")
+    parser.add_argument("--near-dupe-tolerance", type=float, default=30.0,
+                        help="Near-duplicate match distance in metres (default: 30)")
+    args = parser.parse_args(argv)
+    build(args.jobs, args.near_dupe_report, args.merge_near_duplicates, args.near_dupe_tolerance)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Survey priority: which unvisited wells to visit next.
+
+Every well gets a 0-100 priority_score from weighted components, each scaled
+to 0..1 in one vectorized pass:
+
+- orphan_age: years since orphan_date, capped at orphan_age_cap_years
+- stfd: on the STFD (state-funded) list
+- incident: has an OCC incident number
+- well_type: per-type value from the well_type map (gas wells first)
+- leak_proximity: 1 at a confirmed leak (small_leak or viable_leak), falling to
+  0 at leak_radius_m; nearest leak found through a radius-sized grid hash
+- unvisited_density: unvisited wells in the surrounding 3x3 block of
+  density_radius_m cells, capped at density_cap (a trip there covers many)
+- recently_entered: joined the recently_entered_source list (STFD) within
+  recently_entered_days, from the list history (history.entered); 0 for
+  every well until `history.py ingest` has run
+
+Unvisited wells are ranked by score (priority_rank 1 = visit first); visited
+wells keep their score but no rank. Both columns are indexed, and the
+"Top priority" layer in the QGIS project shows the top_n best-ranked wells
+that are still unvisited (of the project's own wells for county variants).
+Weights and parameters can be overridden in data/priority.json. Rescoring
+is a single read + UPDATE and leaves last_edit_utc alone, so it can run
+after every sync.
+
+Usage:
+    python scripts/priority_score.py [--gpkg data/processed/wells.gpkg] [--config data/priority.json] [--show 10]
+"""
+
+import os
+import json
+import time
+import argparse
+import sqlite3
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from gpkg_utils import register_gpkg_functions
+from near_duplicates import M_PER_DEG_LAT, M_PER_DEG_LON
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_GPKG = os.path.join(PROJECT_ROOT, "data", "processed", "wells.gpkg")
+PRIORITY_CONFIG = os.path.join(PROJECT_ROOT, "data", "priority.json")
+LAYER_NAME = "wells"
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "weights": {
+        "orphan_age": 2.0,
+        "stfd": 3.0,
+        "incident": 1.0,
+        "well_type": 1.0,
+        "leak_proximity": 3.0,
+        "unvisited_density": 1.0,
+        "recently_entered": 1.0,
+    },
+    "well_type": {"GAS": 1.0, "OG": 0.75, "OIL": 0.5},
+    "orphan_age_cap_years": 10.0,
+    "leak_radius_m": 2000.0,
+    "density_radius_m": 1000.0,
+    "density_cap": 20,
+    "recently_entered_source": "STFD",
+    "recently_entered_days": 30,
+    "top_n": 50,
+}
+
+SCORE_COLUMNS = {"priority_score": "REAL", "priority_rank": "INTEGER"}
+
+# 3x3 neighbourhood of grid cells
+BLOCK_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def load_config(path: str = PRIORITY_CONFIG) -> Dict[str, Any]:
+    """DEFAULT_CONFIG with any keys (and individual weights) from a JSON file"""
+    config = {**DEFAULT_CONFIG, "weights": dict(DEFAULT_CONFIG["weights"])}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            overrides = json.load(f)
+        config["weights"].update(overrides.pop("weights", {}))
+        config.update(overrides)
+    return config
+
+
+def _metres(x: np.ndarray, y: np.ndarray, lat0: float):
+    return x * M_PER_DEG_LON * np.cos(np.radians(lat0)), y * M_PER_DEG_LAT
+
+
+def _cells(xm: np.ndarray, ym: np.ndarray, size_m: float) -> pd.DataFrame:
+    return pd.DataFrame({"cx": np.floor(xm / size_m).astype("int64"), "cy": np.floor(ym / size_m).astype("int64")})
+
+
+def nearest_within(x: np.ndarray, y: np.ndarray, tx: np.ndarray, ty: np.ndarray, radius_m: float) -> np.ndarray:
+    """Metres from each point to the nearest target within radius_m (inf when none), via a radius-sized grid"""
+    out = np.full(len(x), np.inf)
+    if not len(x) or not len(tx):
+        return out
+    lat0 = float(np.nanmean(y))
+    xm, ym = _metres(x, y, lat0)
+    txm, tym = _metres(tx, ty, lat0)
+    points = _cells(xm, ym, radius_m).assign(i=np.arange(len(x)))
+    targets = _cells(txm, tym, radius_m).assign(j=np.arange(len(tx)))
+    pairs = pd.concat([
+        points.assign(cx=points["cx"] + dx, cy=points["cy"] + dy).merge(targets, on=["cx", "cy"])[["i", "j"]]
+        for dx, dy in BLOCK_OFFSETS
+    ], ignore_index=True)
+    if pairs.empty:
+        return out
+    i, j = pairs["i"].to_numpy(), pairs["j"].to_numpy()
+    dist = np.hypot(xm[i] - txm[j], ym[i] - tym[j])
+    best = pd.Series(dist).groupby(i).min()
+    out[best.index.to_numpy()] = best.to_numpy()
+    out[out > radius_m] = np.inf
+    return out
+
+
+def block_counts(x: np.ndarray, y: np.ndarray, mask: np.ndarray, cell_m: float) -> np.ndarray:
+    """Masked points in each point's 3x3 block of cell_m cells, excluding the point itself"""
+    if not len(x):
+        return np.zeros(0, dtype="int64")
+    xm, ym = _metres(x, y, float(np.nanmean(y)))
+    cells = _cells(xm, ym, cell_m)
+    per_cell = cells[mask].value_counts()
+    total = np.zeros(len(x), dtype="int64")
+    for dx, dy in BLOCK_OFFSETS:
+        keys = pd.MultiIndex.from_arrays([cells["cx"] + dx, cells["cy"] + dy], names=["cx", "cy"])
+        total += per_cell.reindex(keys, fill_value=0).to_numpy()
+    return total - mask.astype("int64")
+
+
+def recently_entered(config: Dict[str, Any], today: Optional[date] = None) -> List[str]:
+    """well_ids that joined the configured list within recently_entered_days (empty without a history)"""
+    from history import HISTORY_DIR, entered  # pyarrow dataset reader, only when the weight is used
+    rows = entered(config["recently_entered_source"], config["recently_entered_days"],
+                   today.isoformat() if today else None, config.get("history_dir") or HISTORY_DIR)
+    return rows["well_id"].tolist()
+
+
+def score_frame(df: pd.DataFrame, config: Optional[Dict[str, Any]] = None,
+                today: Optional[date] = None, entered: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """priority_score (0-100) and priority_rank (unvisited only) for every row of df;
+    entered: well_ids recently added to a list (see recently_entered)"""
+    config = config or DEFAULT_CONFIG
+    weights = config["weights"]
+    today = pd.Timestamp(today or date.today())
+    x, y = df["X"].to_numpy(dtype="float64"), df["Y"].to_numpy(dtype="float64")
+
+    def flag(col: str) -> np.ndarray:
+        return pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy() != 0
+
+    visited = flag("visited")
+    leak = flag("small_leak") | flag("viable_leak")
+
+    orphaned = pd.to_datetime(df["orphan_date"], errors="coerce")
+    years = ((today - orphaned).dt.days / 365.25).to_numpy(dtype="float64", na_value=0.0)
+    components = {
+        "orphan_age": np.clip(years / config["orphan_age_cap_years"], 0.0, 1.0),
+        "stfd": (df["source_list"] == "STFD").to_numpy(dtype=bool, na_value=False).astype("float64"),
+        "incident": df["incident_no"].fillna("").astype(str).str.strip().ne("").to_numpy(dtype="float64"),
+        "well_type": df["well_type"].map(config["well_type"]).fillna(0.0).to_numpy(dtype="float64"),
+        "leak_proximity": np.clip(
+            1.0 - nearest_within(x, y, x[leak], y[leak], config["leak_radius_m"]) / config["leak_radius_m"], 0.0, 1.0),
+        "unvisited_density": np.minimum(
+            block_counts(x, y, ~visited, config["density_radius_m"]) / config["density_cap"], 1.0),
+        "recently_entered": df["well_id"].isin(list(entered or [])).to_numpy(dtype="float64"),
+    }
+    total_weight = sum(weights.get(k, 0.0) for k in components) or 1.0
+    score = sum(weights.get(k, 0.0) * v for k, v in components.items()) * (100.0 / total_weight)
+
+    out = pd.DataFrame({"priority_score": np.round(score, 2)}, index=df.index)
+    # Ties by well_id so ranks are stable between runs
+    order = pd.DataFrame({"s": -score, "w": df["well_id"].to_numpy()}, index=df.index)[~visited]
+    ranked = order.sort_values(["s", "w"], kind="stable").index
+    out["priority_rank"] = pd.Series(np.arange(1, len(ranked) + 1), index=ranked).reindex(df.index).astype("Int64")
+    return out
+
+
+def ensure_score_columns(conn: sqlite3.Connection, layer: str = LAYER_NAME) -> None:
+    cols = {r[1] for r in conn.execute(f'PRAGMA table_info("{layer}")')}
+    for name, sql_type in SCORE_COLUMNS.items():
+        if name not in cols:
+            conn.execute(f'ALTER TABLE "{layer}" ADD COLUMN "{name}" {sql_type}')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{layer}_priority_score ON "{layer}" (priority_score)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{layer}_priority_rank ON "{layer}" (priority_rank)')
+
+
+def rescore(conn: sqlite3.Connection, config: Optional[Dict[str, Any]] = None,
+            layer: str = LAYER_NAME) -> int:
+    """Recompute and store priority_score / priority_rank for every well; returns rows changed.
+    Does not commit, so it can run inside a caller's transaction (e.g. MasterStore.submit)."""
+    register_gpkg_functions(conn)  # GDAL's R-tree update triggers call ST_IsEmpty
+    ensure_score_columns(conn, layer)
+    cols = {r[1] for r in conn.execute(f'PRAGMA table_info("{layer}")')}
+    wanted = ["fid", "well_id", "X", "Y", "orphan_date", "source_list", "incident_no", "well_type",
+              "visited", "small_leak", "viable_leak", "priority_score", "priority_rank"]
+    select = ", ".join(f'"{c}"' if c in cols else f'NULL AS "{c}"' for c in wanted)
+    df = pd.DataFrame.from_records(conn.execute(f'SELECT {select} FROM "{layer}"').fetchall(), columns=wanted)
+    config = config or DEFAULT_CONFIG
+    entered = recently_entered(config) if config["weights"].get("recently_entered", 0.0) else None
+    scores = score_frame(df, config, entered=entered)
+
+    def floats(s: pd.Series) -> np.ndarray:
+        return pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+    def same(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return (a == b) | (np.isnan(a) & np.isnan(b))
+
+    new_score, new_rank = floats(scores["priority_score"]), floats(scores["priority_rank"])
+    # Write only wells whose score or rank moved
+    changed = ~(same(floats(df["priority_score"]), new_score) & same(floats(df["priority_rank"]), new_rank))
+    rows = [(s, None if np.isnan(r) else int(r), int(f))
+            for s, r, f in zip(new_score[changed], new_rank[changed], df["fid"].to_numpy()[changed])]
+    # Only the score columns change; wells_update fires on field-edited columns only
+    cur = conn.executemany(f'UPDATE "{layer}" SET priority_score = ?, priority_rank = ? WHERE fid = ?', rows)
+    return cur.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score and rank wells by survey priority")
+    parser.add_argument("--gpkg", default=DEFAULT_GPKG, help="GeoPackage to rescore (default: data/processed/wells.gpkg)")
+    parser.add_argument("--config", default=PRIORITY_CONFIG, help="Weights/parameters JSON (default: data/priority.json)")
+    parser.add_argument("--show", type=int, default=10, help="Print the top N wells (default: 10)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.gpkg):
+        raise SystemExit(f"ERROR: Missing GeoPackage {args.gpkg}")
+    started = time.perf_counter()
+    with sqlite3.connect(args.gpkg) as conn:
+        changed = rescore(conn, load_config(args.config))
+    print(f"✅ Rescored {args.gpkg}: {changed} wells changed in {time.perf_counter() - started:.2f} s")
+    with sqlite3.connect(args.gpkg) as conn:
+        top = conn.execute(
+            f'SELECT priority_rank, priority_score, well_id, source_list, county_name FROM "{LAYER_NAME}" '
+            "WHERE priority_rank IS NOT NULL ORDER BY priority_rank LIMIT ?", (args.show,)
+        ).fetchall()
+    for rank, score, well_id, source, county in top:
+        print(f"{rank:>4}  {score:6.2f}  {well_id}  {source}  {county or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+What a field-app QGIS project contains, independent of how it is written.
+
+Layers and their subset filters, the categorized renderer, ValueMap widgets,
+aliases, form order, actions, basemaps and project variants (dev/prod, crews,
+counties) are defined here once. build_qgis_project.py applies them through
+PyQGIS; qgs_writer.py emits the same project as XML without QGIS. Standard
+library only.
+"""
+
+import os
+import json
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QGIS_DIR = os.path.join(PROJECT_ROOT, "qgis")
+GPKG_QGIS_PATH = os.path.join(QGIS_DIR, "wells.gpkg")
+DEV_GPKG_QGIS_PATH = os.path.join(QGIS_DIR, "wells_dev.gpkg")
+DATA_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
+GPKG_DATA_PATH = os.path.join(DATA_DIR, "wells.gpkg")
+DEV_GPKG_DATA_PATH = os.path.join(DATA_DIR, "wells_dev.gpkg")
+LAYER_NAME = "wells"
+OUT_QGZ = os.path.join(QGIS_DIR, "wells_project.qgz")
+OUT_QGZ_DEV = os.path.join(QGIS_DIR, "wells_project_dev.qgz")
+PRIORITY_CONFIG = os.path.join(PROJECT_ROOT, "data", "priority.json")
+# Extra project variants (crews, regions) for --batch
+PROJECTS_CONFIG = os.path.join(PROJECT_ROOT, "data", "projects.json")
+
+# Consistent color scheme - same colors for Gas/Oil/Other across both shapes
+COLORS = {
+    "GAS": "#2196F3",    # Blue for Gas
+    "OIL": "#FF9800",    # Orange for Oil
+    "OTHER": "#9C27B0",  # Purple for Other
+}
+# Shape differentiation: triangles (pins) for STFD, circles for orphan
+SOURCE_SHAPES = {"STFD": "triangle", "ORPHAN": "circle"}
+# Single size for all points
+POINT_SIZE = "2.6"
+RENDER_EXPRESSION = "concat(\"well_type\", '_', \"source_list\")"
+
+# Larger red stars for the next wells to visit, drawn above the category symbols
+PRIORITY_SYMBOL = {"name": "star", "color": "#E53935", "outline_color": "#000000",
+                   "outline_width": "0.4", "size": "4.2"}
+
+# Mobile profile lookups (scripts/mobile_profile.py): (table, code field on wells, name field)
+LOOKUP_JOINS = (
+    ("lu_county", "county_code", "county_name"),
+    ("lu_operator", "operator_code", "operator_name"),
+    ("lu_well_type", "well_type_code", "well_type"),
+)
+
+# Form: Yes/No toggles, read-only context below them, everything else hidden
+YES_NO_FIELDS = ["exists", "small_leak", "viable_leak", "reset_survey"]
+YES_NO_MAP = {"No": 0, "Yes": 1}
+CONTEXT_FIELDS = ["county_name", "operator_name", "well_type", "well_name", "coords_latlon", "gmaps_url"]
+FORM_FIELDS = [*YES_NO_FIELDS, *CONTEXT_FIELDS]
+FIELD_ALIASES = {
+    "exists": "Exists on site",
+    "small_leak": "Small leak",
+    "viable_leak": "Viable for plugging",
+    "county_name": "County",
+    "operator_name": "Operator",
+    "well_type": "Well type",
+    "well_name": "Well name",
+    "coords_latlon": "Lat, Lon",
+    "gmaps_url": "Google Maps Link",
+}
+# Flip visited client-side on any survey change so the feature moves layers immediately
+VISITED_DEFAULT = ("case when coalesce(\"exists\", -1) != -1 or coalesce(\"small_leak\",0) != 0 "
+                   "or coalesce(\"viable_leak\",0) != 0 then 1 else coalesce(\"visited\",0) end")
+
+# Open-URL actions; {coords} is a 'lat,lon' text expression
+ACTIONS = [
+    ("Open in Google Maps (directions)", "concat('https://www.google.com/maps/dir/?api=1&destination=', {coords})"),
+    ("Open in Google Maps (view)", "concat('https://maps.google.com/?q=', {coords})"),
+    ("Share via WhatsApp",
+     "concat('https://wa.me/?text=', url_encode(concat('Well ', \"well_id\", ' — https://maps.google.com/?q=', {coords})))"),
+    ("Open in Apple Maps", "concat('http://maps.apple.com/?daddr=', {coords})"),
+    # Optional quick access to user's current location in Maps
+    ("My Location", "'https://www.google.com/maps/search/?api=1&query=My+Location'"),
+]
+LEGACY_ACTIONS = ("Open in Google Maps", "Share via WhatsApp", "Open in Apple Maps", "My Location")
+
+# XYZ basemaps: (name, uri, visible); the satellite layer renders at the bottom
+BASEMAPS = [
+    ("Satellite (Google)", "type=xyz&url=https://mt1.google.com/vt/lyrs%3Ds%26x%3D{x}%26y%3D{y}%26z%3D{z}"
+                           "&zmax=19&zmin=0&http-header:User-Agent=QField", True),
+    ("OpenStreetMap", "type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+                      "&zmax=19&zmin=0&http-header:User-Agent=QField", False),
+]
+
+# Oklahoma bbox (EPSG:4326): xmin, ymin, xmax, ymax
+OK_EXTENT = (-103.002, 33.615, -94.430, 37.002)
+
+
+def top_priority_n() -> int:
+    """Wells shown in the "Top priority" layer: top_n from data/priority.json (default 50)"""
+    if os.path.exists(PRIORITY_CONFIG):
+        with open(PRIORITY_CONFIG) as f:
+            return int(json.load(f).get("top_n", 50))
+    return 50
+
+
+def render_categories() -> List[Dict[str, str]]:
+    """Renderer categories: value, label and marker properties per well type x source"""
+    categories = []
+    for well_type in ("GAS", "OIL", "OTHER"):
+        for source in ("STFD", "ORPHAN"):
+            categories.append({
+                "value": f"{well_type}_{source}",
+                "label": f"{well_type} ({source})",
+                "symbol": {"name": SOURCE_SHAPES[source], "color": COLORS.get(well_type, "#666666"),
+                           "outline_color": "#000000", "outline_width": "0.4", "size": POINT_SIZE},
+            })
+    return categories
+
+
+def top_priority_clause(where: Optional[str] = None, n: Optional[int] = None) -> str:
+    """Subset of the "Top priority" layer: the N best-ranked wells not yet visited. visited is
+    checked live, so a well surveyed on the device drops out before the next rescore. priority_rank
+    is global, so a filtered variant (county, crew) takes the top N of its own wells instead."""
+    n = top_priority_n() if n is None else n
+    if not where:
+        return f'("priority_rank" <= {n}) AND ("visited" = 0)'
+    return (f'"fid" IN (SELECT "fid" FROM "{LAYER_NAME}" WHERE "visited" = 0 AND "priority_rank" IS NOT NULL '
+            f'AND ({where}) ORDER BY "priority_rank" LIMIT {n})')
+
+
+def layer_views(has_priority: bool, where: Optional[str] = None) -> List[Tuple[str, Optional[str], str, bool]]:
+    """(name, subset, kind, visible) of the wells layers, top of the layer tree first;
+    where: the variant's filter (callers still AND it onto every layer)"""
+    views = [("Top priority", top_priority_clause(where), "priority", True)] if has_priority else []
+    return views + [
+        ("Not Visited", '"visited" = 0', "wells", True),
+        ("Surveyed", '"visited" = 1', "wells", False),
+        ("Wells", None, "wells", False),
+    ]
+
+
+def subset(*clauses: Optional[str]) -> Optional[str]:
+    parts = [f"({c})" for c in clauses if c]
+    return " AND ".join(parts) or None
+
+
+def gpkg_columns(gpkg: str, table: str = LAYER_NAME) -> List[str]:
+    with sqlite3.connect(f"file:{gpkg}?mode=ro", uri=True) as conn:
+        return [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def gpkg_tables(gpkg: str) -> List[str]:
+    with sqlite3.connect(f"file:{gpkg}?mode=ro", uri=True) as conn:
+        return [r[0] for r in conn.execute("SELECT table_name FROM gpkg_contents")]
+
+
+# Project variants: {"name", "gpkg", "out", "filter"}
+
+def env_variant(env: str) -> Dict[str, Optional[str]]:
+    """The dev/prod project: the env's device GeoPackage, falling back to data/processed"""
+    gpkg = GPKG_QGIS_PATH if env == "prod" else DEV_GPKG_QGIS_PATH
+    if not os.path.exists(gpkg):
+        gpkg = GPKG_DATA_PATH if env == "prod" else DEV_GPKG_DATA_PATH
+    return {"name": env, "gpkg": gpkg, "out": OUT_QGZ if env == "prod" else OUT_QGZ_DEV, "filter": None}
+
+
+def _sql_list(values: Sequence[str]) -> str:
+    return ", ".join("'" + str(v).replace("'", "''") + "'" for v in values)
+
+
+def county_filter(gpkg: str, counties: Sequence[str]) -> str:
+    """OGR subset for wells in the given counties, on full or mobile-profile GeoPackages"""
+    names = _sql_list([c.upper() for c in counties])
+    if "county_name" in gpkg_columns(gpkg):
+        return f'upper("county_name") IN ({names})'
+    # Mobile profile: names live in lu_county
+    return f'"county_code" IN (SELECT code FROM lu_county WHERE upper(county_name) IN ({names}))'
+
+
+def variant_from_spec(spec: Dict) -> Dict[str, Optional[str]]:
+    """data/projects.json entry: name, env (device GeoPackage), and counties or a raw filter"""
+    base = env_variant(spec.get("env", "prod"))
+    clauses = [spec.get("filter")]
+    if spec.get("counties"):
+        clauses.append(county_filter(base["gpkg"], spec["counties"]))
+    out = spec.get("out") or os.path.join(QGIS_DIR, f"wells_project_{spec['name']}.qgz")
+    return {"name": spec["name"], "gpkg": base["gpkg"], "out": out, "filter": subset(*clauses)}
+
+
+def load_project_specs(path: str = PROJECTS_CONFIG) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {spec["name"]: spec for spec in json.load(f)}
+
+
+def county_variants(env: str) -> List[Dict[str, Optional[str]]]:
+    """One project per county present in the env's GeoPackage"""
+    gpkg = env_variant(env)["gpkg"]
+    table = LAYER_NAME if "county_name" in gpkg_columns(gpkg) else "lu_county"
+    with sqlite3.connect(f"file:{gpkg}?mode=ro", uri=True) as conn:
+        counties = [r[0] for r in conn.execute(
+            f'SELECT DISTINCT county_name FROM "{table}" WHERE county_name IS NOT NULL ORDER BY 1')]
+    return [variant_from_spec({"name": f"{env}-{c.lower().replace(' ', '_')}", "env": env, "counties": [c]})
+            for c in counties]
+
+
+def resolve_variants(names: Sequence[str], per_county: Sequence[str] = ()) -> List[Dict[str, Optional[str]]]:
+    """dev/prod, named data/projects.json entries ("all" = every one of them), per-county sets"""
+    specs = load_project_specs()
+    variants = []
+    for name in names:
+        if name in ("dev", "prod"):
+            variants.append(env_variant(name))
+        elif name == "all":
+            variants += [env_variant("dev"), env_variant("prod")] + [variant_from_spec(s) for s in specs.values()]
+        elif name in specs:
+            variants.append(variant_from_spec(specs[name]))
+        else:
+            raise SystemExit(f"Unknown project variant '{name}' (dev, prod, all or a name in {PROJECTS_CONFIG})")
+    for env in per_county:
+        variants += county_variants(env)
+    return variants
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Headless QGIS project writer: the field-app .qgz without QGIS.
+
+build_qgis_project.py needs the QGIS.app Python, so projects could only be
+built on a Mac with QGIS installed. This writer emits the same project
+(layers and subset filters, categorized renderer, ValueMap / read-only /
+hidden widgets, aliases, visited default, form order, actions, lookup joins,
+basemaps, initial extent) as QGIS 3 project XML from project_spec.py and the
+GeoPackage schema, using only the standard library. It runs on Linux build
+hosts and CI in milliseconds; QGIS and QField read the file like any other
+project and fill in remaining defaults on load.
+
+project_summary() reduces any .qgs/.qgz (this writer's or one saved by
+QGIS) to its structure: layer tree, subsets, renderer, widgets, form and
+actions. --compare lists where the written project differs from another
+one, e.g. a project saved by QGIS from build_qgis_project.py.
+
+Usage:
+    python scripts/qgs_writer.py [--env prod]
+    python scripts/qgs_writer.py --batch dev prod crew-north [--per-county prod]
+    python scripts/qgs_writer.py --env dev --compare qgis/reference_dev.qgz
+"""
+
+import os
+import sys
+import time
+import uuid
+import sqlite3
+import argparse
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, Tuple
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from gpkg_utils import register_gpkg_functions
+from project_spec import (
+    LAYER_NAME, RENDER_EXPRESSION, PRIORITY_SYMBOL, LOOKUP_JOINS, YES_NO_FIELDS, YES_NO_MAP,
+    CONTEXT_FIELDS, FORM_FIELDS, FIELD_ALIASES, VISITED_DEFAULT, ACTIONS, BASEMAPS, OK_EXTENT,
+    gpkg_columns, gpkg_tables, layer_views, render_categories, resolve_variants, subset,
+)
+
+QGIS_VERSION = "3.34.0-Prizren"
+WGS84 = {
+    "wkt": 'GEOGCRS["WGS 84",DATUM["World Geodetic System 1984",ELLIPSOID["WGS 84",6378137,298.257223563,'
+           'LENGTHUNIT["metre",1]]],PRIMEM["Greenwich",0,ANGLEUNIT["degree",0.0174532925199433]],CS[ellipsoidal,2],'
+           'AXIS["geodetic latitude (Lat)",north,ORDER[1],ANGLEUNIT["degree",0.0174532925199433]],'
+           'AXIS["geodetic longitude (Lon)",east,ORDER[2],ANGLEUNIT["degree",0.0174532925199433]],'
+           'USAGE[SCOPE["Horizontal component of 3D system."],AREA["World."],BBOX[-90,-180,90,180]],ID["EPSG",4326]]',
+    "proj4": "+proj=longlat +datum=WGS84 +no_defs",
+    "srsid": "3452", "srid": "4326", "authid": "EPSG:4326", "description": "WGS 84",
+    "projectionacronym": "longlat", "ellipsoidacronym": "EPSG:7030", "geographicflag": "true",
+}
+WEB_MERCATOR = {
+    "proj4": "+proj=merc +a=6378137 +b=6378137 +lat_ts=0 +lon_0=0 +x_0=0 +y_0=0 +k=1 +units=m +nadgrids=@null +wktext +no_defs",
+    "srsid": "3857", "srid": "3857", "authid": "EPSG:3857", "description": "WGS 84 / Pseudo-Mercator",
+    "projectionacronym": "merc", "ellipsoidacronym": "EPSG:7030", "geographicflag": "false",
+}
+# QgsAction::OpenUrl
+ACTION_OPEN_URL = "5"
+ACTION_SCOPES = ("Canvas", "Feature", "Field")
+
+
+def _id(name: str) -> str:
+    return f"{name.replace(' ', '_')}_{uuid.uuid4().hex[:8]}"
+
+
+def _sub(parent: ET.Element, tag: str, text: Optional[str] = None, **attrs: Any) -> ET.Element:
+    el = ET.SubElement(parent, tag, {k: str(v) for k, v in attrs.items()})
+    if text is not None:
+        el.text = str(text)
+    return el
+
+
+def _rgba(hex_color: str) -> str:
+    h = hex_color.lstrip("#")
+    return ",".join(str(int(h[i:i + 2], 16)) for i in (0, 2, 4)) + ",255"
+
+
+def _option(parent: ET.Element, value: Any, name: Optional[str] = None) -> ET.Element:
+    """QGIS <Option> tree for a Python dict / list / scalar"""
+    attrs = {} if name is None else {"name": name}
+    if isinstance(value, dict):
+        el = _sub(parent, "Option", type="Map", **attrs)
+        for k, v in value.items():
+            _option(el, v, k)
+    elif isinstance(value, (list, tuple)):
+        el = _sub(parent, "Option", type="List", **attrs)
+        for v in value:
+            _option(el, v)
+    elif isinstance(value, bool):
+        el = _sub(parent, "Option", type="bool", value=str(value).lower(), **attrs)
+    elif isinstance(value, int):
+        el = _sub(parent, "Option", type="int", value=value, **attrs)
+    else:
+        el = _sub(parent, "Option", type="QString", value=value, **attrs)
+    return el
+
+
+def _srs(parent: ET.Element, crs: Dict[str, str]) -> None:
+    ref = _sub(parent, "spatialrefsys", nativeFormat="Wkt")
+    for key in ("wkt", "proj4", "srsid", "srid", "authid", "description",
+                "projectionacronym", "ellipsoidacronym", "geographicflag"):
+        _sub(ref, key, crs.get(key, ""))
+
+
+def _extent(parent: ET.Element, tag: str, box: Tuple[float, float, float, float]) -> ET.Element:
+    el = _sub(parent, tag)
+    for key, value in zip(("xmin", "ymin", "xmax", "ymax"), box):
+        _sub(el, key, repr(float(value)))
+    return el
+
+
+def _symbol(parent: ET.Element, name: str, props: Dict[str, str]) -> None:
+    symbol = _sub(parent, "symbol", type="marker", name=name, alpha="1", clip_to_extent="1",
+                  force_rhr="0", frame_rate="10", is_animated="0")
+    layer = _sub(symbol, "layer", **{"class": "SimpleMarker", "pass": "0"}, enabled="1", locked="0")
+    _option(layer, {
+        "angle": "0", "cap_style": "square",
+        "color": _rgba(props["color"]), "joinstyle": "bevel", "name": props["name"],
+        "outline_color": _rgba(props["outline_color"]), "outline_style": "solid",
+        "outline_width": props["outline_width"], "outline_width_unit": "MM",
+        "scale_method": "diameter", "size": props["size"], "size_unit": "MM",
+        "vertical_anchor_point": "1", "horizontal_anchor_point": "1",
+    })
+
+
+def _relative(path: str, project_dir: str) -> str:
+    rel = os.path.relpath(os.path.abspath(path), project_dir)
+    return rel if rel.startswith("..") else f"./{rel}"
+
+
+def layer_fields(gpkg: str) -> Tuple[List[str], List[str]]:
+    """(wells fields as QGIS lists them, joined lookup names) for the GeoPackage"""
+    with sqlite3.connect(f"file:{gpkg}?mode=ro", uri=True) as conn:
+        geom = {r[0] for r in conn.execute(
+            "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = ?", (LAYER_NAME,))}
+    fields = [c for c in gpkg_columns(gpkg) if c not in geom]
+    tables = set(gpkg_tables(gpkg))
+    joined = [name for table, code, name in LOOKUP_JOINS if table in tables and code in fields and name not in fields]
+    return fields, joined
+
+
+def wells_extent(gpkg: str, where: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """Bounding box of the (filtered) wells from the GeoPackage geometry headers"""
+    with sqlite3.connect(f"file:{gpkg}?mode=ro", uri=True) as conn:
+        register_gpkg_functions(conn)
+        row = conn.execute(
+            f'SELECT min(ST_MinX(geom)), min(ST_MinY(geom)), max(ST_MaxX(geom)), max(ST_MaxY(geom)) '
+            f'FROM "{LAYER_NAME}"' + (f" WHERE {where}" if where else "")).fetchone()
+    return None if row[0] is None else row
+
+
+class ProjectWriter:
+    """One project: vector views of the wells table, lookup layers, XYZ basemaps"""
+
+    def __init__(self, variant: Dict[str, Optional[str]]):
+        self.variant = variant
+        self.gpkg = variant["gpkg"]
+        if not os.path.exists(self.gpkg):
+            raise RuntimeError(f"Missing GeoPackage: {self.gpkg}")
+        self.out = variant["out"]
+        self.project_dir = os.path.dirname(os.path.abspath(self.out))
+        self.fields, self.joined = layer_fields(self.gpkg)
+        self.source = _relative(self.gpkg, self.project_dir)
+
+    def datasource(self, table: str, where: Optional[str] = None) -> str:
+        return f"{self.source}|layername={table}" + (f"|subset={where}" if where else "")
+
+    # Layers
+
+    def vector_layer(self, parent: ET.Element, layer_id: str, name: str, where: Optional[str],
+                     kind: str, lookup_ids: Dict[str, str]) -> None:
+        ml = _sub(parent, "maplayer", type="vector", geometry="Point", wkbType="Point",
+                  hasScaleBasedVisibilityFlag="0", minScale="100000000", maxScale="0",
+                  readOnly="0", autoRefreshEnabled="0", labelsEnabled="0", simplifyDrawingHints="0",
+                  styleCategories="AllStyleCategories")
+        _extent(ml, "extent", OK_EXTENT)
+        _sub(ml, "id", layer_id)
+        _sub(ml, "datasource", self.datasource(LAYER_NAME, where))
+        _sub(ml, "layername", name)
+        _srs(_sub(ml, "srs"), WGS84)
+        _sub(ml, "provider", "ogr", encoding="UTF-8")
+
+        joins = _sub(ml, "vectorjoins")
+        for table, code, field in LOOKUP_JOINS:
+            if field in self.joined:
+                join = _sub(joins, "join", joinLayerId=lookup_ids[table], targetFieldName=code, joinFieldName="code",
+                            memoryCache="1", editable="0", cascadedDelete="0", upsertOnEdit="0", dynamicForm="0",
+                            hasCustomPrefix="1", customPrefix="")
+                _sub(_sub(join, "joinFieldsSubset"), "field", name=field)
+
+        self.renderer(ml, kind)
+        fields = self.fields + self.joined
+        virtual = [f for f in ("coords_latlon", "gmaps_url") if f not in fields]
+        self.form(ml, fields + virtual, virtual)
+        self.actions(ml, '"coords_latlon"' if "coords_latlon" in self.fields else "concat($y, ',', $x)")
+        table = _sub(ml, "attributetableconfig", actionWidgetStyle="dropDown",
+                     sortExpression='"priority_rank"' if kind == "priority" else "", sortOrder="0")
+        columns = _sub(table, "columns")
+        for field in fields + virtual:
+            _sub(columns, "column", type="field", name=field, hidden="0", width="-1")
+
+    def lookup_layer(self, parent: ET.Element, layer_id: str, table: str) -> None:
+        ml = _sub(parent, "maplayer", type="vector", geometry="No geometry", wkbType="NoGeometry",
+                  readOnly="0", styleCategories="AllStyleCategories")
+        _sub(ml, "id", layer_id)
+        _sub(ml, "datasource", self.datasource(table))
+        _sub(ml, "layername", table)
+        _sub(ml, "provider", "ogr", encoding="UTF-8")
+
+    def raster_layer(self, parent: ET.Element, layer_id: str, name: str, uri: str) -> None:
+        ml = _sub(parent, "maplayer", type="raster", hasScaleBasedVisibilityFlag="0",
+                  minScale="1e+08", maxScale="0", autoRefreshEnabled="0", styleCategories="AllStyleCategories")
+        _extent(ml, "extent", (-20037508.34, -20037508.34, 20037508.34, 20037508.34))
+        _sub(ml, "id", layer_id)
+        _sub(ml, "datasource", uri)
+        _sub(ml, "layername", name)
+        _srs(_sub(ml, "srs"), WEB_MERCATOR)
+        _sub(ml, "provider", "wms")
+        pipe = _sub(ml, "pipe")
+        _sub(pipe, "rasterrenderer", type="singlebandcolordata", opacity="1", alphaBand="-1", band="1")
+
+    # Styling
+
+    def renderer(self, ml: ET.Element, kind: str) -> None:
+        if kind == "priority":
+            r = _sub(ml, "renderer-v2", type="singleSymbol", symbollevels="0", forceraster="0",
+                     enableorderby="0", referencescale="-1")
+            _symbol(_sub(r, "symbols"), "0", PRIORITY_SYMBOL)
+            return
+        r = _sub(ml, "renderer-v2", type="categorizedSymbol", attr=RENDER_EXPRESSION, symbollevels="0",
+                 forceraster="0", enableorderby="0", referencescale="-1")
+        cats, symbols = _sub(r, "categories"), _sub(r, "symbols")
+        for i, cat in enumerate(render_categories()):
+            _sub(cats, "category", value=cat["value"], label=cat["label"], symbol=str(i), render="true",
+                 uuid="{" + str(uuid.uuid4()) + "}")
+            _symbol(symbols, str(i), cat["symbol"])
+
+    def form(self, ml: ET.Element, fields: List[str], virtual: List[str]) -> None:
+        """Widgets, aliases, visited default and the Survey form (same rules as apply_value_maps)"""
+        config = _sub(ml, "fieldConfiguration")
+        for field in fields:
+            widget = _sub(_sub(config, "field", name=field, configurationFlags="None"), "editWidget")
+            if field in YES_NO_FIELDS:
+                widget.set("type", "ValueMap")
+                cfg = {"map": dict(YES_NO_MAP), "AllowNull": False, "UseCompleter": False,
+                       "UseRepresentedValue": False}
+            elif field in CONTEXT_FIELDS:
+                widget.set("type", "TextEdit")
+                cfg = {"IsReadOnly": True}
+            else:
+                widget.set("type", "Hidden")
+                cfg = {}
+            _option(_sub(widget, "config"), cfg)
+
+        aliases = _sub(ml, "aliases")
+        for i, field in enumerate(fields):
+            _sub(aliases, "alias", index=i, field=field, name=FIELD_ALIASES.get(field, ""))
+        defaults = _sub(ml, "defaults")
+        for field in fields:
+            expr, on_update = (VISITED_DEFAULT, "1") if field == "visited" else ("", "0")
+            _sub(defaults, "default", field=field, expression=expr, applyOnUpdate=on_update)
+        if virtual:
+            # GeoPackages without the stored link columns: same virtual fields as add_virtual_fields
+            exprs = {"coords_latlon": "concat($y, ',', $x)",
+                     "gmaps_url": "concat('https://maps.google.com/?q=', $y, ',', $x)"}
+            expr_fields = _sub(ml, "expressionfields")
+            for field in virtual:
+                _sub(expr_fields, "field", name=field, expression=exprs[field], type="10", typeName="string",
+                     length="0", precision="0", comment="", subType="0")
+
+        _sub(ml, "editform", "", tolerant="1")
+        _sub(ml, "editforminit")
+        _sub(ml, "editorlayout", "generatedlayout")
+        form = _sub(ml, "attributeEditorForm")
+        for field in FORM_FIELDS:
+            if field in fields:
+                _sub(form, "attributeEditorField", name=field, index=fields.index(field), showLabel="1")
+
+    def actions(self, ml: ET.Element, coords: str) -> None:
+        actions = _sub(ml, "attributeactions")
+        _sub(actions, "defaultAction", key="Canvas", value="{00000000-0000-0000-0000-000000000000}")
+        for name, template in ACTIONS:
+            setting = _sub(actions, "actionsetting", type=ACTION_OPEN_URL, name=name, shortTitle="", icon="",
+                           action=template.format(coords=coords), capture="0", notificationMessage="",
+                           isEnabledOnlyWhenEditable="0", id="{" + str(uuid.uuid4()) + "}")
+            for scope in ACTION_SCOPES:
+                _sub(setting, "actionScope", id=scope)
+
+    # Project
+
+    def build(self) -> ET.Element:
+        where = self.variant["filter"]
+        views = layer_views("priority_rank" in self.fields, where)
+        view_ids = {name: _id(name) for name, *_ in views}
+        base_ids = {name: _id(name) for name, *_ in BASEMAPS}
+        tables = set(gpkg_tables(self.gpkg)) if self.joined else set()
+        lookup_ids = {table: _id(table) for table, *_ in LOOKUP_JOINS if table in tables}
+
+        root = ET.Element("qgis", projectname="", version=QGIS_VERSION, saveUser="", saveUserFull="",
+                          saveDateTime="")
+        _sub(root, "homePath", path="")
+        _sub(root, "title", self.variant["name"])
+        _sub(root, "transaction", mode="Disabled")
+        _srs(_sub(root, "projectCrs"), WGS84)
+
+        # Layer tree: wells views (top first), then basemaps so they render at the bottom
+        tree = _sub(root, "layer-tree-group")
+        _sub(tree, "customproperties")
+        entries = [(view_ids[name], name, self.datasource(LAYER_NAME, subset(clause, where)), "ogr", visible)
+                   for name, clause, _kind, visible in views]
+        entries += [(base_ids[name], name, uri, "wms", visible) for name, uri, visible in BASEMAPS]
+        for layer_id, name, source, provider, visible in entries:
+            node = _sub(tree, "layer-tree-layer", id=layer_id, name=name, source=source, providerKey=provider,
+                        checked="Qt::Checked" if visible else "Qt::Unchecked", expanded="1",
+                        legend_exp="", patch_size="-1,-1", legend_split_behavior="0")
+            _sub(node, "customproperties")
+        order = _sub(tree, "custom-order", enabled="0")
+        for layer_id, *_ in entries:
+            _sub(order, "item", layer_id)
+
+        box = OK_EXTENT
+        if where:
+            found = wells_extent(self.gpkg, where)
+            if found:
+                pad = 0.05
+                box = (found[0] - pad, found[1] - pad, found[2] + pad, found[3] + pad)
+        canvas = _sub(root, "mapcanvas", name="theMapCanvas", annotationsVisible="1")
+        _sub(canvas, "units", "degrees")
+        _extent(canvas, "extent", box)
+        _sub(canvas, "rotation", "0")
+        _srs(_sub(canvas, "destinationsrs"), WGS84)
+
+        layers = _sub(root, "projectlayers")
+        for name, clause, kind, _visible in views:
+            self.vector_layer(layers, view_ids[name], name, subset(clause, where), kind, lookup_ids)
+        for table, layer_id in lookup_ids.items():
+            self.lookup_layer(layers, layer_id, table)
+        for name, uri, _visible in BASEMAPS:
+            self.raster_layer(layers, base_ids[name], name, uri)
+
+        order = _sub(root, "layerorder")
+        for layer_id, *_ in entries:
+            _sub(order, "layer", id=layer_id)
+
+        props = _sub(root, "properties")
+        _sub(_sub(props, "Paths"), "Absolute", "false", type="bool")
+        view = _sub(root, "ProjectViewSettings", UseProjectScales="0", rotation="0")
+        default = _sub(view, "DefaultViewExtent", **dict(zip(("xmin", "ymin", "xmax", "ymax"), map(repr, box))))
+        _srs(default, WGS84)
+        return root
+
+
+def write_project(variant: Dict[str, Optional[str]]) -> str:
+    """Write one variant's .qgz (or .qgs when the output ends in .qgs); returns its path"""
+    out = variant["out"]
+    root = ProjectWriter(variant).build()
+    ET.indent(root)
+    xml = b"<!DOCTYPE qgis PUBLIC 'http://mrcc.com/qgis.dtd' 'SYSTEM'>\n" + ET.tostring(root, encoding="utf-8")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp = f"{out}.tmp"
+    if out.endswith(".qgs"):
+        with open(tmp, "wb") as f:
+            f.write(xml)
+    else:
+        name = os.path.splitext(os.path.basename(out))[0]
+        with ZipFile(tmp, "w", compression=ZIP_DEFLATED) as z:
+            z.writestr(f"{name}.qgs", xml)
+    os.replace(tmp, out)
+    return out
+
+
+# Comparison
+
+def read_project_xml(path: str) -> ET.Element:
+    if path.endswith(".qgz"):
+        with ZipFile(path) as z:
+            name = next(n for n in z.namelist() if n.endswith(".qgs"))
+            return ET.fromstring(z.read(name))
+    return ET.parse(path).getroot()
+
+
+def _options(el: Optional[ET.Element]) -> Any:
+    """Plain Python value of an <Option> tree (Map/List/scalar; values as strings)"""
+    if el is None:
+        return None
+    kind = el.get("type")
+    if kind == "Map":
+        return {c.get("name"): _options(c) for c in el.findall("Option")}
+    if kind == "List":
+        return [_options(c) for c in el.findall("Option")]
+    return el.get("value")
+
+
+def _value_map(cfg: Any) -> Dict[str, str]:
+    """ValueMap "map" as {label: value}; QGIS saves it as a Map or a List of single-entry Maps"""
+    mapping = (cfg or {}).get("map") or {}
+    if isinstance(mapping, list):
+        mapping = {k: v for item in mapping for k, v in item.items()}
+    return {k: str(v) for k, v in mapping.items()}
+
+
+def _symbol_summary(symbol: ET.Element) -> Dict[str, str]:
+    props = _options(symbol.find("layer/Option")) or {}
+    if not props:  # pre-3.26 style <prop k= v=>
+        props = {p.get("k"): p.get("v") for p in symbol.iter("prop")}
+    color = ",".join(props.get("color", "").split(",")[:3])
+    return {"shape": props.get("name"), "color": color, "size": props.get("size")}
+
+
+def _layer_summary(ml: ET.Element) -> Dict[str, Any]:
+    source = ml.findtext("datasource") or ""
+    parts = source.split("|")
+    out: Dict[str, Any] = {
+        "type": ml.get("type"),
+        "provider": (ml.findtext("provider") or "").strip(),
+        "file": os.path.basename(parts[0]) if ml.get("type") == "vector" else parts[0],
+        "layername": next((p.split("=", 1)[1] for p in parts if p.startswith("layername=")), None),
+        "subset": next((p.split("=", 1)[1] for p in parts if p.startswith("subset=")), None),
+    }
+    if ml.get("type") != "vector" or ml.find("renderer-v2") is None:
+        return out
+    renderer = ml.find("renderer-v2")
+    symbols = {s.get("name"): _symbol_summary(s) for s in renderer.findall("symbols/symbol")}
+    out["renderer"] = {
+        "type": renderer.get("type"),
+        "attr": renderer.get("attr"),
+        "categories": sorted(
+            (c.get("value"), c.get("label"), *symbols[c.get("symbol")].values())
+            for c in renderer.findall("categories/category")),
+        "symbol": symbols.get("0") if renderer.get("type") == "singleSymbol" else None,
+    }
+    widgets = {}
+    for field in ml.findall("fieldConfiguration/field"):
+        widget = field.find("editWidget")
+        cfg = _options(widget.find("config/Option")) or {}
+        kind = widget.get("type")
+        if kind == "ValueMap":
+            widgets[field.get("name")] = (kind, tuple(sorted(_value_map(cfg).items())))
+        elif kind == "TextEdit":
+            widgets[field.get("name")] = (kind, str(cfg.get("IsReadOnly")).lower() == "true")
+        else:
+            widgets[field.get("name")] = (kind, None)
+    out["widgets"] = widgets
+    out["aliases"] = {a.get("field"): a.get("name") for a in ml.findall("aliases/alias") if a.get("name")}
+    out["defaults"] = {d.get("field"): (d.get("expression"), d.get("applyOnUpdate") == "1")
+                       for d in ml.findall("defaults/default") if d.get("expression")}
+    out["actions"] = [(a.get("name"), a.get("type"), a.get("action"))
+                      for a in ml.findall("attributeactions/actionsetting")]
+    out["form"] = [f.get("name") for f in ml.iter("attributeEditorField")]
+    out["joins"] = sorted((j.get("targetFieldName"), j.get("joinFieldName"),
+                           tuple(f.get("name") for f in j.findall("joinFieldsSubset/field")))
+                          for j in ml.findall("vectorjoins/join"))
+    out["sort"] = ml.find("attributetableconfig").get("sortExpression") if ml.find("attributetableconfig") is not None else ""
+    return out
+
+
+def project_summary(path: str) -> Dict[str, Any]:
+    """Builder-independent structure of a .qgs/.qgz: layer tree (names, visibility),
+    per-layer datasource/subset, renderer, widgets, aliases, defaults, actions and form"""
+    root = read_project_xml(path)
+    layers = {ml.findtext("id"): ml for ml in root.iter("maplayer")}
+    tree = []
+    for node in root.find("layer-tree-group").iter("layer-tree-layer"):
+        ml = layers.get(node.get("id"))
+        tree.append({"name": node.get("name"), "visible": node.get("checked") == "Qt::Checked",
+                     **(_layer_summary(ml) if ml is not None else {})})
+    in_tree = {node.get("id") for node in root.iter("layer-tree-layer")}
+    registry = sorted(ml.findtext("layername") for lid, ml in layers.items() if lid not in in_tree)
+    view = root.find("ProjectViewSettings/DefaultViewExtent")
+    extent = None if view is None else tuple(round(float(view.get(k)), 2) for k in ("xmin", "ymin", "xmax", "ymax"))
+    crs = root.findtext("projectCrs/spatialrefsys/authid")
+    return {"crs": crs, "layers": tree, "registry_only": registry, "extent": extent}
+
+
+def compare_projects(a: str, b: str) -> List[str]:
+    """Differences between two projects' summaries (empty when structurally the same)"""
+    sa, sb = project_summary(a), project_summary(b)
+    diffs = []
+    for key in ("crs", "registry_only"):
+        if sa[key] != sb[key]:
+            diffs.append(f"{key}: {sa[key]!r} != {sb[key]!r}")
+    names_a, names_b = [l["name"] for l in sa["layers"]], [l["name"] for l in sb["layers"]]
+    if names_a != names_b:
+        diffs.append(f"layer tree: {names_a} != {names_b}")
+    for la, lb in zip(sa["layers"], sb["layers"]):
+        for key in sorted(set(la) | set(lb)):
+            if la.get(key) != lb.get(key):
+                diffs.append(f"{la['name']}.{key}: {la.get(key)!r} != {lb.get(key)!r}")
+    return diffs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write QField projects without QGIS (same layers, styles and forms)")
+    parser.add_argument("--env", choices=["dev", "prod"], default="prod")
+    parser.add_argument("--batch", nargs="+", metavar="VARIANT",
+                        help="Several projects: dev, prod, all, or names from data/projects.json")
+    parser.add_argument("--per-county", nargs="+", default=[], choices=["dev", "prod"], metavar="ENV",
+                        help="Also write one project per county from this env's GeoPackage")
+    parser.add_argument("--compare", metavar="QGZ", help="Compare the (single) written project with this one")
+    args = parser.parse_args()
+
+    names = args.batch or ([] if args.per_county else [args.env])
+    variants = resolve_variants(names, args.per_county)
+    started = time.perf_counter()
+    written = [write_project(v) for v in variants]
+    for path in written:
+        print(f"Wrote project: {path}")
+    print(f"✅ {len(written)} project(s) in {(time.perf_counter() - started) * 1000:.0f} ms (no QGIS)")
+
+    if args.compare:
+        diffs = compare_projects(written[0], args.compare)
+        for d in diffs:
+            print(f"  ≠ {d}")
+        if diffs:
+            sys.exit(1)
+        print(f"✅ {written[0]} matches {args.compare} structurally")
+
+
+if __name__ == "__main__":
+    main()
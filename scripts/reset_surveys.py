@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Admin batch reset of well surveys.
+
+Resets every well matching a filter back to Not Visited with a single UPDATE.
+The wells_update trigger (see prepare_wells_gpkg.apply_triggers) clears the
+survey fields, visited and visited_at_utc when reset_survey is set, so the
+batch path and the QField toggle share the same reset rules.
+
+Usage:
+    python scripts/reset_surveys.py --county ALFALFA --county GRANT
+    python scripts/reset_surveys.py --visited-from 2025-09-01 --visited-to 2025-09-30
+    python scripts/reset_surveys.py --gpkg qgis/wells_dev.gpkg --county KAY --dry-run
+"""
+
+import os
+import argparse
+import sqlite3
+from typing import List, Optional, Sequence, Tuple
+
+from gpkg_utils import register_gpkg_functions
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_GPKG = os.path.join(PROJECT_ROOT, "data", "processed", "wells.gpkg")
+
+
+def build_filter(counties: Optional[Sequence[str]] = None,
+                 visited_from: Optional[str] = None,
+                 visited_to: Optional[str] = None) -> Tuple[str, List[str]]:
+    """Build the WHERE clause (and parameters) selecting wells to reset"""
+    clauses = ["visited = 1"]
+    params: List[str] = []
+    if counties:
+        clauses.append(f"UPPER(county_name) IN ({', '.join('?' for _ in counties)})")
+        params.extend(c.strip().upper() for c in counties)
+    # visited_at_utc is ISO8601 text, so plain string comparison orders correctly
+    if visited_from:
+        clauses.append("visited_at_utc >= ?")
+        params.append(visited_from)
+    if visited_to:
+        clauses.append("visited_at_utc < date(?, '+1 day')")
+        params.append(visited_to)
+    return " AND ".join(clauses), params
+
+
+def reset_surveys(conn: sqlite3.Connection,
+                  counties: Optional[Sequence[str]] = None,
+                  visited_from: Optional[str] = None,
+                  visited_to: Optional[str] = None,
+                  dry_run: bool = False) -> int:
+    """Reset all matching wells in one UPDATE; returns the number of wells affected"""
+    register_gpkg_functions(conn)  # GDAL's R-tree update triggers call ST_IsEmpty
+    where, params = build_filter(counties, visited_from, visited_to)
+    if dry_run:
+        return conn.execute(f"SELECT COUNT(*) FROM wells WHERE {where}", params).fetchone()[0]
+    with conn:
+        cur = conn.execute(f"UPDATE wells SET reset_survey = 1 WHERE {where}", params)
+    return cur.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reset surveyed wells back to Not Visited")
+    parser.add_argument("--gpkg", default=DEFAULT_GPKG, help="GeoPackage to update (default: data/processed/wells.gpkg)")
+    parser.add_argument("--county", action="append", dest="counties",
+                        help="County name to reset (repeatable)")
+    parser.add_argument("--visited-from", help="Only wells visited on/after this date (YYYY-MM-DD)")
+    parser.add_argument("--visited-to", help="Only wells visited on/before this date (YYYY-MM-DD)")
+    parser.add_argument("--dry-run", action="store_true", help="Report how many wells match without changing anything")
+    args = parser.parse_args()
+
+    if not (args.counties or args.visited_from or args.visited_to):
+        parser.error("Refusing to reset every well: pass --county and/or --visited-from/--visited-to")
+    if not os.path.exists(args.gpkg):
+        raise FileNotFoundError(f"Missing GeoPackage: {args.gpkg}")
+
+    with register_gpkg_functions(sqlite3.connect(args.gpkg)) as conn:
+        n = reset_surveys(conn, args.counties, args.visited_from, args.visited_to, dry_run=args.dry_run)
+
+    if args.dry_run:
+        print(f"{n} wells would be reset in {args.gpkg}")
+    else:
+        print(f"✅ Reset {n} wells in {args.gpkg}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Snapshot store for wells.gpkg builds.
+
+Every build is recorded in data/processed/snapshots keyed by its source
+dataset_date: a periodic full base plus compact deltas (upserted rows and
+removed well_ids) against the previous snapshot. Any snapshot can be
+materialized by replaying deltas from the nearest base; `diff` and
+`rollback` work from that.
+
+Usage:
+    python scripts/snapshots.py list
+    python scripts/snapshots.py diff 2025-09-04 2025-09-11 [--ids]
+    python scripts/snapshots.py rollback 2025-09-04 [--out data/processed/wells.gpkg]
+"""
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.path.join(PROJECT_ROOT, "data", "processed", "snapshots")
+INDEX_NAME = "index.json"
+
+# Write a full base every N snapshots so a rollback never replays a long chain
+FULL_EVERY = 8
+
+# Survey/audit fields are device-side state, not part of a source release;
+# dataset_date is kept per source in the index instead of on every row
+NON_SOURCE_COLS = {
+    "found", "exists", "small_leak", "viable_leak", "visited", "reset_survey",
+    "last_edit_utc", "visited_at_utc", "editor_name", "photo_path", "voice_note",
+    "dataset_date", "geometry",
+}
+
+
+def load_index(snapshot_dir: str = SNAPSHOT_DIR) -> List[Dict[str, Any]]:
+    path = os.path.join(snapshot_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)["snapshots"]
+
+
+def save_index(entries: List[Dict[str, Any]], snapshot_dir: str = SNAPSHOT_DIR) -> None:
+    path = os.path.join(snapshot_dir, INDEX_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"snapshots": entries}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def canonical_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Source attributes as text, one row per well_id, sorted; the form snapshots are stored in"""
+    cols = ["well_id"] + sorted(
+        c for c in df.columns
+        if c != "well_id" and c not in NON_SOURCE_COLS and not c.startswith("_")
+    )
+    canon = df[cols].astype("string")
+    return canon.sort_values("well_id").reset_index(drop=True)
+
+
+def row_hashes(canon: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
+    attrs = canon.reindex(columns=cols)
+    return pd.DataFrame({
+        "well_id": canon["well_id"].to_numpy(),
+        "_h": pd.util.hash_pandas_object(attrs, index=False).to_numpy(),
+    })
+
+
+def diff_frames(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, pd.Series]:
+    """Hash join on well_id: added, removed and changed well_ids between two canonical frames"""
+    cols = sorted((set(old.columns) | set(new.columns)) - {"well_id"})
+    m = row_hashes(old, cols).merge(
+        row_hashes(new, cols), on="well_id", how="outer", suffixes=("_old", "_new"), indicator=True
+    )
+    both = m["_merge"] == "both"
+    return {
+        "added": m.loc[m["_merge"] == "right_only", "well_id"],
+        "removed": m.loc[m["_merge"] == "left_only", "well_id"],
+        "changed": m.loc[both & (m["_h_old"] != m["_h_new"]), "well_id"],
+    }
+
+
+def _write_rows(df: pd.DataFrame, path: str) -> None:
+    tmp = path + ".tmp"
+    df.to_json(tmp, orient="records", lines=True, compression="gzip")
+    os.replace(tmp, path)
+
+
+def _read_rows(path: str) -> pd.DataFrame:
+    # dtype=False keeps every stored value as the text it was written as
+    df = pd.read_json(path, orient="records", lines=True, compression="gzip",
+                      dtype=False, convert_dates=False)
+    return df.astype("string") if len(df) else df
+
+
+def materialize(dataset_date: str, snapshot_dir: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    """Canonical frame for a snapshot: nearest base plus the deltas after it"""
+    entries = load_index(snapshot_dir)
+    dates = [e["dataset_date"] for e in entries]
+    if dataset_date not in dates:
+        raise KeyError(f"No snapshot for {dataset_date} (have: {', '.join(dates) or 'none'})")
+    target = dates.index(dataset_date)
+    start = max(i for i in range(target + 1) if entries[i]["kind"] == "base")
+
+    frame = _read_rows(os.path.join(snapshot_dir, entries[start]["file"]))
+    for e in entries[start + 1:target + 1]:
+        delta = _read_rows(os.path.join(snapshot_dir, e["file"]))
+        if not len(delta):
+            continue
+        frame = frame[~frame["well_id"].isin(delta["well_id"])]
+        upserts = delta[delta["_op"] == "upsert"].drop(columns=["_op"])
+        frame = pd.concat([frame, upserts], ignore_index=True, sort=False)
+    return frame.sort_values("well_id").reset_index(drop=True)
+
+
+def typed_frame(canon: pd.DataFrame, entry: Dict[str, Any]) -> pd.DataFrame:
+    """Restore build dtypes and per-source dataset_date on a materialized snapshot"""
+    df = canon.copy()
+    for c, dtype in entry.get("dtypes", {}).items():
+        if c not in df.columns:
+            continue
+        if dtype.lower().startswith(("int", "uint")):
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
+        elif dtype.lower().startswith("float"):
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+        else:
+            df[c] = df[c].astype(object).where(df[c].notna(), None)
+    df["dataset_date"] = df["source_list"].map(entry.get("source_dates", {}))
+    return df
+
+
+def record_snapshot(df: pd.DataFrame, snapshot_dir: str = SNAPSHOT_DIR) -> Optional[Dict[str, Any]]:
+    """Store a build as a delta against the previous snapshot (or a base), keyed by dataset_date"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    source_dates = df.groupby("source_list")["dataset_date"].max().dropna().to_dict()
+    dataset_date = max(source_dates.values(), default=None)
+    if not dataset_date:
+        print("⚠️  No dataset_date on sources; snapshot not recorded")
+        return None
+
+    entries = load_index(snapshot_dir)
+    if entries and dataset_date < entries[-1]["dataset_date"]:
+        print(f"⚠️  {dataset_date} is older than latest snapshot {entries[-1]['dataset_date']}; not recorded")
+        return None
+
+    canon = canonical_frame(df)
+    if entries and entries[-1]["dataset_date"] == dataset_date:
+        # Rebuild of the same release: replace it unless nothing changed
+        if not any(len(v) for v in diff_frames(materialize(dataset_date, snapshot_dir), canon).values()):
+            print(f"Snapshot {dataset_date} unchanged")
+            return entries[-1]
+        old = entries.pop()
+        os.remove(os.path.join(snapshot_dir, old["file"]))
+
+    since_base = 0
+    for e in reversed(entries):
+        if e["kind"] == "base":
+            break
+        since_base += 1
+
+    entry: Dict[str, Any] = {
+        "dataset_date": dataset_date,
+        "source_dates": source_dates,
+        "dtypes": {c: str(t) for c, t in df.dtypes.items() if c in canon.columns},
+        "rows": len(canon),
+        "created_utc": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    if not entries or since_base + 1 >= FULL_EVERY:
+        entry.update(kind="base", file=f"{dataset_date}.base.jsonl.gz")
+        _write_rows(canon, os.path.join(snapshot_dir, entry["file"]))
+    else:
+        prev = materialize(entries[-1]["dataset_date"], snapshot_dir)
+        d = diff_frames(prev, canon)
+        upserts = canon[canon["well_id"].isin(pd.concat([d["added"], d["changed"]]))].assign(_op="upsert")
+        deletes = pd.DataFrame({"well_id": d["removed"].to_numpy(), "_op": "delete"})
+        entry.update(kind="delta", file=f"{dataset_date}.delta.jsonl.gz",
+                     added=len(d["added"]), removed=len(d["removed"]), changed=len(d["changed"]))
+        _write_rows(pd.concat([upserts, deletes], ignore_index=True, sort=False),
+                    os.path.join(snapshot_dir, entry["file"]))
+
+    entries.append(entry)
+    save_index(entries, snapshot_dir)
+    print(f"Recorded snapshot {dataset_date} ({entry['kind']}, {entry['rows']} wells)")
+    return entry
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="wells.gpkg snapshot store")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="List recorded snapshots")
+    p_diff = sub.add_parser("diff", help="Added/removed/changed wells between two snapshots")
+    p_diff.add_argument("a")
+    p_diff.add_argument("b")
+    p_diff.add_argument("--ids", action="store_true", help="Print the well_ids, not just counts")
+    p_rb = sub.add_parser("rollback", help="Rebuild wells.gpkg from a snapshot")
+    p_rb.add_argument("dataset_date")
+    p_rb.add_argument("--out", help="Output GeoPackage (default: data/processed/wells.gpkg)")
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        for e in load_index():
+            counts = "" if e["kind"] == "base" else f"  +{e['added']} -{e['removed']} ~{e['changed']}"
+            print(f"{e['dataset_date']}  {e['kind']:<5}  {e['rows']:>7} wells{counts}")
+    elif args.cmd == "diff":
+        d = diff_frames(materialize(args.a), materialize(args.b))
+        for k in ("added", "removed", "changed"):
+            print(f"{k}: {len(d[k])}")
+            if args.ids:
+                for well_id in d[k]:
+                    print(f"  {well_id}")
+    elif args.cmd == "rollback":
+        from prepare_wells_gpkg import OUT_GPKG, ensure_columns, write_gpkg
+        from manifest import write_manifest
+        started = time.time()
+        canon = materialize(args.dataset_date)
+        entry = {e["dataset_date"]: e for e in load_index()}[args.dataset_date]
+        df = ensure_columns(typed_frame(canon, entry))
+        out = args.out or OUT_GPKG
+        write_gpkg(df, out)
+        if os.path.abspath(out) == os.path.abspath(OUT_GPKG):
+            # The next `fieldapp.py build` sees the rollback option and rebuilds from data/raw
+            write_manifest("wells", {"snapshot_index": os.path.join(SNAPSHOT_DIR, INDEX_NAME)}, {"gpkg": out},
+                           {"rollback": args.dataset_date}, rows=len(df), started=started,
+                           extra={"dataset_date": entry.get("source_dates")})
+        print(f"✅ Rolled back {out} to snapshot {args.dataset_date} ({len(df)} wells)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Registry of raw well lists and the newest file for each.
+
+Standard library only, so status checks and the CLI can resolve inputs
+without importing pandas/geopandas. prepare_wells_gpkg.py re-exports these
+names.
+"""
+
+import os
+import re
+import glob
+import json
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
+SOURCES_CONFIG = os.path.join(PROJECT_ROOT, "data", "sources.json")
+
+# OCC well list columns -> our schema (shared by the ORPHAN and STFD lists)
+OCC_COLUMNS = {
+    "API": "well_id",
+    "WellType": "well_type",
+    "WellStatus": "well_status",
+    "OrphanDate": "orphan_date",
+    "WellName": "well_name",
+    "WellNumber": "well_number",
+    "OperatorName": "operator_name",
+    "OperatorNumber": "operator_number",
+    "IncidentNo": "incident_no",
+    "X": "X",
+    "Y": "Y",
+    "CountyName": "county_name",
+    "CountyNo": "county_no",
+    "Sec": "sec",
+    "Township": "township",
+    "TownshipDir": "township_dir",
+    "Range": "range",
+    "RangeDir": "range_dir",
+    "PM": "pm",
+    "Quarter": "quarter",
+    "QuarterQuarter": "quarter_quarter",
+    "QuarterQuarterQuarter": "quarter_q_q_q",
+    "QuarterQuarterQuarterQuarter": "quarter_q_q_q_q",
+    "FootageNS": "footage_ns",
+    "NS": "ns",
+    "FootageEW": "footage_ew",
+    "EW": "ew",
+}
+
+# Source registry: name -> glob, column map, read dtypes, dedup priority (lower wins)
+SOURCES: Dict[str, Dict[str, Any]] = {}
+
+
+def register_source(name: str, pattern: Union[str, Sequence[str]], columns: Optional[Dict[str, str]] = None,
+                    dtypes: Optional[Dict[str, Any]] = None, priority: int = 100,
+                    required: bool = False) -> None:
+    """Register a well list; relative patterns (one or several) are resolved against RAW_DIR"""
+    columns = columns or OCC_COLUMNS
+    if dtypes is None:
+        # Always read the well_id source column as text
+        dtypes = {src: str for src, dst in columns.items() if dst == "well_id"}
+    patterns = [pattern] if isinstance(pattern, str) else list(pattern)
+    SOURCES[name] = {
+        "pattern": [p if os.path.isabs(p) else os.path.join(RAW_DIR, p) for p in patterns],
+        "columns": columns,
+        "dtypes": dtypes,
+        "priority": priority,
+        "required": required,
+    }
+
+
+def load_source_config(path: str = SOURCES_CONFIG) -> None:
+    """Register extra sources from a JSON list (name, pattern, columns, dtypes, priority)"""
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        entries = json.load(f)
+    for e in entries:
+        dtypes = {c: str for c in e["dtypes"]} if isinstance(e.get("dtypes"), list) else e.get("dtypes")
+        register_source(e["name"], e["pattern"], e.get("columns"), dtypes,
+                        e.get("priority", 100), e.get("required", False))
+
+
+# Keep STFD when a duplicate well_id exists. The OCC xlsx originals are read
+# directly; hand-exported CSVs are still accepted.
+register_source("STFD", ["*stfd*.xlsx", "*stfd*.csv"], priority=0, required=True)
+register_source("ORPHAN", ["*orphan*.xlsx", "*orphan*.csv"], priority=1, required=True)
+
+DATE_RE = re.compile(r"(20\d{2}-\d{2}-\d{2})")
+
+
+def parse_date_from_filename(path: str) -> Optional[str]:
+    m = DATE_RE.search(os.path.basename(path))
+    if m:
+        return m.group(1)
+    return None
+
+
+def latest_by_date(pattern: Union[str, Sequence[str]]) -> Optional[str]:
+    patterns = [pattern] if isinstance(pattern, str) else pattern
+    candidates = [p for pat in patterns for p in glob.glob(pat)]
+    if not candidates:
+        return None
+    def sort_key(p: str) -> Tuple[int, str, int, str]:
+        d = parse_date_from_filename(p)
+        # Same date: prefer the lossless xlsx original over a CSV export
+        return (0 if d else 1, d or "", 1 if p.lower().endswith(".xlsx") else 0, p)
+    candidates.sort(key=sort_key, reverse=True)
+    return candidates[0]
+
+
+def find_source_files() -> Dict[str, str]:
+    """Latest file per registered source; required sources must be present"""
+    paths = {}
+    for name, src in SOURCES.items():
+        p = latest_by_date(src["pattern"])
+        if p:
+            paths[name] = p
+        elif src["required"]:
+            raise FileNotFoundError(f"No CSV/xlsx found for {name} using pattern: {src['pattern']}")
+    return paths
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Read-only HTTP service for office dashboards: vector tiles and GeoJSON.
+
+Viewers (QGIS "Vector Tiles" / XYZ connections, MapLibre, a browser) read
+progress from this service instead of opening the master GeoPackage, so the
+file is never locked by a desktop session. Requests are handled on one
+asyncio loop; SQLite work runs in a thread pool over pooled read-only
+connections (master_store.ReaderPool), so slow queries never stall other
+viewers and the master's writer is never blocked (WAL).
+
+    GET /tiles/{z}/{x}/{y}.pbf    Mapbox Vector Tile, layer "wells"
+    GET /wells.geojson            wells as GeoJSON
+    GET /surveys.geojson          well_surveys rows at their GPS position (else their well)
+    GET /progress                 visited / leak counts per county (JSON)
+    GET /status                   data stamp and tile cache counters
+
+Tiles and GeoJSON accept the export filters as query parameters:
+county=OSAGE,CREEK  source=STFD  visited=0|1  leaks=1  viable=1, plus
+bbox=xmin,ymin,xmax,ymax and limit=N for GeoJSON, since=<ISO date> and
+well_id=<API> for surveys. Survey bbox / since filters run on the survey
+R-tree and the survey_epoch index.
+
+Encoded tiles are kept in an LRU cache. At most once per STAMP_TTL seconds
+the file and WAL are stat'ed; after a commit, tiles holding wells whose
+last_edit_utc moved past the previous maximum are evicted, and anything
+else (a source refresh, a rebuilt file) clears the cache.
+
+Usage:
+    python scripts/tile_server.py [--gpkg data/master/wells.gpkg] [--port 8765]
+"""
+
+import os
+import json
+import math
+import struct
+import asyncio
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from export_wells import build_where
+from gpkg_utils import gpkg_bounds
+from master_store import DEFAULT_MASTER, DEFAULT_SRC, ReaderPool
+
+LAYER_NAME = "wells"
+RTREE = f"rtree_{LAYER_NAME}_geom"
+SURVEY_TABLE = "well_surveys"
+SURVEY_RTREE = f"rtree_{SURVEY_TABLE}_geom"
+TILE_EXTENT = 4096
+# Points this far outside a tile (in tile units) are included so symbols are not clipped at tile edges
+TILE_BUFFER = 64
+CACHE_TILES = 4096
+STAMP_TTL = 1.0
+GEOJSON_LIMIT = 10000
+TILE_FIELDS = ["well_id", "well_type", "source_list", "county_name", "visited", "small_leak",
+               "viable_leak", "priority_rank"]
+SURVEY_FIELDS = ["survey_id", "well_id", "found", "well_exists", "small_leak", "viable_leak", "notes",
+                 "surveyor_name", "survey_date"]
+MVT_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+# Mapbox Vector Tile encoding (protobuf, points only)
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 63)
+
+
+def _uint(field: int, n: int) -> bytes:
+    return _varint(field << 3) + _varint(n)
+
+
+def _len(field: int, data: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(data)) + data
+
+
+def _packed(field: int, values: Iterable[int]) -> bytes:
+    return _len(field, b"".join(_varint(v) for v in values))
+
+
+def _value(v: Any) -> bytes:
+    if isinstance(v, str):
+        return _len(1, v.encode("utf-8"))
+    if isinstance(v, float):
+        return _varint(3 << 3 | 1) + struct.pack("<d", v)
+    return _uint(6, _zigzag(int(v)))
+
+
+def encode_layer(name: str, features: Sequence[Tuple[int, int, int, Dict[str, Any]]],
+                 extent: int = TILE_EXTENT) -> bytes:
+    """One MVT layer from (id, x, y, properties) in tile coordinates; None properties are omitted"""
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[type, Any], int] = {}
+    body = [_uint(15, 2), _len(1, name.encode("utf-8"))]
+    for fid, x, y, props in features:
+        tags = []
+        for k, v in props.items():
+            if v is None:
+                continue
+            tags.append(keys.setdefault(k, len(keys)))
+            tags.append(values.setdefault((type(v), v), len(values)))
+        # MoveTo(1) with one point: command integer (count << 3) | id
+        geometry = (1 << 3 | 1, _zigzag(x), _zigzag(y))
+        body.append(_len(2, _uint(1, fid) + _packed(2, tags) + _uint(3, 1) + _packed(4, geometry)))
+    body += [_len(3, k.encode("utf-8")) for k in keys]
+    body += [_len(4, _value(v)) for _, v in values]
+    body.append(_uint(5, extent))
+    return b"".join(body)
+
+
+def encode_tile(layers: Dict[str, Sequence[Tuple[int, int, int, Dict[str, Any]]]]) -> bytes:
+    return b"".join(_len(3, encode_layer(name, feats)) for name, feats in layers.items() if feats)
+
+
+# Web Mercator tile math
+
+def tile_position(lon: float, lat: float, z: int) -> Tuple[float, float]:
+    """Fractional tile x / y of a lon/lat at zoom z"""
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+    return (lon + 180) / 360 * n, y
+
+
+def tile_bounds(z: int, x: int, y: int, buffer: float = 0.0) -> Tuple[float, float, float, float]:
+    """(xmin, ymin, xmax, ymax) in lon/lat of a tile, grown by buffer tile widths on every side"""
+    n = 2 ** z
+
+    def lon(tx: float) -> float:
+        return tx / n * 360 - 180
+
+    def lat(ty: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lon(x - buffer), lat(y + 1 + buffer), lon(x + 1 + buffer), lat(y - buffer)
+
+
+class TileCache:
+    """LRU of encoded tiles keyed by (z, x, y, filters)"""
+
+    def __init__(self, size: int = CACHE_TILES):
+        self.size = size
+        self._tiles: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+    def put(self, key: Tuple, tile: bytes) -> None:
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.size:
+                self._tiles.popitem(last=False)
+
+    def evict_points(self, points: Sequence[Tuple[float, float]]) -> int:
+        """Drop every cached tile (any filter) whose buffered area contains one of the lon/lat points"""
+        buffer = TILE_BUFFER / TILE_EXTENT
+        with self._lock:
+            hit = set()
+            for z in {key[0] for key in self._tiles}:
+                for lon, lat in points:
+                    tx, ty = tile_position(lon, lat, z)
+                    for dx in (-buffer, 0, buffer):
+                        for dy in (-buffer, 0, buffer):
+                            hit.add((z, math.floor(tx + dx), math.floor(ty + dy)))
+            stale = [key for key in self._tiles if key[:3] in hit]
+            for key in stale:
+                del self._tiles[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tiles.clear()
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+
+def _file_signature(path: str) -> Tuple:
+    """Changes whenever a commit lands (in the WAL or, after a checkpoint / rebuild, the main file)"""
+    sig = []
+    for p in (path, path + "-wal"):
+        try:
+            st = os.stat(p)
+            sig.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def _filters(params: Dict[str, List[str]]) -> Dict[str, Any]:
+    """export_wells.build_where arguments from query parameters"""
+    def values(name: str) -> List[str]:
+        return [v for raw in params.get(name, []) for v in raw.split(",") if v]
+
+    visited = params.get("visited", [None])[0]
+    if visited not in (None, "0", "1"):
+        raise ValueError("visited must be 0 or 1")
+    return {"counties": values("county"), "sources": values("source"),
+            "leaks": params.get("leaks", ["0"])[0] == "1", "viable": params.get("viable", ["0"])[0] == "1",
+            "visited": None if visited is None else int(visited)}
+
+
+def _bbox(params: Dict[str, List[str]]) -> Optional[Tuple[float, float, float, float]]:
+    if "bbox" not in params:
+        return None
+    parts = [float(v) for v in params["bbox"][0].split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be xmin,ymin,xmax,ymax")
+    return tuple(parts)
+
+
+def _epoch(since: str) -> int:
+    """Unix seconds of an ISO date / timestamp (UTC unless it carries an offset)"""
+    t = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    return int((t if t.tzinfo else t.replace(tzinfo=timezone.utc)).timestamp())
+
+
+def _feature(x: float, y: float, props: Dict[str, Any]) -> Dict[str, Any]:
+    geometry = None if x is None or y is None else {"type": "Point", "coordinates": [x, y]}
+    return {"type": "Feature", "geometry": geometry, "properties": props}
+
+
+class WellService:
+    """Queries and tile cache over one GeoPackage; every method is safe to call from worker threads"""
+
+    def __init__(self, gpkg: str, readers: int = 4, cache_tiles: int = CACHE_TILES):
+        self.path = gpkg
+        self.pool = ReaderPool(gpkg, readers)
+        self.cache = TileCache(cache_tiles)
+        with self.pool.reader() as conn:
+            self.columns = [r[1] for r in conn.execute(f'PRAGMA table_info("{LAYER_NAME}")')]
+            tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.has_rtree = RTREE in tables
+        self.has_surveys = SURVEY_TABLE in tables
+        with self.pool.reader() as conn:
+            survey_cols = {r[1] for r in conn.execute(f"PRAGMA table_info({SURVEY_TABLE})")}
+        # Files from before the survey point layer: text dates, WKT positions
+        self.survey_epoch = "survey_epoch" in survey_cols
+        self.survey_rtree = SURVEY_RTREE in tables
+        self.tile_fields = [c for c in TILE_FIELDS if c in self.columns]
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._signature: Optional[Tuple] = None
+        self._last_edit: Optional[str] = None
+        self._count = -1
+        self.generation = 0
+        self.refresh(force=True)
+
+    def close(self) -> None:
+        self.pool.close()
+
+    # Freshness
+
+    def refresh(self, force: bool = False) -> str:
+        """Bring the tile cache in line with the file: 'unchanged', 'evicted' or 'cleared'"""
+        with self._lock:
+            if not force and time.monotonic() - self._checked < STAMP_TTL:
+                return "unchanged"
+            self._checked = time.monotonic()
+            sig = _file_signature(self.path)
+            if sig == self._signature:
+                return "unchanged"
+            with self.pool.reader() as conn:
+                last, count = conn.execute(
+                    f'SELECT max(last_edit_utc), count(*) FROM "{LAYER_NAME}"').fetchone()
+                edits = None
+                same_file = self._signature is not None and sig[0][0] == self._signature[0][0]
+                if same_file and count == self._count and self._last_edit and last and last > self._last_edit:
+                    edits = conn.execute(f'SELECT X, Y FROM "{LAYER_NAME}" WHERE last_edit_utc > ?',
+                                         (self._last_edit,)).fetchall()
+            self._signature, self._last_edit, self._count = sig, last, count
+            self.generation += 1
+            if edits is not None:
+                self.cache.evict_points([(x, y) for x, y in edits if x is not None and y is not None])
+                return "evicted"
+            self.cache.clear()
+            return "cleared"
+
+    # Queries
+
+    def _where(self, filters: Dict[str, Any], bbox: Optional[Tuple[float, float, float, float]]
+               ) -> Tuple[str, str, List[Any]]:
+        """FROM / WHERE clauses and parameters for the attribute filters and a lon/lat bbox"""
+        where = build_where(**filters)
+        source, clauses, params = f'"{LAYER_NAME}"', [where] if where else [], []
+        if bbox:
+            xmin, ymin, xmax, ymax = bbox
+            if self.has_rtree:
+                source += f' JOIN "{RTREE}" r ON r.id = "{LAYER_NAME}".fid'
+                clauses.append("r.maxx >= ? AND r.minx <= ? AND r.maxy >= ? AND r.miny <= ?")
+            else:
+                clauses.append("X >= ? AND X <= ? AND Y >= ? AND Y <= ?")
+            params += [xmin, xmax, ymin, ymax]
+        return source, " AND ".join(f"({c})" for c in clauses) or "1", params
+
+    def tile(self, z: int, x: int, y: int, filters: Optional[Dict[str, Any]] = None) -> bytes:
+        filters = filters or {}
+        if not (0 <= z <= 24 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"No tile {z}/{x}/{y}")
+        self.refresh()
+        key = (z, x, y, json.dumps(filters, sort_keys=True))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        generation = self.generation
+        source, where, params = self._where(filters, tile_bounds(z, x, y, TILE_BUFFER / TILE_EXTENT))
+        fields = ", ".join(f'"{LAYER_NAME}"."{c}"' for c in self.tile_fields)
+        with self.pool.reader() as conn:
+            rows = conn.execute(f'SELECT "{LAYER_NAME}".fid, X, Y, {fields} FROM {source} WHERE {where}',
+                                params).fetchall()
+        features = []
+        for fid, lon, lat, *values in rows:
+            if lon is None or lat is None:
+                continue
+            tx, ty = tile_position(lon, lat, z)
+            features.append((fid, round((tx - x) * TILE_EXTENT), round((ty - y) * TILE_EXTENT),
+                             dict(zip(self.tile_fields, values))))
+        tile = encode_tile({LAYER_NAME: features})
+        # A commit detected while this tile was being built may have made it stale
+        if self.generation == generation:
+            self.cache.put(key, tile)
+        return tile
+
+    def wells(self, filters: Dict[str, Any], bbox: Optional[Tuple[float, float, float, float]] = None,
+              limit: int = GEOJSON_LIMIT) -> Dict[str, Any]:
+        source, where, params = self._where(filters, bbox)
+        cols = [c for c in self.columns if c not in ("fid", "geom")]
+        fields = ", ".join(f'"{LAYER_NAME}"."{c}"' for c in cols)
+        with self.pool.reader() as conn:
+            rows = conn.execute(f"SELECT {fields} FROM {source} WHERE {where} LIMIT ?", [*params, limit]).fetchall()
+        features = []
+        for row in rows:
+            props = dict(zip(cols, row))
+            features.append(_feature(props.get("X"), props.get("Y"), props))
+        return {"type": "FeatureCollection", "features": features}
+
+    def surveys(self, filters: Dict[str, Any], since: Optional[str] = None, well_id: Optional[str] = None,
+                limit: int = GEOJSON_LIMIT, bbox: Optional[Tuple[float, float, float, float]] = None
+                ) -> Dict[str, Any]:
+        """Survey records, newest first, at their GPS position (else their well); wells filters apply
+        to the surveyed well, bbox to the survey position"""
+        if not self.has_surveys:
+            return {"type": "FeatureCollection", "features": []}
+        surveys, clauses, extra = f"{SURVEY_TABLE} s", [], []
+        if bbox and self.survey_rtree:
+            surveys += f' JOIN "{SURVEY_RTREE}" rs ON rs.id = s.survey_id'
+            clauses.append("rs.maxx >= ? AND rs.minx <= ? AND rs.maxy >= ? AND rs.miny <= ?")
+            extra += [bbox[0], bbox[2], bbox[1], bbox[3]]
+            bbox = None
+        source, where, params = self._where(filters, bbox)
+        date = "s.survey_epoch" if self.survey_epoch else "s.survey_date"
+        if since:
+            clauses.append(f"{date} >= ?")
+            extra.append(_epoch(since) if self.survey_epoch else since)
+        if well_id:
+            clauses.append("s.well_id = ?")
+            extra.append(well_id)
+        fields = ", ".join(f"s.{c}" for c in SURVEY_FIELDS)
+        geom = "s.geom" if self.survey_rtree else "NULL"
+        sql = (f'SELECT {fields}, {geom}, "{LAYER_NAME}".X, "{LAYER_NAME}".Y FROM {surveys} '
+               f'JOIN {source} ON "{LAYER_NAME}".well_id = s.well_id WHERE {" AND ".join([where, *clauses])} '
+               f"ORDER BY {date} DESC LIMIT ?")
+        with self.pool.reader() as conn:
+            rows = conn.execute(sql, [*params, *extra, limit]).fetchall()
+        features = []
+        for r in rows:
+            b = gpkg_bounds(r[-3])  # a point's min == max
+            x, y = (b[0], b[2]) if b else (r[-2], r[-1])
+            features.append(_feature(x, y, dict(zip(SURVEY_FIELDS, r))))
+        return {"type": "FeatureCollection", "features": features}
+
+    def progress(self) -> Dict[str, Any]:
+        """Wells, visited and leak counts per county"""
+        leaks = "small_leak = 1 OR viable_leak = 1" if "viable_leak" in self.columns else "0"
+        with self.pool.reader() as conn:
+            rows = conn.execute(
+                f"SELECT county_name, count(*), sum(visited = 1), sum({leaks}) "
+                f'FROM "{LAYER_NAME}" GROUP BY county_name ORDER BY county_name').fetchall()
+        counties = [{"county": c, "wells": n, "visited": v or 0, "leaks": l or 0} for c, n, v, l in rows]
+        return {"last_edit_utc": self._last_edit, "counties": counties,
+                "wells": sum(c["wells"] for c in counties), "visited": sum(c["visited"] for c in counties)}
+
+    def status(self) -> Dict[str, Any]:
+        return {"gpkg": self.path, "last_edit_utc": self._last_edit, "wells": self._count,
+                "cached_tiles": len(self.cache), "hits": self.cache.hits, "misses": self.cache.misses}
+
+
+# HTTP
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+class TileServer:
+    """Minimal HTTP/1.1 (keep-alive, GET / HEAD) on asyncio; queries run in the thread pool"""
+
+    def __init__(self, service: WellService, workers: int = 4):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tiles")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._client, host, port)
+
+    def _route(self, path: str, params: Dict[str, List[str]]) -> Tuple[int, str, bytes]:
+        svc = self.service
+        parts = path.strip("/").split("/")
+        if len(parts) == 4 and parts[0] == "tiles" and parts[3].endswith((".pbf", ".mvt")):
+            z, x, y = int(parts[1]), int(parts[2]), int(parts[3].rsplit(".", 1)[0])
+            return 200, MVT_TYPE, svc.tile(z, x, y, _filters(params))
+        limit = int(params.get("limit", [GEOJSON_LIMIT])[0])
+        if path == "/wells.geojson":
+            body = svc.wells(_filters(params), _bbox(params), limit)
+        elif path == "/surveys.geojson":
+            body = svc.surveys(_filters(params), params.get("since", [None])[0],
+                               params.get("well_id", [None])[0], limit, _bbox(params))
+        elif path == "/progress":
+            svc.refresh()
+            body = svc.progress()
+        elif path == "/status":
+            body = svc.status()
+        else:
+            return 404, "text/plain", b"Not found\n"
+        content = "application/geo+json" if path.endswith(".geojson") else "application/json"
+        return 200, content, json.dumps(body, default=str).encode("utf-8")
+
+    async def _respond(self, method: str, target: str) -> Tuple[int, str, bytes]:
+        if method not in ("GET", "HEAD"):
+            return 405, "text/plain", b"Read-only service\n"
+        url = urlsplit(target)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, self._route, url.path, parse_qs(url.query))
+        except ValueError as e:
+            return 400, "text/plain", f"{e}\n".encode("utf-8")
+        except Exception as e:  # keep serving other viewers
+            return 500, "text/plain", f"{type(e).__name__}: {e}\n".encode("utf-8")
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+                status, content_type, body = await self._respond(method, target)
+                keep_alive = headers.get("connection", "keep-alive" if version == "HTTP/1.1" else "close") != "close"
+                writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                              f"Content-Type: {content_type}\r\n"
+                              f"Content-Length: {len(body)}\r\n"
+                              "Access-Control-Allow-Origin: *\r\n"
+                              "Cache-Control: no-cache\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+async def serve(gpkg: str, host: str, port: int, readers: int, cache_tiles: int) -> None:
+    service = WellService(gpkg, readers, cache_tiles)
+    server = TileServer(service, readers)
+    srv = await server.start(host, port)
+    print(f"✅ Serving {gpkg} on http://{host}:{port} (tiles: /tiles/{{z}}/{{x}}/{{y}}.pbf)")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        server.close()
+        service.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Read-only vector tile / GeoJSON service over the wells GeoPackage")
+    parser.add_argument("--gpkg", help="GeoPackage (default: the master, else data/processed/wells.gpkg)")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (0.0.0.0 to serve the office network)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--readers", type=int, default=4, help="Pooled read-only connections / worker threads")
+    parser.add_argument("--cache", type=int, default=CACHE_TILES, help="Tiles kept in the LRU cache")
+    args = parser.parse_args(argv)
+
+    gpkg = args.gpkg or (DEFAULT_MASTER if os.path.exists(DEFAULT_MASTER) else DEFAULT_SRC)
+    if not os.path.exists(gpkg):
+        raise SystemExit(f"ERROR: Missing GeoPackage {gpkg}")
+    try:
+        asyncio.run(serve(gpkg, args.host, args.port, args.readers, args.cache))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
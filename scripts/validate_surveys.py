@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Survey location checks: was the surveyor actually at the well?
+
+Every well_surveys row carries the device position as a GPKG point (geom);
+rows from projects older than the point layer only have survey_location
+WKT. validate() decodes all positions at once (one numpy pass over the
+point blobs, a vectorized regex for the WKT), computes the haversine
+distance to the surveyed well's X/Y and classifies each survey:
+
+- arrived: within arrived_m (default ARRIVED_M) of the well
+- near: between arrived_m and far_m
+- far: more than far_m (default FAR_M) away; flagged for review
+- no_location / no_well: no parseable position, or well_id not in wells
+
+Results are kept in the survey_checks table (survey_id, well_id,
+distance_m, status, checked_utc = when the result last changed), indexed
+on (well_id, distance_m) so the closest survey of a well is one index
+lookup; only rows whose result changed are rewritten. Wells with an "arrived" survey are
+confirmed: found = 1 where it was still unknown, visited = 1. Like
+rescoring, the confirmation leaves last_edit_utc alone. A full
+re-validation is one read and a few batched writes, so it can run after
+every sync.
+
+Usage:
+    python scripts/validate_surveys.py [--gpkg data/processed/wells.gpkg] [--arrived-m 50] [--far-m 250]
+    python scripts/validate_surveys.py --show far
+"""
+
+import os
+import time
+import argparse
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from gpkg_utils import gpkg_bounds, register_gpkg_functions
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_GPKG = os.path.join(PROJECT_ROOT, "data", "processed", "wells.gpkg")
+LAYER_NAME = "wells"
+SURVEY_TABLE = "well_surveys"
+CHECK_TABLE = "survey_checks"
+
+ARRIVED_M = 50.0
+FAR_M = 250.0
+# Mean Earth radius (IUGG)
+EARTH_RADIUS_M = 6371008.8
+STATUSES = ("arrived", "near", "far", "no_location", "no_well")
+_NUM = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+# GPKG point blob as written by GDAL / QGIS / gpkg_point: 8-byte header without envelope, then WKB
+POINT_BLOB = np.dtype([("header", "S8"), ("order", "u1"), ("type", "<u4"), ("x", "<f8"), ("y", "<f8")])
+POINT_RE = rf"(?i)^\s*POINT\s*(?:Z|M|ZM)?\s*\(\s*(?P<x>{_NUM})\s+(?P<y>{_NUM})"
+
+
+def parse_points(wkt: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """lon / lat arrays from WKT POINT text (NaN where missing, unparseable or not lon/lat);
+    the regex runs in Arrow's RE2 kernel, not per row in Python"""
+    arr = pa.array(wkt.to_numpy(dtype=object), pa.string(), from_pandas=True)
+    match = pc.extract_regex(arr, POINT_RE)
+
+    def coord(name: str) -> np.ndarray:
+        text = match.field(name)
+        # Non-matching rows come back as empty strings
+        text = pc.if_else(pc.equal(text, ""), pa.scalar(None, pa.string()), text)
+        return pc.cast(text, pa.float64()).to_numpy(zero_copy_only=False)
+
+    x, y = coord("x"), coord("y")
+    lonlat = (np.abs(x) <= 180) & (np.abs(y) <= 90)
+    return np.where(lonlat, x, np.nan), np.where(lonlat, y, np.nan)
+
+
+def point_coords(blobs: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """lon / lat arrays from GPKG point blobs (NaN where NULL, empty or not lon/lat); the usual
+    little-endian blobs without envelope are decoded in one numpy pass, others via gpkg_bounds"""
+    vals = blobs.to_numpy(dtype=object)
+    x, y = np.full(len(vals), np.nan), np.full(len(vals), np.nan)
+    plain = np.fromiter((isinstance(b, bytes) and len(b) == POINT_BLOB.itemsize and b[3] == 1 and b[8] == 1
+                         for b in vals), dtype=bool, count=len(vals))
+    if plain.any():
+        rec = np.frombuffer(b"".join(vals[plain]), dtype=POINT_BLOB)
+        is_point = rec["type"] == 1
+        x[plain] = np.where(is_point, rec["x"], np.nan)
+        y[plain] = np.where(is_point, rec["y"], np.nan)
+    for i in np.flatnonzero(~plain):
+        b = gpkg_bounds(vals[i]) if isinstance(vals[i], bytes) else None
+        if b and b[0] == b[1] and b[2] == b[3]:
+            x[i], y[i] = b[0], b[2]
+    lonlat = (np.abs(x) <= 180) & (np.abs(y) <= 90)
+    return np.where(lonlat, x, np.nan), np.where(lonlat, y, np.nan)
+
+
+def survey_points(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Survey lon / lat: the geom point, else the legacy survey_location WKT"""
+    if "geom" not in df:
+        return parse_points(df["survey_location"])
+    x, y = point_coords(df["geom"])
+    legacy = np.isnan(x) & df["survey_location"].notna().to_numpy()
+    if legacy.any():
+        x[legacy], y[legacy] = parse_points(df["survey_location"][legacy])
+    return x, y
+
+
+def haversine_m(lon1: np.ndarray, lat1: np.ndarray, lon2: np.ndarray, lat2: np.ndarray) -> np.ndarray:
+    """Great-circle distance in metres, elementwise"""
+    lon1, lat1, lon2, lat2 = (np.radians(a) for a in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def check_frame(df: pd.DataFrame, arrived_m: float = ARRIVED_M, far_m: float = FAR_M) -> pd.DataFrame:
+    """survey_id, well_id, distance_m, status for surveys joined to their well's X / Y"""
+    sx, sy = survey_points(df)
+    wx = pd.to_numeric(df["X"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    wy = pd.to_numeric(df["Y"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    dist = haversine_m(sx, sy, wx, wy)
+    no_well = df["has_well"].to_numpy() == 0
+    status = np.select(
+        [no_well, np.isnan(sx), np.isnan(dist), dist <= arrived_m, dist <= far_m],
+        ["no_well", "no_location", "no_well", "arrived", "near"], default="far")
+    return pd.DataFrame({"survey_id": df["survey_id"].to_numpy(), "well_id": df["well_id"].to_numpy(),
+                         "distance_m": np.round(dist, 1), "status": status})
+
+
+def well_points(conn: sqlite3.Connection) -> pd.DataFrame:
+    """well_id, X, Y of every well; from the geometry on mobile-profile files without X / Y"""
+    cols = {r[1] for r in conn.execute(f'PRAGMA table_info("{LAYER_NAME}")')}
+    if {"X", "Y"} <= cols:
+        rows = conn.execute(f'SELECT well_id, "X", "Y" FROM "{LAYER_NAME}"').fetchall()
+    else:
+        rows = []
+        for well_id, geom in conn.execute(f'SELECT well_id, geom FROM "{LAYER_NAME}"'):
+            b = gpkg_bounds(geom)  # (minx, maxx, miny, maxy); a point's min == max
+            rows.append((well_id, b[0], b[2]) if b else (well_id, None, None))
+    return pd.DataFrame.from_records(rows, columns=["well_id", "X", "Y"]).assign(has_well=1)
+
+
+def ensure_check_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {CHECK_TABLE} (
+            survey_id INTEGER PRIMARY KEY,
+            well_id TEXT,
+            distance_m REAL,  -- NULL when the survey has no position or no well
+            status TEXT,  -- arrived | near | far | no_location | no_well
+            checked_utc TEXT
+        )
+        """
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{CHECK_TABLE}_well ON {CHECK_TABLE} (well_id, distance_m)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{CHECK_TABLE}_status ON {CHECK_TABLE} (status)")
+
+
+def validate(conn: sqlite3.Connection, arrived_m: float = ARRIVED_M, far_m: float = FAR_M,
+             confirm: bool = True) -> Dict[str, int]:
+    """Re-check every survey, update survey_checks and confirm wells surveyors arrived at;
+    returns counts per status plus "confirmed". Does not commit."""
+    register_gpkg_functions(conn)  # GDAL's R-tree update triggers call ST_IsEmpty
+    ensure_check_table(conn)
+    cols = ["survey_id", "well_id", "survey_location", "survey_date"]
+    if "geom" in {r[1] for r in conn.execute(f"PRAGMA table_info({SURVEY_TABLE})")}:
+        cols.append("geom")
+    surveys = pd.DataFrame.from_records(
+        conn.execute(f"SELECT {', '.join(cols)} FROM {SURVEY_TABLE}").fetchall(), columns=cols)
+    df = surveys.merge(well_points(conn), on="well_id", how="left")
+    df["has_well"] = df["has_well"].fillna(0)
+    checks = check_frame(df, arrived_m, far_m)
+
+    # Write only surveys whose result changed (new, edited, or thresholds moved); drop deleted ones
+    prev = pd.DataFrame.from_records(
+        conn.execute(f"SELECT survey_id, distance_m, status FROM {CHECK_TABLE}").fetchall(),
+        columns=["survey_id", "prev_distance", "prev_status"])
+    merged = checks.merge(prev, on="survey_id", how="left")
+    same_dist = (merged["distance_m"] == merged["prev_distance"]) | (
+        merged["distance_m"].isna() & merged["prev_distance"].isna() & merged["prev_status"].notna())
+    changed = merged[~(same_dist & (merged["status"] == merged["prev_status"]))]
+    gone = np.setdiff1d(prev["survey_id"].to_numpy(), checks["survey_id"].to_numpy())
+    checked = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    dist = changed["distance_m"].astype(object).where(changed["distance_m"].notna(), None)
+    conn.executemany(f"DELETE FROM {CHECK_TABLE} WHERE survey_id = ?", [(int(i),) for i in gone])
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {CHECK_TABLE} (survey_id, well_id, distance_m, status, checked_utc) "
+        f"VALUES (?, ?, ?, ?, '{checked}')",
+        zip(changed["survey_id"].tolist(), changed["well_id"].tolist(), dist.tolist(), changed["status"].tolist()))
+
+    stats = {s: int((checks["status"] == s).sum()) for s in STATUSES}
+    # Only surveys that became "arrived" in this run confirm wells: an arrival already
+    # recorded must not undo a later reset_survey
+    arrived = changed.loc[(changed["status"] == "arrived") & (changed["prev_status"] != "arrived"), "survey_id"]
+    stats["confirmed"] = confirm_arrivals(conn, df[df["survey_id"].isin(arrived)]) if confirm else 0
+    return stats
+
+
+def confirm_arrivals(conn: sqlite3.Connection, arrived: pd.DataFrame) -> int:
+    """found = 1 (if unknown) and visited = 1 on the wells of the given arrived surveys; visited_at_utc
+    is the first arrival when unset. last_edit_utc is restored: this is not a field edit."""
+    if arrived.empty:
+        return 0
+    first = arrived.groupby("well_id")["survey_date"].min()
+    ids = first.index.tolist()
+    wells = pd.DataFrame.from_records(conn.execute(
+        f'SELECT fid, well_id, "found", visited, visited_at_utc, last_edit_utc FROM "{LAYER_NAME}" '
+        f"WHERE well_id IN ({', '.join('?' for _ in ids)})", ids).fetchall(),
+        columns=["fid", "well_id", "found", "visited", "visited_at_utc", "last_edit_utc"])
+    unknown = wells["found"].isna() | (wells["found"] == -1)
+    todo = wells[unknown | (wells["visited"] != 1) | wells["visited_at_utc"].isna()]
+    if todo.empty:
+        return 0
+    fids = [(int(f),) for f in todo["fid"]]
+    conn.executemany(f'UPDATE "{LAYER_NAME}" SET "found" = CASE WHEN COALESCE("found", -1) = -1 THEN 1 '
+                     'ELSE "found" END, visited = 1 WHERE fid = ?', fids)
+    # wells_update stamps a first visit with now(); the arrival time is the real one
+    at = todo[todo["visited_at_utc"].isna()]
+    conn.executemany(f'UPDATE "{LAYER_NAME}" SET visited_at_utc = COALESCE(?, visited_at_utc) WHERE fid = ?',
+                     [(first.get(w), int(f)) for w, f in zip(at["well_id"], at["fid"])])
+    conn.executemany(f'UPDATE "{LAYER_NAME}" SET last_edit_utc = ? WHERE fid = ?',
+                     [(e, int(f)) for e, f in zip(todo["last_edit_utc"], todo["fid"])])
+    return len(todo)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check survey GPS positions against their wells")
+    parser.add_argument("--gpkg", default=DEFAULT_GPKG, help="GeoPackage to check (default: data/processed/wells.gpkg)")
+    parser.add_argument("--arrived-m", type=float, default=ARRIVED_M,
+                        help=f"Distance that counts as arrived; confirms the well (default: {ARRIVED_M:g})")
+    parser.add_argument("--far-m", type=float, default=FAR_M,
+                        help=f"Surveys farther than this are flagged (default: {FAR_M:g})")
+    parser.add_argument("--no-confirm", action="store_true", help="Only record distances, do not update wells")
+    parser.add_argument("--show", choices=STATUSES, help="List the surveys with this status")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.gpkg):
+        raise SystemExit(f"ERROR: Missing GeoPackage {args.gpkg}")
+    started = time.perf_counter()
+    with sqlite3.connect(args.gpkg) as conn:
+        s = validate(conn, args.arrived_m, args.far_m, confirm=not args.no_confirm)
+    counts = ", ".join(f"{s[k]} {k}" for k in STATUSES)
+    print(f"✅ Checked {sum(s[k] for k in STATUSES)} surveys in {time.perf_counter() - started:.2f} s: {counts}; "
+          f"{s['confirmed']} wells confirmed")
+    if args.show:
+        with sqlite3.connect(args.gpkg) as conn:
+            rows = conn.execute(
+                f"SELECT c.survey_id, c.well_id, c.distance_m, s.surveyor_name, s.survey_date FROM {CHECK_TABLE} c "
+                f"JOIN {SURVEY_TABLE} s USING (survey_id) WHERE c.status = ? ORDER BY c.distance_m DESC",
+                (args.show,)).fetchall()
+        for survey_id, well_id, dist, surveyor, date in rows:
+            print(f"{survey_id:>6}  {well_id}  {'' if dist is None else f'{dist:,.0f} m':>10}  "
+                  f"{surveyor or ''}  {date or ''}")
+
+
+if __name__ == "__main__":
+    main()
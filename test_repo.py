@@ -40,12 +40,12 @@ def test_data_files():
     raw_dir = Path("data/raw")
     assert raw_dir.exists(), "data/raw directory missing"
     
-    # Look for CSV files
-    orphan_files = list(raw_dir.glob("*orphan*.csv"))
-    stfd_files = list(raw_dir.glob("*stfd*.csv"))
+    # Look for OCC lists (xlsx originals or CSV exports)
+    orphan_files = list(raw_dir.glob("*orphan*.csv")) + list(raw_dir.glob("*orphan*.xlsx"))
+    stfd_files = list(raw_dir.glob("*stfd*.csv")) + list(raw_dir.glob("*stfd*.xlsx"))
     
-    assert len(orphan_files) > 0, "No orphan CSV files found in data/raw"
-    assert len(stfd_files) > 0, "No STFD CSV files found in data/raw"
+    assert len(orphan_files) > 0, "No orphan CSV/xlsx files found in data/raw"
+    assert len(stfd_files) > 0, "No STFD CSV/xlsx files found in data/raw"
     
     print(f"✅ Found {len(orphan_files)} orphan file(s)")
     print(f"✅ Found {len(stfd_files)} STFD file(s)")
@@ -58,6 +58,11 @@ def test_scripts():
     scripts = [
         "scripts/prepare_wells_gpkg.py",
         "scripts/build_qgis_project.py", 
+        "scripts/qgs_writer.py",
+        "scripts/export_wells.py",
+        "scripts/tile_server.py",
+        "scripts/fake_qfieldcloud.py",
+        "scripts/validate_surveys.py",
         "deploy.py"
     ]
     
@@ -167,6 +172,934 @@ def test_credentials_check():
         print("⚠️  QFieldCloud credentials not set (this is OK for testing)")
 
 
+def test_reset_survey():
+    """Test reset_survey trigger and batch reset"""
+    print("🧪 Testing reset_survey trigger...")
+    
+    import sqlite3
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    from prepare_wells_gpkg import apply_triggers
+    from reset_surveys import reset_surveys
+    
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        'CREATE TABLE wells (fid INTEGER PRIMARY KEY, well_id TEXT, county_name TEXT, '
+        '"found" INTEGER DEFAULT -1, "exists" INTEGER DEFAULT -1, small_leak INTEGER DEFAULT 0, '
+        'viable_leak INTEGER DEFAULT 0, visited INTEGER DEFAULT 0, reset_survey INTEGER DEFAULT 0, '
+        'last_edit_utc TEXT, visited_at_utc TEXT)'
+    )
+    apply_triggers(conn)
+    conn.executemany("INSERT INTO wells (well_id, county_name) VALUES (?, ?)",
+                     [("A", "KAY"), ("B", "KAY"), ("C", "GRANT")])
+    conn.execute('UPDATE wells SET "exists" = 1, small_leak = 1, visited = 1')
+    assert conn.execute("SELECT COUNT(*) FROM wells WHERE visited = 1").fetchone()[0] == 3
+    
+    # QField toggle: one well back to defaults in the same write
+    conn.execute("UPDATE wells SET reset_survey = 1 WHERE well_id = 'A'")
+    row = conn.execute('SELECT "exists", small_leak, visited, visited_at_utc, reset_survey FROM wells WHERE well_id = \'A\'').fetchone()
+    assert row == (-1, 0, 0, None, 0), f"Reset toggle did not clear survey: {row}"
+    print("✅ reset_survey toggle clears survey fields")
+    
+    # Admin batch reset by county
+    assert reset_surveys(conn, counties=["kay"], dry_run=True) == 1
+    assert reset_surveys(conn, counties=["kay"]) == 1
+    visited = [r[0] for r in conn.execute("SELECT well_id FROM wells WHERE visited = 1")]
+    assert visited == ["C"], f"Unexpected wells still visited: {visited}"
+    
+    # A plain connection to a real GeoPackage: GDAL's R-tree triggers need the ST_* functions
+    import tempfile
+    import geopandas as gpd
+    with tempfile.TemporaryDirectory() as tmp:
+        gpkg = str(Path(tmp) / "wells.gpkg")
+        gdf = gpd.GeoDataFrame({"well_id": ["A", "B"], "county_name": "KAY", "visited": 1, "reset_survey": 0},
+                               geometry=gpd.points_from_xy([-97.0, -97.0], [35.0, 35.1]), crs="EPSG:4326")
+        gdf.to_file(gpkg, layer="wells", driver="GPKG")
+        with sqlite3.connect(gpkg) as plain:
+            assert reset_surveys(plain, counties=["KAY"]) == 2
+    print("✅ Batch reset by county")
+
+
+def test_source_registry():
+    """Test priority dedup across registered sources"""
+    print("🧪 Testing source registry...")
+    
+    import pandas as pd
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    
+    assert {"STFD", "ORPHAN"} <= set(prep.SOURCES), "Built-in OCC sources not registered"
+    prep.register_source("LEADS", "*leads*.csv", columns={"API_NO": "well_id"}, priority=5)
+    try:
+        assert prep.SOURCES["LEADS"]["dtypes"] == {"API_NO": str}
+        df = pd.DataFrame({
+            "well_id": ["1", "1", "1", "2", "2", "3"],
+            "source_list": ["LEADS", "ORPHAN", "STFD", "LEADS", "ORPHAN", "LEADS"],
+        })
+        kept = dict(prep.dedupe_by_priority(df)[["well_id", "source_list"]].values.tolist())
+        assert kept == {"1": "STFD", "2": "ORPHAN", "3": "LEADS"}, f"Wrong priority winner: {kept}"
+    finally:
+        prep.SOURCES.pop("LEADS", None)
+    print("✅ Highest-priority source kept per well_id")
+
+
+def test_xlsx_ingestion():
+    """Test direct xlsx reads keep API as text"""
+    print("🧪 Testing xlsx ingestion...")
+    
+    import glob
+    import tempfile
+    import pandas as pd
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx = Path(tmp) / "stfd-well-list 2025-09-11.xlsx"
+        csv = Path(tmp) / "stfd-well-list 2025-09-11.csv"
+        pd.DataFrame({"API": [35003201560000, None, 35003201940000], "X": [-98.4, -98.45, -98.5],
+                      "Y": [36.6, 36.65, 36.7]}).to_excel(xlsx, index=False)
+        csv.write_text("API,X,Y\n3.50032E+13,-98.4,36.6\n,-98.45,36.65\n")
+        
+        assert prep.latest_by_date(str(Path(tmp) / "*stfd*")) == str(xlsx), "xlsx original should win over CSV export"
+        df = prep.load_table(str(xlsx), "STFD", "2025-09-11")
+        assert df["well_id"].tolist() == ["35003201560000", "35003201940000"], f"API mangled: {df['well_id'].tolist()}"
+        # Blank API cells are dropped the same way from both formats
+        assert prep.load_table(str(csv), "STFD", "2025-09-11")["well_id"].tolist() == ["3.50032E+13"]
+        
+        # Parse cache: a changed file replaces its entry, a deleted file's entry is pruned
+        cache_dir, prep.CACHE_DIR = prep.CACHE_DIR, str(Path(tmp) / ".cache")
+        try:
+            task = ("STFD", str(csv), "2025-09-11", prep.SOURCES["STFD"]["columns"], prep.SOURCES["STFD"]["dtypes"])
+            prep._load_source(task)
+            csv.write_text("API,X,Y\n35003201560000,-98.4,36.6\n")
+            os.utime(csv, ns=(0, 10**18))
+            prep._load_source(task)
+            assert glob.glob(os.path.join(prep.CACHE_DIR, "*.pkl")) == [prep.parse_cache_path(task)], "superseded entry kept"
+            Path(prep.CACHE_DIR, "0123456789abcdef.pkl").write_bytes(b"")  # pre-prefix naming
+            assert prep.prune_parse_cache() == 1
+            csv.unlink()
+            assert prep.prune_parse_cache() == 2 and not os.listdir(prep.CACHE_DIR), "deleted source not pruned"
+        finally:
+            prep.CACHE_DIR = cache_dir
+    print(f"✅ API read as text via {prep.XLSX_ENGINE}; parse cache pruned")
+
+
+def test_snapshots():
+    """Test snapshot deltas, diff and materialize"""
+    print("🧪 Testing snapshot store...")
+    
+    import tempfile
+    import pandas as pd
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import snapshots
+    
+    week1 = pd.DataFrame({
+        "well_id": ["1", "2", "3"], "well_name": ["A", "B", "C"], "X": [-98.1, -98.2, -98.3],
+        "source_list": ["ORPHAN", "ORPHAN", "STFD"], "dataset_date": "2025-09-04", "visited": 0,
+    })
+    week2 = week1.iloc[1:].assign(dataset_date="2025-09-11")
+    week2.loc[week2["well_id"] == "2", "well_name"] = "B2"
+    week2 = pd.concat([week2, week1.iloc[:1].assign(well_id="4", dataset_date="2025-09-11")])
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        assert snapshots.record_snapshot(week1, tmp)["kind"] == "base"
+        entry = snapshots.record_snapshot(week2, tmp)
+        assert entry["kind"] == "delta"
+        assert (entry["added"], entry["removed"], entry["changed"]) == (1, 1, 1), entry
+        
+        d = snapshots.diff_frames(snapshots.materialize("2025-09-04", tmp), snapshots.materialize("2025-09-11", tmp))
+        assert {k: v.tolist() for k, v in d.items()} == {"added": ["4"], "removed": ["1"], "changed": ["2"]}
+        
+        rebuilt = snapshots.typed_frame(snapshots.materialize("2025-09-11", tmp), entry)
+        assert rebuilt["well_name"].tolist() == ["B2", "C", "A"]
+        assert rebuilt["X"].dtype == "float64" and set(rebuilt["dataset_date"]) == {"2025-09-11"}
+    print("✅ Delta snapshot round-trips and diffs by well_id")
+
+
+def test_mobile_profile():
+    """Test compact mobile GeoPackage export"""
+    print("🧪 Testing mobile profile export...")
+    
+    import sqlite3
+    import tempfile
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    from mobile_profile import export_mobile_gpkg, MOBILE_COLUMNS
+    
+    src = Path("data/processed/wells.gpkg")
+    assert src.exists(), "GeoPackage not built (run data processing first)"
+    with tempfile.TemporaryDirectory() as tmp:
+        dst = Path(tmp) / "wells_mobile.gpkg"
+        export_mobile_gpkg(str(src), str(dst))
+        assert dst.stat().st_size < src.stat().st_size, "Mobile profile is not smaller"
+        
+        conn = sqlite3.connect(dst)
+        cols = [r[1] for r in conn.execute('PRAGMA table_info("wells")')]
+        assert set(cols) <= set(MOBILE_COLUMNS), f"Unexpected columns kept: {set(cols) - set(MOBILE_COLUMNS)}"
+        n_wells = conn.execute("SELECT COUNT(*) FROM wells").fetchone()[0]
+        n_named = conn.execute("SELECT COUNT(county_name) FROM wells_context").fetchone()[0]
+        with sqlite3.connect(src) as full:
+            assert n_named == full.execute("SELECT COUNT(county_name) FROM wells").fetchone()[0]
+        triggers = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        assert {"wells_insert", "wells_update"} <= triggers, "Survey triggers lost"
+        conn.close()
+
+        # The project stage is rebuilt when the device schema changes, not when its data does
+        sys.path.insert(0, str(Path.cwd()))
+        from deploy import gpkg_schema
+        assert gpkg_schema(str(dst)) == gpkg_schema(str(dst)) and gpkg_schema(str(src)) != gpkg_schema(str(dst))
+    print(f"✅ Mobile profile: {n_wells} wells with lookup tables, context view and triggers")
+
+
+def test_near_duplicates():
+    """Test grid-hash near-duplicate detection and priority merge"""
+    print("🧪 Testing near-duplicate detection...")
+    
+    import pandas as pd
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import numpy as np
+    from near_duplicates import find_near_duplicates, merge_near_duplicates, prefix_match
+    
+    a = np.array(["35003201560000", "350032", "", "123"], dtype=object)
+    b = np.array(["350032", "35003201560000", "35", "124"], dtype=object)
+    assert prefix_match(a, b).tolist() == [True, True, False, False]
+    df = pd.DataFrame({
+        "well_id": ["35003201560000", "3.50032E+13", "35003201570000", "35003209990000"],
+        "source_list": ["ORPHAN", "STFD", "ORPHAN", "ORPHAN"],
+        "well_name": ["Kephart", "KEPHART", "KEPHART", "GREEN"],
+        "well_number": ["1", "#1", "2", "1"],
+        "operator_name": ["Renegade Oil and Gas LLC", "RENEGADE OIL & GAS, L.L.C.", "RENEGADE OIL AND GAS LLC", "COG"],
+        "X": [-98.40110, -98.40114, -98.40112, -98.5],
+        "Y": [36.61216, 36.61218, 36.61217, 36.7],
+    })
+    pairs = find_near_duplicates(df, tol_m=30)
+    assert pairs[["well_id_a", "well_id_b"]].values.tolist() == [["35003201560000", "3.50032E+13"]], pairs
+    print("✅ Shifted point with mangled API matched; same-pad #2 kept distinct")
+    
+    merged = merge_near_duplicates(df, pairs, {"STFD": 0, "ORPHAN": 1})
+    assert sorted(merged["well_id"]) == ["3.50032E+13", "35003201570000", "35003209990000"]
+    print("✅ Auto-merge keeps the STFD record")
+
+
+def test_cli_manifest():
+    """Test the lazy CLI: no heavy imports, manifest-based staleness and verify"""
+    print("🧪 Testing fieldapp CLI and build manifest...")
+    
+    import json
+    import tempfile
+    probe = ("import sys, json, fieldapp; "
+             "print(json.dumps(sorted(m for m in ('pandas', 'geopandas', 'qfieldcloud_sdk') if m in sys.modules)))")
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == [], f"CLI imports heavy modules: {out.stdout}"
+    print("✅ CLI imports no pandas/geopandas/qfieldcloud_sdk at startup")
+    
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import manifest
+    with tempfile.TemporaryDirectory() as tmp:
+        src, out_gpkg = Path(tmp) / "stfd.csv", Path(tmp) / "wells.gpkg"
+        src.write_text("API\n1\n")
+        out_gpkg.write_bytes(b"x")
+        inputs, outputs, opts = {"STFD": str(src)}, {"gpkg": str(out_gpkg)}, manifest.build_options()
+        stale = lambda o=opts: manifest.stale_reasons("wells", inputs, outputs, o, manifest_dir=tmp)
+        assert stale() == ["no manifest for wells"]
+        m = manifest.write_manifest("wells", inputs, outputs, opts, rows=1, manifest_dir=tmp)
+        assert m["inputs"]["STFD"]["sha256"] and m["outputs"]["gpkg"]["sha256"] and m["tools"]["python"]
+        assert stale() == [], "Fresh build reported stale"
+        assert stale(manifest.build_options(True)), "Option change missed"
+        os.utime(src)  # touched but identical content: still current
+        assert stale() == [], "Unchanged content reported stale"
+        src.write_text("API\n1\n2\n")
+        assert stale()[0].startswith("input STFD"), "Input change missed"
+        out_gpkg.write_bytes(b"y")
+        assert manifest.verify("wells", manifest_dir=tmp), "Modified output verified"
+    print("✅ Manifest detects input, option and output changes")
+
+
+def test_lean_write():
+    """Test single-reindex schema fill and the WKB GeoPackage writers"""
+    print("🧪 Testing lean merge + write path...")
+    
+    import sqlite3
+    import tempfile
+    import pandas as pd
+    import shapely
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    
+    wkb = prep.points_wkb([-97.5, 0.0], [35.25, 0.0])
+    assert [g.coords[0] for g in shapely.from_wkb(wkb)] == [(-97.5, 35.25), (0.0, 0.0)]
+    
+    df = pd.DataFrame({"well_id": ["b", "a", "b"], "source_list": ["ORPHAN", "ORPHAN", "STFD"],
+                       "X": [-97.0, -98.0, -97.1], "Y": [35.0, 36.0, 35.1]})
+    df = prep.ensure_columns(df, rows=prep.priority_winners(df))
+    assert sorted(df["source_list"]) == ["ORPHAN", "STFD"] and df["found"].tolist() == [-1, -1]
+    engines = ["numpy"] + (["arrow"] if prep.WRITE_ENGINE == "arrow" else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine in engines:
+            out = str(Path(tmp) / f"{engine}.gpkg")
+            prep.write_gpkg(df, out, engine=engine)
+            with sqlite3.connect(out) as conn:
+                rows = conn.execute("SELECT well_id, editor_name, county_no, found FROM wells ORDER BY well_id").fetchall()
+                tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+            assert rows == [("a", None, None, -1), ("b", None, None, -1)], (engine, rows)
+            assert {"well_surveys", "wells_update", "idx_wells_well_id"} <= tables, f"{engine}: schema not finalized"
+            with sqlite3.connect(out) as conn:
+                ctx = conn.execute("SELECT coords_latlon, gmaps_url FROM wells WHERE well_id = 'a'").fetchone()
+            assert ctx == ("36.000000,-98.000000", "https://maps.google.com/?q=36.000000,-98.000000"), ctx
+    print(f"✅ Missing columns written as NULL, one row per well_id ({', '.join(engines)} writer)")
+
+
+def test_priority_score():
+    """Test survey priority scoring and rescoring without touching audit fields"""
+    print("🧪 Testing survey priority scoring...")
+
+    import sqlite3
+    import tempfile
+    import pandas as pd
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    from priority_score import load_config, rescore, score_frame
+
+    # A: old orphan next to a confirmed leak; B: same, 5 km away; C: visited leak; D: fresh orphan
+    df = pd.DataFrame({"well_id": list("ABCD"), "source_list": "ORPHAN", "well_type": "OIL",
+                       "orphan_date": ["2010-01-01", "2010-01-01", "2010-01-01", "2025-01-01"],
+                       "X": [-97.0, -97.05, -97.001, -97.002], "Y": 35.0,
+                       "visited": [0, 0, 1, 0], "small_leak": [0, 0, 1, 0]})
+    df = prep.ensure_columns(df)
+    s = score_frame(df, today=pd.Timestamp("2025-06-01").date())
+    ranks = s["priority_rank"].astype(object).where(s["priority_rank"].notna(), None).tolist()
+    assert ranks == [1, 3, None, 2], f"Unexpected ranks: {ranks}"
+    # A well that just joined the STFD list moves to the top when that component is weighted
+    config = load_config(None)
+    config["weights"]["recently_entered"] = 20.0
+    s = score_frame(df, config, today=pd.Timestamp("2025-06-01").date(), entered=["B"])
+    assert s["priority_rank"].tolist()[1] == 1, s
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = str(Path(tmp) / "wells.gpkg")
+        prep.write_gpkg(df, out)
+        with sqlite3.connect(out) as conn:
+            assert rescore(conn) == 0, "Rescore of an unchanged file rewrote rows"
+            conn.execute("UPDATE wells SET small_leak = 1 WHERE well_id = 'B'")
+            edited = conn.execute("SELECT well_id FROM wells WHERE last_edit_utc IS NOT NULL").fetchall()
+            assert rescore(conn) > 0
+            assert conn.execute("SELECT well_id FROM wells WHERE last_edit_utc IS NOT NULL").fetchall() == edited
+            indexes = {r[1] for r in conn.execute('PRAGMA index_list("wells")')}
+        assert {"idx_wells_priority_score", "idx_wells_priority_rank"} <= indexes
+    print("✅ Priority ranks unvisited wells; rescoring leaves last_edit_utc alone")
+
+
+def test_master_store():
+    """Stress the master store: concurrent readers, writers and a refresh job"""
+    print("🧪 Testing master store under concurrent reads and writes...")
+
+    import sqlite3
+    import tempfile
+    import threading
+    import pandas as pd
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    from master_store import MasterStore, refresh
+
+    df = pd.DataFrame({"well_id": [f"W{i}" for i in range(200)], "source_list": "STFD",
+                       "operator_name": "OLD", "X": -97.0, "Y": [35.0 + i * 1e-3 for i in range(200)]})
+    with tempfile.TemporaryDirectory() as tmp:
+        master, src = str(Path(tmp) / "master.gpkg"), str(Path(tmp) / "build.gpkg")
+        prep.write_gpkg(prep.ensure_columns(df), master)
+        df.loc[0, "operator_name"] = "NEW"
+        prep.write_gpkg(prep.ensure_columns(pd.concat(
+            [df, df.tail(1).assign(well_id="W200", Y=36.0)], ignore_index=True)), src)
+        with sqlite3.connect(master) as conn:
+            conn.execute("CREATE TABLE ledger (id INTEGER PRIMARY KEY, v INTEGER)")
+            conn.executemany("INSERT INTO ledger VALUES (?, 100)", [(0,), (1,)])
+
+        def transfer(conn, k):
+            conn.execute("UPDATE ledger SET v = v - 1 WHERE id = ?", (k % 2,))
+            conn.execute("UPDATE ledger SET v = v + 1 WHERE id = ?", (1 - k % 2,))
+            conn.execute("UPDATE wells SET small_leak = 1 WHERE well_id = ?", (f"W{k % 200}",))
+
+        errors, stop = [], threading.Event()
+        with MasterStore(master, readers=4) as store, MasterStore(master, readers=1) as job:
+            def read():
+                while not stop.is_set():
+                    try:
+                        # Each read sees a whole batch or none of it
+                        with store.reader() as conn:
+                            total = conn.execute("SELECT SUM(v) FROM ledger").fetchone()[0]
+                        assert total == 200, f"torn read: {total}"
+                    except Exception as e:
+                        errors.append(e)
+                        return
+
+            readers = [threading.Thread(target=read) for _ in range(6)]
+            for t in readers:
+                t.start()
+            futures = []
+            writers = [threading.Thread(target=lambda w=w: futures.extend(
+                store.submit(lambda c, k=k: transfer(c, k)) for k in range(w, 600, 3))) for w in range(3)]
+            for t in writers:
+                t.start()
+            # A second store on the same file stands in for another ingestion job
+            stats = refresh(job, src, chunk=50)
+            bad = store.execute("UPDATE no_such_table SET v = 0")
+            for t in writers:
+                t.join()
+            for f in futures:
+                f.result()
+            stop.set()
+            for t in readers:
+                t.join()
+            assert not errors, errors[0]
+            assert isinstance(bad.exception(), sqlite3.OperationalError), "Failing op not isolated"
+            assert store.query("SELECT SUM(v) FROM ledger") == [(200,)]
+            assert stats["added"] == 1 and stats["updated"] == 1, stats
+            rows = store.query("SELECT operator_name, small_leak, visited FROM wells WHERE well_id = 'W0'")
+            assert rows == [("NEW", 1, 1)], f"Refresh overwrote survey fields: {rows}"
+            assert store.query("SELECT journal_mode FROM pragma_journal_mode") == [("wal",)]
+            out = str(Path(tmp) / "export.gpkg")
+            store.export(out)
+        with sqlite3.connect(out) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+            assert conn.execute("SELECT COUNT(*) FROM wells WHERE visited = 1").fetchone()[0] == 200
+    print(f"✅ {len(futures)} batched writes and a refresh with no torn reads; survey fields kept")
+
+
+def test_qgs_writer():
+    """Test the headless project writer against the project structure the QGIS builder produces"""
+    print("🧪 Testing headless QGIS project writer...")
+
+    import sqlite3
+    import tempfile
+    import pandas as pd
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    import project_spec as spec
+    from priority_score import rescore
+    from gpkg_utils import register_gpkg_functions
+    from qgs_writer import compare_projects, project_summary, write_project
+
+    df = pd.DataFrame({"well_id": ["A", "B", "C"], "source_list": ["STFD", "ORPHAN", "ORPHAN"],
+                       "well_type": "GAS", "county_name": ["ROGERS", "ROGERS", "CREEK"],
+                       "X": [-95.6, -95.5, -96.4], "Y": [36.3, 36.4, 35.9]})
+    with tempfile.TemporaryDirectory() as tmp:
+        gpkg = str(Path(tmp) / "wells.gpkg")
+        prep.write_gpkg(prep.ensure_columns(df), gpkg)
+        with sqlite3.connect(gpkg) as conn:
+            rescore(conn)
+        where = spec.county_filter(gpkg, ["Rogers"])
+        out = write_project({"name": "t", "gpkg": gpkg, "out": str(Path(tmp) / "t.qgz"), "filter": where})
+        summary = project_summary(out)
+
+        layers = {l["name"]: l for l in summary["layers"]}
+        assert [l["name"] for l in summary["layers"]] == [
+            "Top priority", "Not Visited", "Surveyed", "Wells", "Satellite (Google)", "OpenStreetMap"]
+        assert [l["visible"] for l in summary["layers"]] == [True, True, False, False, True, False]
+        assert summary["crs"] == "EPSG:4326"
+        assert layers["Not Visited"]["subset"] == f'("visited" = 0) AND ({where})'
+        assert layers["Wells"]["file"] == "wells.gpkg" and layers["Wells"]["subset"] == f"({where})"
+        wells = layers["Not Visited"]
+        assert wells["renderer"]["type"] == "categorizedSymbol"
+        assert wells["renderer"]["attr"] == spec.RENDER_EXPRESSION
+        assert len(wells["renderer"]["categories"]) == 6
+        assert ("GAS_STFD", "GAS (STFD)", "triangle", "33,150,243", spec.POINT_SIZE) in wells["renderer"]["categories"]
+        assert layers["Top priority"]["renderer"]["symbol"]["shape"] == "star"
+        assert layers["Top priority"]["sort"] == '"priority_rank"'
+        # Top priority: this variant's best-ranked unvisited wells, live against visited
+        top = layers["Top priority"]["subset"]
+        with sqlite3.connect(gpkg) as conn:
+            register_gpkg_functions(conn)
+            def shown(clause):
+                return sorted(r[0] for r in conn.execute(f"SELECT well_id FROM wells WHERE {clause}"))
+            assert shown(top) == ["A", "B"], top
+            assert shown(spec.top_priority_clause(where, n=1)) == [
+                conn.execute("SELECT well_id FROM wells WHERE county_name = 'ROGERS' ORDER BY priority_rank").fetchone()[0]]
+            conn.execute("UPDATE wells SET visited = 1 WHERE well_id = 'A'")
+            assert shown(top) == ["B"] and "A" not in shown(spec.top_priority_clause())
+            conn.rollback()
+        for field in spec.YES_NO_FIELDS:
+            assert wells["widgets"][field] == ("ValueMap", (("No", "0"), ("Yes", "1"))), field
+        assert wells["widgets"]["county_name"] == ("TextEdit", True)
+        assert wells["widgets"]["well_id"][0] == "Hidden" and wells["widgets"]["visited"][0] == "Hidden"
+        assert wells["aliases"] == spec.FIELD_ALIASES
+        assert wells["defaults"]["visited"] == (spec.VISITED_DEFAULT, True)
+        assert [a[0] for a in wells["actions"]] == [name for name, _ in spec.ACTIONS]
+        assert all('"coords_latlon"' in a[2] for a in wells["actions"][:4])
+        assert wells["form"] == spec.FORM_FIELDS
+        # Initial extent: the filtered wells (Rogers), not Oklahoma
+        assert -95.7 < summary["extent"][0] < -95.5 and summary["extent"][2] < -95.4
+
+        # Against the writer's golden snapshot for a committed GeoPackage: unintended structure changes
+        fixtures = Path("tests/fixtures")
+        written = write_project({"name": "dev", "gpkg": str(fixtures / "golden_dev.gpkg"),
+                                 "out": str(Path(tmp) / "golden_dev.qgs"), "filter": None})
+        diffs = compare_projects(written, str(fixtures / "golden_dev.qgs"))
+        assert diffs == [], "\n".join(diffs)
+
+        # A project saved by QGIS (build_qgis_project.py on the Mac), when present
+        reference = Path("qgis/wells_project_dev.qgz")
+        if reference.exists() and Path(spec.env_variant("dev")["gpkg"]).exists():
+            variant = {**spec.env_variant("dev"), "out": str(Path("qgis") / ".qgs_writer_check.qgz")}
+            try:
+                diffs = compare_projects(write_project(variant), str(reference))
+            finally:
+                Path(variant["out"]).unlink(missing_ok=True)
+            assert not diffs, "\n".join(diffs)
+    print("✅ Headless writer: layers, subsets, renderer, widgets, aliases, actions and form match the spec")
+
+
+def test_attachments():
+    """Test content-addressed attachment ingest, path rewrite and upload-once"""
+    print("🧪 Testing attachment pipeline...")
+
+    import sqlite3
+    import tempfile
+    import pandas as pd
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    from attachments import ingest, load_index, upload_new
+    from gpkg_utils import register_gpkg_functions
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        dcim = tmp / "DCIM"
+        dcim.mkdir()
+        (dcim / "a.jpg").write_bytes(b"same photo")
+        (dcim / "b.jpg").write_bytes(b"same photo")
+        (dcim / "note.m4a").write_bytes(b"voice")
+        df = prep.ensure_columns(pd.DataFrame({"well_id": ["A", "B", "C"], "X": -97.0, "Y": [35.0, 35.1, 35.2]}))
+        gpkg = str(tmp / "wells.gpkg")
+        prep.write_gpkg(df, gpkg)
+        with sqlite3.connect(gpkg) as conn:
+            register_gpkg_functions(conn)
+            conn.executemany("UPDATE wells SET photo_path = ?, voice_note = ? WHERE well_id = ?",
+                             [("DCIM/a.jpg", "DCIM/note.m4a", "A"), ("DCIM/b.jpg", None, "B"), ("DCIM/gone.jpg", None, "C")])
+            edited = conn.execute("SELECT well_id, last_edit_utc FROM wells ORDER BY well_id").fetchall()
+
+        kw = {"project_dir": str(tmp / "project"), "store_dir": str(tmp / "objects"), "index_path": str(tmp / "index.json")}
+        stats = ingest(gpkg, [str(tmp)], **kw)
+        assert (stats["files"], stats["new"], stats["duplicates"], stats["missing"]) == (3, 2, 1, 1), stats
+        with sqlite3.connect(gpkg) as conn:
+            rows = conn.execute("SELECT photo_path, voice_note FROM wells ORDER BY well_id").fetchall()
+            assert conn.execute("SELECT well_id, last_edit_utc FROM wells ORDER BY well_id").fetchall() == edited
+        assert rows[0][0] == rows[1][0] and rows[0][0].startswith("media/"), rows
+        assert rows[0][1].startswith("media/") and rows[0][1].endswith(".m4a")
+        assert rows[2][0] == "DCIM/gone.jpg", "Missing files keep their stored path"
+        assert all((tmp / "project" / p).is_file() for p in (rows[0][0], rows[0][1]))
+        assert len(list((tmp / "objects").rglob("*.*"))) == 2
+
+        assert ingest(gpkg, [str(tmp)], **kw)["new"] == 0, "Second ingest re-stored media"
+        with sqlite3.connect(gpkg) as conn:
+            register_gpkg_functions(conn)
+            conn.execute("UPDATE wells SET photo_path = 'DCIM/a.jpg' WHERE well_id = 'A'")
+        (tmp / "project" / rows[0][0]).unlink()
+        assert ingest(gpkg, [str(tmp)], **kw)["new"] == 0
+        assert (tmp / "project" / rows[0][0]).is_file(), "Lost compact copy not rebuilt"
+        sent = []
+        assert upload_new(lambda local, remote: sent.append(remote), "p", kw["project_dir"], kw["index_path"]) == len(sent) > 0
+        assert upload_new(lambda local, remote: sent.append(remote), "p", kw["project_dir"], kw["index_path"]) == 0
+        assert set(load_index(kw["index_path"])["uploaded"]["p"]) == set(sent)
+
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+        if Image is not None:
+            Image.new("RGB", (4000, 3000), "green").save(dcim / "big.jpg")
+            with sqlite3.connect(gpkg) as conn:
+                register_gpkg_functions(conn)
+                conn.execute("UPDATE wells SET photo_path = 'DCIM/big.jpg' WHERE well_id = 'C'")
+            ingest(gpkg, [str(tmp)], **kw)
+            with sqlite3.connect(gpkg) as conn:
+                compact = conn.execute("SELECT photo_path FROM wells WHERE well_id = 'C'").fetchone()[0]
+            with Image.open(tmp / "project" / compact) as im:
+                assert max(im.size) == 1600, im.size
+    print("✅ Attachments deduplicated by hash, paths rewritten, uploads sent once")
+
+
+def test_history():
+    """Test the Parquet list history: deltas per dated file, incremental ingest, queries"""
+    print("🧪 Testing OCC list history...")
+
+    import tempfile
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    from sources import OCC_COLUMNS
+    import io
+    import contextlib
+    import pandas as pd
+    from history import entered, ingest, load_index, removed, well_history
+    from history import main as history_main
+    from priority_score import load_config, recently_entered
+
+    releases = {
+        "2025-09-01": [("35001", "AC"), ("35002", "AC")],
+        "2025-09-08": [("35001", "PA"), ("35002", "AC"), ("35003", "AC")],
+        "2025-09-15": [("35001", "PA"), ("35003", "AC")],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        sources = {"STFD": {"pattern": [str(tmp / "*stfd*.csv")], "columns": OCC_COLUMNS, "dtypes": {"API": str}}}
+
+        def write(d):
+            rows = "\n".join(f"{api},{status},-97.0,35.0" for api, status in releases[d])
+            (tmp / f"stfd-well-list {d}.csv").write_text(f"API,WellStatus,X,Y\n{rows}\n")
+
+        hist = str(tmp / "history")
+        write("2025-09-01")
+        write("2025-09-08")
+        assert ingest(hist, sources=sources)["files"] == 2
+        write("2025-09-15")
+        assert ingest(hist, sources=sources) == {"files": 1, "rows": 1}, "Only the new file's delta is added"
+        assert ingest(hist, sources=sources)["files"] == 0
+
+        kinds = [(e["kind"], e.get("added"), e.get("changed"), e.get("removed")) for e in load_index(hist)["STFD"]]
+        assert kinds == [("base", None, None, None), ("delta", 1, 1, 0), ("delta", 0, 0, 1)], kinds
+        assert entered("STFD", 30, "2025-09-15", hist)["well_id"].tolist() == ["35003"]
+        assert entered("STFD", 3, "2025-09-15", hist).empty
+        assert removed("STFD", 30, "2025-09-15", hist)["well_id"].tolist() == ["35002"]
+        assert recently_entered({**load_config(None), "history_dir": hist},
+                                pd.Timestamp("2025-09-15").date()) == ["35003"]
+        h = well_history("35001", hist)
+        assert list(zip(h["dataset_date"], h["op"], h["well_status"])) == [
+            ("2025-09-01", "base", "AC"), ("2025-09-08", "changed", "PA")]
+
+        # A plugged well's removed row has NA attributes; the CLI prints it instead of failing
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            history_main(["--dir", hist, "well", "35002"])
+            history_main(["--dir", hist, "entered", "--days", "30", "--as-of", "2025-09-15"])
+        lines = out.getvalue().splitlines()
+        assert lines[-3].split()[:3] == ["2025-09-15", "STFD", "removed"], lines
+        assert "35003" in lines[-1], lines
+
+        # An older file arriving late rebuilds the chain from it
+        releases["2025-08-25"] = [("35002", "AC")]
+        write("2025-08-25")
+        ingest(hist, sources=sources)
+        assert [e["dataset_date"] for e in load_index(hist)["STFD"]][0] == "2025-08-25"
+        assert entered("STFD", 30, "2025-09-15", hist)["well_id"].tolist() == ["35001", "35003"]
+    print("✅ History stores one delta per release; entered/removed/status history queries work")
+
+
+def test_export_wells():
+    """Test filtered streaming exports: index-backed filters, bbox, formats, per-county files"""
+    print("🧪 Testing well exports...")
+
+    import json
+    import tempfile
+    import pandas as pd
+    import pyogrio
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    from export_wells import build_where, export, export_per_county, main as export_main, query_plan
+    from manifest import sha256_file
+
+    df = pd.DataFrame({"well_id": ["A", "B", "C", "D"], "source_list": ["STFD", "ORPHAN", "ORPHAN", "STFD"],
+                       "well_type": "GAS", "county_name": ["ROGERS", "ROGERS", "CREEK", "CREEK"],
+                       "small_leak": [1, 0, 0, 0], "viable_leak": [0, 0, 1, 0],
+                       "X": [-95.6, -95.5, -96.4, -96.3], "Y": [36.3, 36.4, 35.9, 35.8]})
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        gpkg = str(tmp / "wells.gpkg")
+        prep.write_gpkg(prep.ensure_columns(df), gpkg)
+        digest = sha256_file(gpkg)
+        assert "idx_wells_leaks" in " ".join(query_plan(gpkg, build_where(leaks=True)))
+        assert "idx_wells_county_name" in " ".join(query_plan(gpkg, build_where(counties=["rogers"])))
+
+        assert export(gpkg, str(tmp / "leaks.geojsonl"), "geojsonseq", build_where(leaks=True)) == 2
+        features = [json.loads(l) for l in (tmp / "leaks.geojsonl").read_text().splitlines()]
+        assert sorted(f["properties"]["well_id"] for f in features) == ["A", "C"]
+        assert features[0]["geometry"]["type"] == "Point"
+
+        assert export(gpkg, str(tmp / "box.fgb"), "fgb", bbox=(-96.0, 36.0, -95.0, 37.0)) == 2
+        assert sorted(pyogrio.read_dataframe(str(tmp / "box.fgb"))["well_id"]) == ["A", "B"]
+
+        export(gpkg, str(tmp / "orphan.csv"), "csv", build_where(sources=["orphan"]), columns=["well_id", "X", "Y"])
+        csv = pd.read_csv(tmp / "orphan.csv")
+        assert list(csv.columns) == ["well_id", "X", "Y"] and sorted(csv["well_id"]) == ["B", "C"]
+
+        counts = export_per_county(gpkg, str(tmp / "counties"), "fgb", ["Rogers", "Creek"], jobs=2, leaks=True)
+        assert {Path(p).name: n for p, n in counts.items()} == {"rogers.fgb": 1, "creek.fgb": 1}
+        export_main([str(tmp / "cli.csv"), "--gpkg", gpkg, "--leaks"])
+        assert sha256_file(gpkg) == digest, "An export must not modify its source GeoPackage"
+    print("✅ Exports stream filtered wells to GeoJSON-seq, FlatGeobuf and CSV")
+
+
+def test_tile_server():
+    """Test the read-only tile / GeoJSON service: MVT encoding, cache eviction on edits, HTTP"""
+    print("🧪 Testing tile server...")
+
+    import asyncio
+    import json
+    import sqlite3
+    import tempfile
+    import threading
+    import urllib.request
+    import pandas as pd
+    import pyogrio
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    from gpkg_utils import register_gpkg_functions
+    from tile_server import TileServer, WellService, tile_position
+
+    df = pd.DataFrame({"well_id": ["A", "B", "C"], "source_list": ["STFD", "ORPHAN", "ORPHAN"],
+                       "well_type": "GAS", "county_name": ["ROGERS", "ROGERS", "CREEK"],
+                       "X": [-95.6, -95.5, -96.4], "Y": [36.3, 36.4, 35.9]})
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        gpkg = str(tmp / "wells.gpkg")
+        prep.write_gpkg(prep.ensure_columns(df), gpkg)
+        with sqlite3.connect(gpkg) as conn:
+            register_gpkg_functions(conn)
+            conn.execute("UPDATE wells SET last_edit_utc = '2025-09-01T00:00:00Z'")
+        svc = WellService(gpkg, readers=2)
+
+        # A decoded tile holds the wells inside it, at their positions
+        z = 10
+        rogers = tuple(int(v) for v in tile_position(-95.6, 36.3, z))
+        creek = tuple(int(v) for v in tile_position(-96.4, 35.9, z))
+        path = tmp / str(z) / str(rogers[0]) / f"{rogers[1]}.pbf"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(svc.tile(z, *rogers))
+        decoded = pyogrio.read_dataframe(str(path), layer="wells")
+        assert decoded["well_id"].tolist() == ["A"] and decoded["source_list"].tolist() == ["STFD"]
+        lon = decoded.to_crs(4326).geometry.x.iloc[0]
+        assert abs(lon + 95.6) < 0.001, lon
+        assert svc.tile(z, *rogers, {"sources": ["ORPHAN"]}) == b""
+
+        # An edit evicts only the tiles around the edited well
+        svc.tile(z, *creek)
+        assert svc.tile(z, *creek) is svc.tile(z, *creek) and svc.cache.hits >= 2
+        with sqlite3.connect(gpkg) as conn:
+            register_gpkg_functions(conn)
+            conn.execute("UPDATE wells SET small_leak = 1 WHERE well_id = 'C'")
+        assert svc.refresh(force=True) == "evicted"
+        keys = {k[:3] for k in svc.cache._tiles}
+        assert (z, *rogers) in keys and (z, *creek) not in keys
+
+        # HTTP on a background loop
+        loop = asyncio.new_event_loop()
+        server = TileServer(svc, workers=2)
+        srv = loop.run_until_complete(server.start("127.0.0.1", 0))
+        port = srv.sockets[0].getsockname()[1]
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            base = f"http://127.0.0.1:{port}"
+            with urllib.request.urlopen(f"{base}/wells.geojson?county=rogers&source=STFD") as r:
+                assert r.headers["Content-Type"] == "application/geo+json"
+                features = json.load(r)["features"]
+            assert [f["properties"]["well_id"] for f in features] == ["A"]
+            assert features[0]["geometry"]["coordinates"] == [-95.6, 36.3]
+            with urllib.request.urlopen(f"{base}/wells.geojson?bbox=-97,35.5,-96,36&leaks=1") as r:
+                assert [f["properties"]["well_id"] for f in json.load(r)["features"]] == ["C"]
+            with urllib.request.urlopen(f"{base}/tiles/{z}/{creek[0]}/{creek[1]}.pbf") as r:
+                assert r.headers["Content-Type"] == "application/vnd.mapbox-vector-tile" and r.read()
+            with urllib.request.urlopen(f"{base}/progress") as r:
+                progress = json.load(r)
+            assert progress["wells"] == 3 and {c["county"]: c["leaks"] for c in progress["counties"]} == {
+                "CREEK": 1, "ROGERS": 0}
+            for bad, code in (("/tiles/3/99/0.pbf", 400), ("/nope", 404)):
+                try:
+                    urllib.request.urlopen(base + bad)
+                    raise AssertionError(f"{bad} should fail")
+                except urllib.error.HTTPError as e:
+                    assert e.code == code, (bad, e.code)
+        finally:
+            srv.close()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            server.close()
+            svc.close()
+    print("✅ Tile server encodes MVT, evicts edited tiles and serves GeoJSON over HTTP")
+
+
+def test_fake_qfieldcloud_deploy():
+    """Test deploy.py end to end against the in-process fake QFieldCloud: retries, media delta uploads"""
+    print("🧪 Testing deploy against fake QFieldCloud...")
+
+    import json
+    import tempfile
+    from zipfile import ZipFile
+    sys.path.insert(0, str(Path.cwd()))
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import deploy
+    from fake_qfieldcloud import FakeCloud, QfcRequestException, installed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        zip_path = tmp / "pkg.zip"
+        with ZipFile(zip_path, "w") as z:
+            z.writestr("qgis/wells_project_dev.qgz", b"project")
+            z.writestr("qgis/wells_dev.gpkg", b"g" * 4096)
+        media = tmp / "qgis"
+        (media / "media").mkdir(parents=True)
+        (media / "media" / "abc.jpg").write_bytes(b"j" * 1000)
+        index = tmp / "index.json"
+        index.write_text(json.dumps({"objects": {"abc": {"ext": ".jpg", "bytes": 5000, "compact": "media/abc.jpg"}},
+                                     "uploaded": {}}))
+
+        backoff, deploy.RETRY_BACKOFF = deploy.RETRY_BACKOFF, 0.0
+        cloud = FakeCloud(fail={"upload_file": 2})
+        try:
+            with installed(cloud):
+                project_id = deploy.deploy_to_qfieldcloud(zip_path, "field-wells-dev", str(media), str(index))
+                first = cloud.stats()
+                project = cloud.projects[project_id]
+                assert project["project_filename"] == "wells_project_dev.qgz"
+                assert "Deployed:" in project["description"] and len(cloud.jobs) == 1
+                assert sorted(cloud.files[project_id]) == ["media/abc.jpg", "wells_dev.gpkg", "wells_project_dev.qgz"]
+                assert first["failed"] == 2 and first["uploads"] == 3, first
+
+                # Same project again: found by name, media already there
+                cloud.reset_stats()
+                assert deploy.deploy_to_qfieldcloud(zip_path, "field-wells-dev", str(media), str(index)) == project_id
+                second = cloud.stats()
+                assert second["uploads"] == 2 and "create_project" not in second["per_method"]
+                assert first["bytes_uploaded"] - second["bytes_uploaded"] == 1000
+
+                cloud.fail["upload_file"] = deploy.UPLOAD_ATTEMPTS
+                try:
+                    deploy.deploy_to_qfieldcloud(zip_path, "field-wells-dev", str(media), str(index))
+                    raise AssertionError("A persistent upload failure must abort the deploy")
+                except QfcRequestException:
+                    pass
+
+                # Client errors (auth, missing project) are not retried
+                cloud.reset_stats()
+                cloud.fail["upload_file"], cloud.fail_status = 1, 403
+                try:
+                    deploy.deploy_to_qfieldcloud(zip_path, "field-wells-dev", str(media), str(index))
+                    raise AssertionError("A 403 must abort the deploy")
+                except QfcRequestException as e:
+                    assert e.response.status_code == 403
+                assert cloud.stats()["per_method"]["upload_file"] == 1, cloud.stats()
+                assert deploy.is_transient(ConnectionError()) and not deploy.is_transient(FileNotFoundError())
+        finally:
+            deploy.RETRY_BACKOFF = backoff
+        assert "qfieldcloud_sdk.sdk" not in sys.modules or not hasattr(sys.modules["qfieldcloud_sdk.sdk"].Client, "cloud")
+    print("✅ Deploy retries failed uploads and sends media once per project")
+
+
+def test_validate_surveys():
+    """Test survey GPS checks: WKT parsing, haversine distance, arrival confirmation, incremental rewrite"""
+    print("🧪 Testing survey location validation...")
+
+    import sqlite3
+    import tempfile
+    import numpy as np
+    import pandas as pd
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    from gpkg_utils import register_gpkg_functions
+    from validate_surveys import haversine_m, parse_points, validate
+
+    x, y = parse_points(pd.Series(["POINT(-97 35)", "Point Z (-96.5 35.1 300)", None, "POINT(1.2.3 4)",
+                                   "POINT (500000 4000000)"]))
+    assert x[:2].tolist() == [-97.0, -96.5] and y[:2].tolist() == [35.0, 35.1] and np.isnan(x[2:]).all()
+    # One degree of latitude is about 111.2 km
+    assert abs(haversine_m(np.array([-97.0]), np.array([35.0]), np.array([-97.0]), np.array([36.0]))[0]
+               - 111195) < 10
+
+    df = pd.DataFrame({"well_id": ["A", "B", "C"], "source_list": "ORPHAN", "well_type": "GAS",
+                       "X": [-97.0, -96.0, -95.0], "Y": [35.0, 35.0, 35.0]})
+    with tempfile.TemporaryDirectory() as tmp:
+        gpkg = str(Path(tmp) / "wells.gpkg")
+        prep.write_gpkg(prep.ensure_columns(df), gpkg)
+        with sqlite3.connect(gpkg) as conn:
+            register_gpkg_functions(conn)
+            conn.executemany(
+                "INSERT INTO well_surveys (well_id, survey_location, survey_date) VALUES (?, ?, ?)",
+                [("A", "POINT(-97.0002 35.0001)", "2025-09-02T10:00:00Z"),  # ~20 m
+                 ("B", "POINT(-96.0 35.0015)", "2025-09-02T11:00:00Z"),  # ~167 m
+                 ("C", "POINT(-95.01 35.0)", "2025-09-02T12:00:00Z"),  # ~910 m
+                 ("Z", "POINT(-95.0 35.0)", "2025-09-02T13:00:00Z"),
+                 ("A", None, "2025-09-03T10:00:00Z")])
+            # Device state before validation: visited by the survey trigger, found still unknown
+            conn.execute("UPDATE wells SET last_edit_utc = '2025-09-02T10:00:00Z'")
+            s = validate(conn)
+            assert {k: s[k] for k in ("arrived", "near", "far", "no_location", "no_well", "confirmed")} == {
+                "arrived": 1, "near": 1, "far": 1, "no_location": 1, "no_well": 1, "confirmed": 1}, s
+            wells = {w: (f, v, e) for w, f, v, e in conn.execute(
+                'SELECT well_id, "found", visited, last_edit_utc FROM wells')}
+            assert wells["A"] == (1, 1, "2025-09-02T10:00:00Z"), wells["A"]
+            assert wells["C"][0] == -1
+            closest = conn.execute("SELECT min(distance_m) FROM survey_checks WHERE well_id = 'A'").fetchone()[0]
+            assert 15 < closest < 30, closest
+            plan = " ".join(r[-1] for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT min(distance_m) FROM survey_checks WHERE well_id = 'A'"))
+            assert "idx_survey_checks_well" in plan, plan
+
+            # Unchanged surveys are not rewritten; a tighter radius reclassifies
+            conn.execute("UPDATE survey_checks SET checked_utc = 'kept'")
+            validate(conn)
+            assert conn.execute("SELECT count(*) FROM survey_checks WHERE checked_utc = 'kept'").fetchone()[0] == 5
+            assert validate(conn, arrived_m=10)["near"] == 2
+
+            # A reset survives re-validation: the recorded arrival does not confirm the well again
+            validate(conn)
+            conn.execute("UPDATE wells SET reset_survey = 1 WHERE well_id = 'A'")
+            assert validate(conn)["confirmed"] == 0
+            assert conn.execute('SELECT "found", visited FROM wells WHERE well_id = \'A\'').fetchone() == (-1, 0)
+    print("✅ Survey locations are parsed, measured, flagged and arrivals confirmed")
+
+
+def test_survey_storage():
+    """Test well_surveys as a point layer: R-tree, epoch triggers, migration of the old text layout"""
+    print("🧪 Testing survey storage...")
+
+    import sqlite3
+    import tempfile
+    import pandas as pd
+    import pyogrio
+    sys.path.insert(0, str(Path.cwd() / "scripts"))
+    import prepare_wells_gpkg as prep
+    from gpkg_utils import gpkg_point, register_gpkg_functions
+
+    df = pd.DataFrame({"well_id": ["A", "B"], "source_list": "ORPHAN", "well_type": "GAS",
+                       "X": [-97.0, -96.0], "Y": [35.0, 35.0]})
+    with tempfile.TemporaryDirectory() as tmp:
+        gpkg = str(Path(tmp) / "wells.gpkg")
+        prep.write_gpkg(prep.ensure_columns(df), gpkg)
+        with sqlite3.connect(gpkg) as conn:
+            register_gpkg_functions(conn)
+            conn.execute("INSERT INTO well_surveys (well_id, geom, survey_date) VALUES ('A', ?, ?)",
+                         (gpkg_point(-97.0001, 35.0), "2025-09-02T05:00:00-05:00"))
+            conn.execute("INSERT INTO well_surveys (well_id, survey_epoch) VALUES ('B', 1756800000)")
+            rows = conn.execute("SELECT survey_date, survey_epoch FROM well_surveys ORDER BY survey_id").fetchall()
+            assert rows == [("2025-09-02T05:00:00-05:00", 1756807200), ("2025-09-02T08:00:00Z", 1756800000)], rows
+            conn.execute("UPDATE well_surveys SET survey_date = '2025-09-03T00:00:00Z' WHERE well_id = 'B'")
+            assert conn.execute("SELECT survey_epoch FROM well_surveys WHERE well_id = 'B'").fetchone() == (1756857600,)
+            assert conn.execute("SELECT id FROM rtree_well_surveys_geom WHERE minx < -96.5").fetchall() == [(1,)]
+            plan = " ".join(r[-1] for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT survey_id FROM well_surveys WHERE survey_epoch >= 1756000000"))
+            assert "idx_surveys_epoch" in plan, plan
+        info = pyogrio.read_info(gpkg, layer="well_surveys")
+        assert info["geometry_type"] == "Point" and info["features"] == 2, info
+
+        # A file from before the point layer: text dates and WKT positions only
+        with sqlite3.connect(gpkg) as conn:
+            for name, kind in conn.execute("SELECT name, type FROM sqlite_master WHERE name LIKE 'rtree_well_surveys%' "
+                                           "OR (type = 'trigger' AND name LIKE 'survey_%')").fetchall():
+                if kind in ("table", "trigger"):
+                    conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+            conn.execute("DROP TABLE well_surveys")
+            for t in ("gpkg_contents", "gpkg_geometry_columns", "gpkg_extensions"):
+                conn.execute(f"DELETE FROM {t} WHERE table_name = 'well_surveys'")
+            conn.execute("CREATE TABLE well_surveys (survey_id INTEGER PRIMARY KEY AUTOINCREMENT, well_id TEXT NOT NULL, "
+                         "survey_date TEXT, survey_location TEXT)")
+            conn.execute("CREATE INDEX idx_surveys_date ON well_surveys (survey_date)")
+            conn.executemany("INSERT INTO well_surveys (well_id, survey_date, survey_location) VALUES (?, ?, ?)",
+                             [("A", "2025-09-02T10:00:00Z", "POINT(-97.0002 35.0001)"),
+                              ("B", "2025-09-03T10:00:00Z", None)])
+            assert prep.migrate_survey_table(conn) == {"geom": 1, "epoch": 2}
+            assert prep.migrate_survey_table(conn) == {"geom": 0, "epoch": 0}
+            conn.commit()
+            names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+            assert "idx_surveys_date" not in names and {"idx_surveys_epoch", "survey_epoch_insert"} <= names
+            assert conn.execute("SELECT count(*) FROM rtree_well_surveys_geom").fetchone() == (1,)
+        migrated = pyogrio.read_dataframe(gpkg, layer="well_surveys")
+        assert migrated.geometry.iloc[0].x == -97.0002 and migrated.geometry.iloc[1] is None
+    print("✅ Survey points are R-tree indexed, timestamps kept as epoch seconds, old files migrated")
+
+
 def run_all_tests():
     """Run all tests"""
     tests = [
@@ -176,6 +1109,24 @@ def run_all_tests():
         test_data_processing,
         test_qgis_project_build,
         test_deployment_package,
+        test_reset_survey,
+        test_source_registry,
+        test_xlsx_ingestion,
+        test_snapshots,
+        test_mobile_profile,
+        test_near_duplicates,
+        test_cli_manifest,
+        test_lean_write,
+        test_priority_score,
+        test_master_store,
+        test_qgs_writer,
+        test_attachments,
+        test_history,
+        test_export_wells,
+        test_tile_server,
+        test_fake_qfieldcloud_deploy,
+        test_validate_surveys,
+        test_survey_storage,
         test_credentials_check
     ]
     